@@ -0,0 +1,40 @@
+"""
+Measure how proxy construction time evolves as more proxies are created.
+
+Construction should cost the same regardless of how many proxies already
+exist. Run from the repository root with
+``python benchmarks/bench_proxy_construction.py``.
+"""
+
+import time
+import argparse
+from pathlib import Path
+
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed.resolve import current_registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=10_000, help="Proxies per round")
+    parser.add_argument("--rounds", type=int, default=10, help="Number of rounds")
+    args = parser.parse_args()
+
+    path = Path("/path/to/volume.vol")
+    alive = []  # Keep proxies around so the process state grows between rounds
+
+    print(f"{'Proxies':>10} {'us/proxy':>10} {'Edges':>8}")
+
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        alive.extend(SpiderFile(path) for _ in range(args.n))
+        elapsed = time.perf_counter() - start
+
+        per_proxy = elapsed / args.n * 1e6
+        n_edges = current_registry().graph.number_of_edges()
+
+        print(f"{len(alive):>10} {per_proxy:>10.2f} {n_edges:>8}")
+
+
+if __name__ == "__main__":
+    main()
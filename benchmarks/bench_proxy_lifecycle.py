@@ -0,0 +1,96 @@
+"""
+Measure creation and destruction throughput of proxies and function parameters.
+
+Run from the repository root with ``python benchmarks/bench_proxy_lifecycle.py``.
+"""
+
+import os
+import gc
+import time
+import argparse
+from pathlib import Path
+
+from scipion_bridge.core.environment.container import Container
+from scipion_bridge.core.typed.proxy import Proxy, FuncParam, namedproxy
+
+Volume = namedproxy("Volume", file_ext=".vol")
+
+
+class NullTemporaryFiles:
+
+    def __init__(self):
+        self.count = 0
+
+    def new_temporary_file(
+        self, suffix: str, expected_size=None, preallocate=False
+    ) -> os.PathLike:
+        self.count += 1
+        return Path(f"/tmp/bench_{self.count}{suffix}")
+
+    def delete(self, path: os.PathLike):
+        pass
+
+
+def _churn_unmanaged(n: int):
+    path = Path("/path/to/volume.vol")
+    for _ in range(n):
+        proxy = Proxy(path)
+        del proxy
+
+
+def _churn_managed(n: int):
+    for _ in range(n):
+        proxy = Volume.new_temporary_proxy()
+        del proxy
+
+
+def _churn_func_params(n: int):
+    owner = Volume.new_temporary_proxy()
+    str_rep = str(owner.path)
+
+    for _ in range(n):
+        param = FuncParam(str_rep, Volume, managed_proxy=True, owner=owner)
+        del param
+
+
+def _measure(func, n: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+
+        start = time.perf_counter()
+        func(n)
+        best = min(best, time.perf_counter() - start)
+
+    return n / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=100_000, help="Objects per round")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of rounds")
+    args = parser.parse_args()
+
+    container = Container()
+    container.wire(
+        modules=[
+            __name__,
+            "scipion_bridge.core.typed.proxy",
+            "scipion_bridge.core.utils.arc",
+        ]
+    )
+
+    benchmarks = [
+        ("Proxy (unmanaged)", _churn_unmanaged),
+        ("Proxy (managed)", _churn_managed),
+        ("FuncParam", _churn_func_params),
+    ]
+
+    with container.temp_file_provider.override(NullTemporaryFiles()):
+        for name, func in benchmarks:
+            throughput = _measure(func, args.n, args.repeat)
+            print(f"{name:<20} {throughput:>12,.0f} create+destroy/s")
+
+
+if __name__ == "__main__":
+    main()
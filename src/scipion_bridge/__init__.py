@@ -0,0 +1,3 @@
+from .core.utils.arena import arena
+from .core.utils.pipeline import pipeline
+from .core.typed.proxy import prefetch
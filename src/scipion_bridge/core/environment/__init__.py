@@ -1,7 +1,13 @@
 def configure_default_env():
+    """
+    Wire the default container and return it; use ``container.config`` to set
+    options such as ``temp_files.fast_dir``.
+    """
     from .container import Container
 
     container = Container()
     container.wire(
         modules=[__name__, "scipion_bridge.ffi.scipion"], packages=["scipion_bridge"]
     )
+
+    return container
@@ -0,0 +1,214 @@
+import os
+import logging
+import threading
+from dataclasses import dataclass, field
+from enum import Enum
+
+from .temp_files import Tier
+
+from typing import Dict, Optional, Tuple
+
+# Seconds to wait for space before giving up. Space is only freed when other
+# files are released, which may never happen in a single-threaded caller
+DEFAULT_TIMEOUT = 300.0
+
+
+class ScratchBudgetExceeded(RuntimeError):
+    pass
+
+
+class BudgetPolicy(Enum):
+    BLOCK = "block"  # Wait for other files to be released
+    SPILL = "spill"  # Move to a slower tier, and wait if that is full too
+
+
+@dataclass(frozen=True)
+class ScratchUsage:
+    live_bytes: int = 0
+    peak_bytes: int = 0
+    live_files: int = 0
+    peak_files: int = 0
+
+
+@dataclass(frozen=True)
+class ScratchMetrics:
+    total: ScratchUsage
+    by_tier: Dict[Tier, ScratchUsage] = field(default_factory=dict)
+    by_type: Dict[str, ScratchUsage] = field(default_factory=dict)
+
+
+class _Usage:
+    __slots__ = ("live_bytes", "peak_bytes", "live_files", "peak_files")
+
+    def __init__(self) -> None:
+        self.live_bytes = 0
+        self.peak_bytes = 0
+        self.live_files = 0
+        self.peak_files = 0
+
+    def add(self, n_bytes: int, n_files: int):
+        self.live_bytes += n_bytes
+        self.live_files += n_files
+        self.peak_bytes = max(self.peak_bytes, self.live_bytes)
+        self.peak_files = max(self.peak_files, self.live_files)
+
+    def snapshot(self) -> ScratchUsage:
+        return ScratchUsage(
+            self.live_bytes, self.peak_bytes, self.live_files, self.peak_files
+        )
+
+
+class ScratchBudget:
+    """
+    Account the bytes of managed temporary files and limit how many may live
+    on each tier. Files are charged their expected size when the name is
+    reserved and their actual size once measured (see
+    :meth:`TemporaryFilesProvider.complete`).
+
+    Files whose size is not known up front are charged nothing until measured,
+    so they are never held back by the budget. Usage is broken down by tier and
+    by file extension, which identifies the proxy type.
+
+    Waiting for space raises :class:`ScratchBudgetExceeded` after ``timeout``
+    seconds (:data:`DEFAULT_TIMEOUT` if not given).
+    """
+
+    def __init__(
+        self,
+        fast_max_bytes: Optional[int] = None,
+        bulk_max_bytes: Optional[int] = None,
+        policy: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        self.limits = {
+            Tier.FAST: int(fast_max_bytes) if fast_max_bytes is not None else None,
+            Tier.BULK: int(bulk_max_bytes) if bulk_max_bytes is not None else None,
+        }
+        self.policy = BudgetPolicy(policy or BudgetPolicy.BLOCK.value)
+        self.timeout = float(timeout) if timeout is not None else DEFAULT_TIMEOUT
+
+        self._files: Dict[str, Tuple[Tier, str, int]] = {}
+
+        self._total = _Usage()
+        self._by_tier = {tier: _Usage() for tier in Tier}
+        self._by_type: Dict[str, _Usage] = {}
+
+        self._condition = threading.Condition()
+
+    def _fits(self, tier: Tier, n_bytes: int) -> bool:
+        limit = self.limits[tier]
+        return limit is None or self._by_tier[tier].live_bytes + n_bytes <= limit
+
+    def _candidates(self, tier: Tier, spill_to: Optional[Tier]):
+        if self.policy == BudgetPolicy.SPILL and spill_to not in (None, tier):
+            return (tier, spill_to)
+
+        return (tier,)
+
+    def acquire(
+        self, n_bytes: int, tier: Tier, spill_to: Optional[Tier] = None
+    ) -> Tier:
+        """
+        Charge ``n_bytes`` to ``tier`` (or ``spill_to`` when spilling) and
+        return the tier the file should be created on. Blocks while no
+        candidate tier has enough room.
+        """
+        candidates = self._candidates(tier, spill_to)
+
+        # Waiting would never end for files larger than the whole budget
+        limits = [self.limits[t] for t in candidates]
+        if all(limit is not None and n_bytes > limit for limit in limits):
+            raise ScratchBudgetExceeded(
+                f"File of {n_bytes} bytes exceeds the scratch budget of {max(limits)} bytes"  # type: ignore
+            )
+
+        def _select() -> Optional[Tier]:
+            return next((t for t in candidates if self._fits(t, n_bytes)), None)
+
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: _select() is not None, self.timeout
+            ):
+                raise ScratchBudgetExceeded(
+                    f"Timed out waiting for {n_bytes} bytes of scratch space"
+                )
+
+            selected = _select()
+            assert selected is not None
+
+            self._by_tier[selected].add(n_bytes, 0)
+
+        if selected != tier:
+            logging.debug(
+                f"Spilling {n_bytes} bytes from {tier.name} to {selected.name}"
+            )
+
+        return selected
+
+    def track(self, path: os.PathLike, tier: Tier, kind: str, n_bytes: int):
+        """Record a file created after charging ``n_bytes`` with :meth:`acquire`."""
+        with self._condition:
+            self._files[os.fspath(path)] = (tier, kind, n_bytes)
+
+            self._by_tier[tier].add(0, 1)
+            self._total.add(n_bytes, 1)
+            self._by_type.setdefault(kind, _Usage()).add(n_bytes, 1)
+
+    def _update(self, tier: Tier, kind: str, n_bytes: int, n_files: int):
+        self._by_tier[tier].add(n_bytes, n_files)
+        self._total.add(n_bytes, n_files)
+        self._by_type[kind].add(n_bytes, n_files)
+
+    def resize(self, path: os.PathLike, n_bytes: int):
+        """Charge a tracked file its actual size, even if that exceeds the limit."""
+        with self._condition:
+            entry = self._files.get(os.fspath(path))
+            if entry is None:
+                return
+
+            tier, kind, charged = entry
+            self._files[os.fspath(path)] = (tier, kind, n_bytes)
+            self._update(tier, kind, n_bytes - charged, 0)
+
+            self._condition.notify_all()
+
+    def move(self, path: os.PathLike, new_path: os.PathLike):
+        with self._condition:
+            entry = self._files.pop(os.fspath(path), None)
+            if entry is not None:
+                self._files[os.fspath(new_path)] = entry
+
+    def transfer(self, path: os.PathLike, to_path: os.PathLike):
+        """Move the bytes charged to a file to another file sharing its data."""
+        with self._condition:
+            entry = self._files.get(os.fspath(path))
+            target = self._files.get(os.fspath(to_path))
+            if entry is None or target is None:
+                return
+
+            tier, kind, charged = entry
+            self._files[os.fspath(path)] = (tier, kind, 0)
+            self._update(tier, kind, -charged, 0)
+
+            tier, kind, target_charged = target
+            self._files[os.fspath(to_path)] = (tier, kind, target_charged + charged)
+            self._update(tier, kind, charged, 0)
+
+    def release(self, path: os.PathLike):
+        with self._condition:
+            entry = self._files.pop(os.fspath(path), None)
+            if entry is None:
+                return
+
+            tier, kind, charged = entry
+            self._update(tier, kind, -charged, -1)
+
+            self._condition.notify_all()
+
+    def metrics(self) -> ScratchMetrics:
+        with self._condition:
+            return ScratchMetrics(
+                total=self._total.snapshot(),
+                by_tier={t: u.snapshot() for t, u in self._by_tier.items()},
+                by_type={k: u.snapshot() for k, u in self._by_type.items()},
+            )
@@ -0,0 +1,265 @@
+import os
+import json
+import stat
+import shutil
+import hashlib
+import logging
+import time
+import tempfile
+import threading
+from pathlib import Path
+
+from .dedup import content_digest
+from .temp_files import SIDECAR_SUFFIXES, derived_files
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MAX_BYTES = 32 * 1024**3
+
+ENTRY_FILE = "entry.json"
+
+Fingerprint = Tuple[int, int, int]
+
+
+def _fingerprint(path: os.PathLike) -> Fingerprint:
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _mark_used(entry_dir: Path):
+    # File systems stamp files with a coarse clock, so set the time explicitly
+    # to keep entries written in quick succession in order
+    now = time.time_ns()
+    os.utime(entry_dir / ENTRY_FILE, ns=(now, now))
+
+
+def _link_or_copy(src: os.PathLike, dst: os.PathLike):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class CallCache:
+    """
+    Persistent cache of the outputs of proxified calls, keyed by the function,
+    its arguments and fingerprints of its input files. Calls to external
+    programs are keyed by their command line and binary instead (see
+    :meth:`command_key`). Disabled unless a ``directory`` is set.
+
+    Input files are identified by inode, size and modification time, or by
+    their contents with ``hash_inputs``. Contents of outputs are hashed when
+    they are stored, so a call consuming an output of an earlier (cached)
+    call can be found again in later runs. Entries are evicted least recently
+    used first once they take more than ``max_bytes``.
+
+    Cached files are read-only and hard-linked into the scratch directory if
+    possible, so restored outputs must not be modified in place.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+        hash_inputs: Optional[bool] = None,
+    ) -> None:
+        self.directory = Path(directory) if directory else None
+        self.max_bytes = int(max_bytes) if max_bytes is not None else DEFAULT_MAX_BYTES
+        self.hash_inputs = bool(hash_inputs)
+
+        # Contents of files written or restored by this process
+        self._digests: Dict[Fingerprint, str] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def _input_key(self, path: str) -> List[Any]:
+        file_fingerprint = _fingerprint(path)
+
+        with self._lock:
+            digest = self._digests.get(file_fingerprint)
+
+        if digest is None and self.hash_inputs:
+            digest = content_digest(path)
+            with self._lock:
+                self._digests[file_fingerprint] = digest
+
+        if digest is not None:
+            return ["content", digest]
+
+        return ["file", os.path.abspath(path), *file_fingerprint]
+
+    def _normalize(self, value: Any) -> Any:
+        if isinstance(value, tuple) and value[0] == "input":
+            return self._input_key(value[1])
+        elif isinstance(value, (tuple, list)):
+            return [self._normalize(v) for v in value]
+
+        return value
+
+    @staticmethod
+    def _digest(contents: Any) -> str:
+        contents = json.dumps(contents, sort_keys=True)
+        return hashlib.blake2b(contents.encode(), digest_size=20).hexdigest()
+
+    def key(self, func_name: str, arguments: Sequence[Tuple[str, Any]]) -> str:
+        """
+        Key of a call. ``arguments`` are ``(name, value)`` pairs where values
+        are strings, input files as ``("input", path)`` or outputs as
+        ``("output", extension)``.
+        """
+        normalized = [[name, self._normalize(value)] for name, value in arguments]
+        return self._digest([func_name, normalized])
+
+    def command_key(self, command: Sequence[Any], binary: str) -> str:
+        """
+        Key of a call to an external program from its command line, with
+        words as the values in :meth:`key`, and the inode, size and
+        modification time of the program's ``binary``. Reinstalling the
+        program invalidates its entries.
+        """
+        try:
+            binary_key = [os.path.realpath(binary), *_fingerprint(binary)]
+        except OSError:
+            binary_key = [binary]
+
+        return self._digest(["command", self._normalize(command), binary_key])
+
+    def _entry_dir(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / key
+
+    @staticmethod
+    def _output_files(path: Path) -> List[Path]:
+        # Untyped outputs are written under a name derived from the reserved
+        # one, e.g. with an extension added by the program; other paths are
+        # cached as given
+        return sorted(
+            file
+            for file in derived_files(path)
+            if not file.name.endswith(SIDECAR_SUFFIXES)
+        )
+
+    def _read_entry(self, key: str) -> Dict[str, Any]:
+        with open(self._entry_dir(key) / ENTRY_FILE) as f:
+            return json.load(f)
+
+    def _register(self, entry: Dict[str, Any], outputs: Sequence[Path]):
+        with self._lock:
+            for path, files in zip(outputs, entry["outputs"]):
+                for tail, digest in files:
+                    self._digests[_fingerprint(f"{path}{tail}")] = digest
+
+    def register(self, key: str, outputs: Sequence[Path]):
+        """
+        Remember the contents of restored outputs, so calls consuming them can
+        be found in the cache. Call it once the files won't be replaced
+        anymore (e.g. by deduplication).
+        """
+        try:
+            self._register(self._read_entry(key), outputs)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def contains(self, key: str) -> bool:
+        return self.enabled and (self._entry_dir(key) / ENTRY_FILE).exists()
+
+    def restore(self, key: str, outputs: Sequence[Path]) -> bool:
+        """Link the cached files of a call to the paths of its outputs."""
+        if not self.enabled:
+            return False
+
+        entry_dir = self._entry_dir(key)
+        try:
+            entry = self._read_entry(key)
+
+            if len(entry["outputs"]) != len(outputs):
+                raise ValueError("Number of outputs changed")
+
+            for path, files in zip(outputs, entry["outputs"]):
+                for tail, digest in files:
+                    _link_or_copy(entry_dir / digest, f"{path}{tail}")
+
+            _mark_used(entry_dir)
+
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logging.warning(f"Ignoring broken call cache entry {entry_dir}: {e}")
+
+            self.misses += 1
+            return False
+
+        self.hits += 1
+        return True
+
+    def store(self, key: str, func_name: str, outputs: Sequence[Path]):
+        """Add the outputs of a finished call to the cache."""
+        if not self.enabled or self._entry_dir(key).exists():
+            return
+
+        assert self.directory is not None
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=self.directory))
+        try:
+            entry: Dict[str, Any] = {"function": func_name, "outputs": []}
+
+            for path in outputs:
+                files = []
+                for file in self._output_files(path):
+                    digest = content_digest(file)
+                    if not (staging / digest).exists():
+                        _link_or_copy(file, staging / digest)
+                        os.chmod(staging / digest, stat.S_IRUSR | stat.S_IRGRP)
+
+                    files.append([file.name[len(path.name) :], digest])
+
+                entry["outputs"].append(files)
+
+            with open(staging / ENTRY_FILE, "w") as f:
+                json.dump(entry, f)
+            _mark_used(staging)
+
+            os.rename(staging, self._entry_dir(key))
+            self._register(entry, outputs)
+
+        except OSError as e:
+            # Another process stored the same call first, or the disk is full
+            logging.debug(f"Could not cache outputs of {func_name}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits."""
+        if not self.enabled or not self.directory.exists():  # type: ignore
+            return
+
+        entries = []
+        total = 0
+        for entry_dir in self.directory.iterdir():  # type: ignore
+            try:
+                used = os.stat(entry_dir / ENTRY_FILE).st_mtime_ns
+                size = sum(f.stat().st_size for f in entry_dir.iterdir())
+            except OSError:
+                continue
+
+            entries.append((used, size, entry_dir))
+            total += size
+
+        for _, size, entry_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        if self.enabled:
+            shutil.rmtree(self.directory, ignore_errors=True)  # type: ignore
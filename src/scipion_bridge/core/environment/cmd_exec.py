@@ -1,6 +1,37 @@
+import os
+import signal
+import asyncio
 from typing import List
 from subprocess import Popen, PIPE
 
+# Time a cancelled program gets to exit after SIGTERM before it is killed
+TERMINATE_TIMEOUT = 5.0
+
+
+def _check_returncode(func_name, returncode: int, err: bytes):
+    if returncode != 0:
+
+        message = err.decode("utf-8") if err else ""
+        error_msg = f"{message}\nExternal call to {func_name} failed with exit code {returncode}"
+
+        raise RuntimeError(error_msg)
+
+
+async def _kill_process_group(proc: asyncio.subprocess.Process):
+    # Programs such as MPI launchers start children of their own; signal the
+    # whole session started for the program
+    for sig, timeout in ((signal.SIGTERM, TERMINATE_TIMEOUT), (signal.SIGKILL, None)):
+        try:
+            os.killpg(proc.pid, sig)
+        except ProcessLookupError:
+            return
+
+        try:
+            await asyncio.wait_for(proc.wait(), timeout)
+            return
+        except asyncio.TimeoutError:
+            continue
+
 
 class ShellExecProvider:
 
@@ -9,14 +40,42 @@ class ShellExecProvider:
         cmd = " ".join(args)
         print(f"[{domain.name}] {cmd}")
 
-        proc = Popen(cmd, **run_args)
+        # Programs are started from argv directly, without a shell in between;
+        # going through a shell is opt-in. On Linux, subprocess uses vfork from
+        # Python 3.10, so starting a program stays cheap even if this process
+        # holds gigabytes of arrays. Older versions fork and copy its page
+        # tables.
+        proc = Popen(cmd if run_args.get("shell") else args, **run_args)
         _, err = proc.communicate()  # Blocks until finished
-        if proc.returncode != 0:
+        _check_returncode(func_name, proc.returncode, err)
+
+        return proc.returncode
+
+    async def run_async(self, func_name, domain, args: List[str], run_args):
+        """
+        Run a program without blocking the event loop. The program runs in a
+        new session, and the whole process group is killed if the call is
+        cancelled.
+        """
+        print(f"[{domain.name}] {' '.join(args)}")
+
+        run_args = dict(run_args)
+        if run_args.pop("shell", False):
+            proc = await asyncio.create_subprocess_shell(
+                " ".join(args), start_new_session=True, **run_args
+            )
+        else:
+            proc = await asyncio.create_subprocess_exec(
+                *args, start_new_session=True, **run_args
+            )
 
-            message = err.decode("utf-8")
-            error_msg = f"{message}\nExternal call to {func_name} failed with exit code {proc.returncode}"
+        try:
+            _, err = await proc.communicate()
+        except asyncio.CancelledError:
+            await asyncio.shield(_kill_process_group(proc))
+            raise
 
-            raise RuntimeError(error_msg)
+        _check_returncode(func_name, proc.returncode, err)  # type: ignore
 
         return proc.returncode
 
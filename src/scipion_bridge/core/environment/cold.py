@@ -0,0 +1,289 @@
+import os
+import gzip
+import time
+import shutil
+import logging
+import threading
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .temp_files import COLD_SUFFIX, PARTIAL_SUFFIX, REFERENCES_SUFFIX
+
+from typing import TYPE_CHECKING, Deque, Dict, Optional
+
+if TYPE_CHECKING:
+    from .budget import ScratchBudget
+    from .io_hints import IOHints
+
+_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+def _compress_member(data: bytes, level: int) -> bytes:
+    # Every chunk is a complete gzip member; concatenated members are a valid
+    # gzip file, so chunks can be compressed in parallel
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_file(
+    path: os.PathLike, target: os.PathLike, level: int = 1, max_workers: int = 4
+):
+    """Compress a file into a multi-member gzip file using several threads."""
+    with open(path, "rb") as src, open(target, "wb") as dst:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending: Deque[Future] = deque()
+
+            # zlib releases the GIL, so a few chunks in flight keep all workers
+            # busy without reading the whole file into memory
+            while True:
+                chunk = src.read(_CHUNK_BYTES)
+                if not chunk:
+                    break
+
+                pending.append(executor.submit(_compress_member, chunk, level))
+                if len(pending) >= 2 * max_workers:
+                    dst.write(pending.popleft().result())
+
+            while pending:
+                dst.write(pending.popleft().result())
+
+
+def decompress_file(path: os.PathLike, target: os.PathLike):
+    with gzip.open(path, "rb") as src, open(target, "wb") as dst:
+        shutil.copyfileobj(src, dst, _CHUNK_BYTES)
+
+
+def cold_path(path: os.PathLike) -> str:
+    return f"{os.fspath(path)}{COLD_SUFFIX}"
+
+
+def is_cold(path: os.PathLike) -> bool:
+    return not os.path.exists(path) and os.path.exists(cold_path(path))
+
+
+class ColdStore:
+    """
+    Compress managed files that have not been accessed for ``idle_seconds``
+    and decompress them when they are accessed again. Files are compressed
+    with zlib rather than lzma, which would take minutes for large maps.
+
+    A file is cold while only its compressed copy (``<path>.gz``) exists, so
+    the state survives renames and is visible to every process. Files that are
+    pinned, hard-linked or shared with other processes are left alone. Set
+    ``idle_seconds`` to enable the store; idle files are then compressed by a
+    background thread.
+
+    Deduplicated files are linked to their blob (see
+    :class:`~scipion_bridge.core.environment.dedup.ContentStore`), so with
+    deduplication enabled only files smaller than its ``min_bytes`` go cold.
+    """
+
+    def __init__(
+        self,
+        idle_seconds: Optional[float] = None,
+        level: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        budget: Optional["ScratchBudget"] = None,
+        io_hints: Optional["IOHints"] = None,
+    ) -> None:
+        self.idle_seconds = float(idle_seconds) if idle_seconds is not None else None
+        self.level = int(level) if level is not None else 1
+        self.max_workers = int(max_workers) if max_workers is not None else 4
+        self.budget = budget
+        self.io_hints = io_hints
+
+        self._last_access: Dict[str, float] = {}
+        self._pins: Dict[str, int] = {}
+        self._file_locks: Dict[str, threading.Lock] = {}
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.idle_seconds is not None
+
+    def _file_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._file_locks.setdefault(key, threading.Lock())
+
+    def _start_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="scipion-bridge-cold-store", daemon=True
+            )
+            self._worker.start()
+
+    def track(self, path: os.PathLike):
+        """
+        Consider a file written just now, e.g. the output of a program, so it
+        is compressed once it has been idle for long enough.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._last_access[os.fspath(path)] = time.monotonic()
+            self._start_worker()
+
+    def access(self, path: os.PathLike) -> os.PathLike:
+        """Record an access to ``path`` and decompress it if it is cold."""
+        if not self.enabled:
+            return path
+
+        key = os.fspath(path)
+        self.track(key)
+
+        if os.path.exists(cold_path(key)):
+            self.thaw(key)
+
+        return path
+
+    def pin(self, path: os.PathLike):
+        """Keep a file from being compressed, e.g. while a program reads it."""
+        with self._lock:
+            key = os.fspath(path)
+            self._pins[key] = self._pins.get(key, 0) + 1
+
+    def unpin(self, path: os.PathLike):
+        with self._lock:
+            key = os.fspath(path)
+            self._pins[key] -= 1
+            if self._pins[key] == 0:
+                del self._pins[key]
+
+            self._last_access[key] = time.monotonic()
+
+    def _account(self, path: str):
+        if self.budget is None:
+            return
+
+        n_bytes = 0
+        for file in (path, cold_path(path)):
+            try:
+                n_bytes += os.stat(file).st_size
+            except FileNotFoundError:
+                pass
+
+        self.budget.resize(path, n_bytes)
+
+    def _can_freeze(self, key: str) -> bool:
+        try:
+            stat = os.stat(key)
+        except FileNotFoundError:
+            return False
+
+        # Compressing one of several links frees nothing, and other processes
+        # don't know the file went cold
+        return (
+            stat.st_nlink == 1
+            and key not in self._pins
+            and not os.path.exists(f"{key}{REFERENCES_SUFFIX}")
+        )
+
+    def freeze(self, path: os.PathLike) -> bool:
+        """Compress a file now; returns whether it was compressed."""
+        if not self.enabled:
+            return False
+
+        key = os.fspath(path)
+
+        with self._file_lock(key):
+            with self._lock:
+                if not self._can_freeze(key):
+                    return False
+
+            started = time.monotonic()
+
+            partial = f"{cold_path(key)}{PARTIAL_SUFFIX}"
+            try:
+                compress_file(key, partial, self.level, self.max_workers)
+
+                with self._lock:
+                    # Accessed, pinned or deleted while compressing
+                    if (
+                        key in self._pins
+                        or self._last_access.get(key, 0) > started
+                        or not os.path.exists(key)
+                    ):
+                        return False
+
+                    os.replace(partial, cold_path(key))
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+
+            try:
+                os.remove(key)
+            except FileNotFoundError:
+                # Deleted after the check; don't leave the compressed copy
+                # behind
+                try:
+                    os.remove(cold_path(key))
+                except FileNotFoundError:
+                    pass
+
+                return False
+
+        # The compressed copy won't be read until the file is used again
+        if self.io_hints is not None:
+            self.io_hints.dont_need([cold_path(key)])
+
+        logging.debug(f"Compressed idle file at {key}")
+        self._account(key)
+
+        return True
+
+    def thaw(self, path: os.PathLike) -> bool:
+        """Decompress a cold file; returns whether it was cold."""
+        key = os.fspath(path)
+
+        with self._file_lock(key):
+            if not is_cold(key):
+                return False
+
+            partial = f"{key}{PARTIAL_SUFFIX}"
+            decompress_file(cold_path(key), partial)
+            os.replace(partial, key)
+            os.remove(cold_path(key))
+
+        logging.debug(f"Decompressed file at {key}")
+        self._account(key)
+
+        return True
+
+    def freeze_idle(self, idle_seconds: Optional[float] = None) -> int:
+        """Compress all files idle for longer than ``idle_seconds``."""
+        idle_seconds = idle_seconds if idle_seconds is not None else self.idle_seconds
+        assert idle_seconds is not None
+
+        deadline = time.monotonic() - idle_seconds
+        with self._lock:
+            candidates = [k for k, t in self._last_access.items() if t <= deadline]
+
+        n_frozen = 0
+        for key in candidates:
+            if not os.path.exists(key) and not os.path.exists(cold_path(key)):
+                # Deleted in the meantime
+                with self._lock:
+                    self._last_access.pop(key, None)
+                    self._file_locks.pop(key, None)
+                continue
+
+            try:
+                n_frozen += self.freeze(key)
+            except OSError as e:
+                logging.warning(f"Failed to compress file at {key}: {e}")
+
+        return n_frozen
+
+    def _run(self):
+        assert self.idle_seconds is not None
+
+        while not self._stop.wait(self.idle_seconds / 2):
+            self.freeze_idle()
+
+    def close(self):
+        self._stop.set()
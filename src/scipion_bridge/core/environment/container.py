@@ -1,7 +1,15 @@
 from dependency_injector import containers, providers
 from dependency_injector.wiring import Provide, inject
 
+from .budget import ScratchBudget
+from .call_cache import CallCache
 from .cmd_exec import ShellExecProvider
+from .cold import ColdStore
+from .dedup import ContentStore
+from .deleter import BackgroundDeleter
+from .executor import CallExecutor
+from .io_hints import IOHints
+from .scipion_env import ScipionEnvironment
 from .temp_files import TemporaryFilesProvider
 
 
@@ -10,4 +18,47 @@ class Container(containers.DeclarativeContainer):
     config = providers.Configuration()
 
     shell_exec = providers.Factory(ShellExecProvider)
-    temp_file_provider = providers.Factory(TemporaryFilesProvider)
+    scipion_env = providers.Singleton(
+        ScipionEnvironment,
+        cache_dir=config.scipion_env.cache_dir,
+        direct=config.scipion_env.direct,
+    )
+    executor = providers.Singleton(
+        CallExecutor, max_workers=config.executor.max_workers
+    )
+    scratch_budget = providers.Singleton(
+        ScratchBudget,
+        fast_max_bytes=config.scratch_budget.fast_max_bytes,
+        bulk_max_bytes=config.scratch_budget.bulk_max_bytes,
+        policy=config.scratch_budget.policy,
+        timeout=config.scratch_budget.timeout,
+    )
+    io_hints = providers.Singleton(IOHints, enabled=config.io_hints.enabled)
+    cold_store = providers.Singleton(
+        ColdStore,
+        idle_seconds=config.cold.idle_seconds,
+        level=config.cold.level,
+        max_workers=config.cold.max_workers,
+        budget=scratch_budget,
+        io_hints=io_hints,
+    )
+    content_store = providers.Singleton(
+        ContentStore,
+        enabled=config.dedup.enabled,
+        min_bytes=config.dedup.min_bytes,
+    )
+    call_cache = providers.Singleton(
+        CallCache,
+        directory=config.call_cache.directory,
+        max_bytes=config.call_cache.max_bytes,
+        hash_inputs=config.call_cache.hash_inputs,
+    )
+    temp_file_provider = providers.Factory(
+        TemporaryFilesProvider,
+        fast_dir=config.temp_files.fast_dir,
+        bulk_dir=config.temp_files.bulk_dir,
+        fast_max_bytes=config.temp_files.fast_max_bytes,
+        budget=scratch_budget,
+        content_store=content_store,
+    )
+    deleter = providers.Singleton(BackgroundDeleter)
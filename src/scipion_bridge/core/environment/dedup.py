@@ -0,0 +1,142 @@
+import os
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from typing import Dict, Optional, Set
+
+DEFAULT_MIN_BYTES = 1024 * 1024  # Smaller files are not worth hashing
+
+_CHUNK_BYTES = 1024 * 1024
+BLOB_DIRECTORY = "blobs"
+
+
+def content_digest(path: os.PathLike) -> str:
+    digest = hashlib.blake2b(digest_size=32)
+
+    with open(path, "rb", buffering=0) as f:
+        buffer = bytearray(_CHUNK_BYTES)
+        view = memoryview(buffer)
+
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+
+    return digest.hexdigest()
+
+
+class ContentStore:
+    """
+    Hard-link byte-identical managed files to a single blob, so duplicates
+    take no extra space on disk or in the page cache.
+
+    Blobs live in a ``blobs`` directory next to the files (hard links cannot
+    cross filesystems) and are removed once the last file linked to them is
+    deleted. Deduplicated files share their data; the writers in
+    :mod:`scipion_bridge.core.typed` give a file its own copy before modifying
+    it (see :func:`~scipion_bridge.core.typed.slabs.break_links`).
+    """
+
+    def __init__(self, enabled: bool = False, min_bytes: Optional[int] = None) -> None:
+        self.enabled = bool(enabled)
+        self.min_bytes = int(min_bytes) if min_bytes is not None else DEFAULT_MIN_BYTES
+
+        self._blobs: Dict[str, Path] = {}  # Blob of each deduplicated file
+        self._links: Dict[Path, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _blob_path(self, blob_dir: os.PathLike, digest: str) -> Path:
+        return Path(blob_dir) / BLOB_DIRECTORY / digest
+
+    def add(self, path: os.PathLike, blob_dir: os.PathLike) -> bool:
+        """
+        Link a completed file to the blob with its contents, replacing it if
+        the blob exists already. Returns whether the file was a duplicate.
+        """
+        if not self.enabled or os.fspath(path) in self._blobs:
+            return False
+
+        try:
+            if os.stat(path).st_size < self.min_bytes:
+                return False
+
+            digest = content_digest(path)
+        except FileNotFoundError:
+            return False
+
+        blob = self._blob_path(blob_dir, digest)
+
+        with self._lock:
+            links = self._links.setdefault(blob, set())
+            duplicate = blob.exists()
+
+            try:
+                if duplicate:
+                    # Swap the file for a link atomically so readers never see
+                    # it missing
+                    staging = Path(f"{path}.dedup")
+                    os.link(blob, staging)
+                    os.replace(staging, path)
+                else:
+                    blob.parent.mkdir(exist_ok=True)
+                    os.link(path, blob)
+
+            except OSError as e:
+                logging.debug(f"Could not deduplicate {path}: {e}")
+                if not links:
+                    del self._links[blob]
+                return False
+
+            links.add(os.fspath(path))
+            self._blobs[os.fspath(path)] = blob
+
+        if duplicate:
+            logging.debug(f"Linked duplicate {path} to {blob}")
+
+        return duplicate
+
+    def move(self, path: os.PathLike, new_path: os.PathLike):
+        with self._lock:
+            blob = self._blobs.pop(os.fspath(path), None)
+            if blob is None:
+                return
+
+            links = self._links[blob]
+            links.discard(os.fspath(path))
+            links.add(os.fspath(new_path))
+
+            self._blobs[os.fspath(new_path)] = blob
+
+    def release(self, path: os.PathLike) -> Optional[str]:
+        """
+        Forget a deleted file and remove its blob if nothing links to it.
+        Returns another file still linked to the blob, if any.
+        """
+        with self._lock:
+            blob = self._blobs.pop(os.fspath(path), None)
+            if blob is None:
+                return None
+
+            links = self._links[blob]
+            links.discard(os.fspath(path))
+
+            if links:
+                return min(links)
+
+            del self._links[blob]
+            try:
+                os.remove(blob)
+            except FileNotFoundError:
+                pass
+
+            return None
+
+    def is_deduplicated(self, path: os.PathLike) -> bool:
+        return os.fspath(path) in self._blobs
+
+    def __len__(self) -> int:
+        """Number of blobs."""
+        return len(self._links)
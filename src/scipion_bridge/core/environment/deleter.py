@@ -0,0 +1,104 @@
+import os
+import atexit
+import logging
+import threading
+from collections import deque
+
+from typing import Any, Deque, List, Optional, Tuple
+
+
+class BackgroundDeleter:
+    """
+    Delete released temporary files on a worker thread, so unlinking large
+    files never runs inside a finalizer or the garbage collector.
+
+    Files are deleted in batches by the provider that created them. Pending
+    deletions are flushed when the interpreter exits.
+    """
+
+    def __init__(self, batch_size: int = 256, idle_timeout: float = 1.0) -> None:
+        self.batch_size = batch_size
+
+        # The worker exits after being idle for this long and is restarted on
+        # the next submission
+        self.idle_timeout = idle_timeout
+
+        self._pending: Deque[Tuple[Any, os.PathLike]] = deque()
+        self._unfinished = 0
+
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._exit_hook_registered = False
+
+    def submit(self, path: os.PathLike, temp_file_provider: Any):
+        """Queue ``path`` to be deleted by ``temp_file_provider``."""
+        with self._condition:
+            self._pending.append((temp_file_provider, path))
+            self._unfinished += 1
+
+            # A forked child inherits the worker of its parent, but not the
+            # running thread
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="scipion-bridge-deleter", daemon=True
+                )
+                self._worker.start()
+
+            if not self._exit_hook_registered:
+                atexit.register(self.flush)
+                self._exit_hook_registered = True
+
+            self._condition.notify_all()
+
+    def _take_batch(self, size: int) -> List[Tuple[Any, os.PathLike]]:
+        return [self._pending.popleft() for _ in range(min(size, len(self._pending)))]
+
+    def _delete_batch(self, batch: List[Tuple[Any, os.PathLike]]):
+        for temp_file_provider, path in batch:
+            try:
+                temp_file_provider.delete(path)
+            except Exception as e:
+                logging.warning(f"Failed to delete file at {path}: {e}")
+
+        with self._condition:
+            self._unfinished -= len(batch)
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._pending:
+                    self._condition.wait(self.idle_timeout)
+
+                if not self._pending:
+                    self._worker = None
+                    return
+
+                batch = self._take_batch(self.batch_size)
+
+            self._delete_batch(batch)
+
+    def flush(self):
+        """Delete all pending files on the calling thread."""
+        while True:
+            with self._condition:
+                batch = self._take_batch(len(self._pending))
+
+            if not batch:
+                break
+
+            self._delete_batch(batch)
+
+        # Wait for the batch the worker might still be deleting
+        self.wait()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until all submitted files are deleted. Returns ``False`` if the
+        timeout expired first.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: self._unfinished == 0, timeout)
+
+    def __len__(self) -> int:
+        return self._unfinished
@@ -0,0 +1,48 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from typing import Any, Callable, Optional
+
+
+def available_cores() -> int:
+    # Respect CPU affinity, e.g. cores assigned by a batch scheduler
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+class CallExecutor:
+    """
+    Run calls of external programs on a bounded pool of worker threads. The
+    programs run in processes of their own, so threads are enough to keep
+    ``max_workers`` of them running at a time.
+
+    Workers are started on the first submission and shut down when the
+    interpreter exits.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        self.max_workers = (
+            int(max_workers) if max_workers is not None else available_cores()
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid = os.getpid()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # A forked child inherits the pool, but not its threads
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="scipion-bridge-call"
+            )
+            self._pid = os.getpid()
+
+        return self._executor
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        return self._pool().submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -0,0 +1,101 @@
+import os
+import logging
+import threading
+from collections import deque
+
+from typing import Deque, Iterable, Optional, Tuple
+
+# Not available on macOS; hints are skipped there
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+WILLNEED = getattr(os, "POSIX_FADV_WILLNEED", None)
+DONTNEED = getattr(os, "POSIX_FADV_DONTNEED", None)
+
+
+def advise(path: os.PathLike, advice: Optional[int]) -> bool:
+    """
+    Pass ``advice`` for the whole file to the kernel. Returns ``False`` if the
+    file doesn't exist or the platform does not take hints.
+    """
+    if not _HAS_FADVISE or advice is None:
+        return False
+
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return False
+
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+        return True
+    except OSError as e:
+        logging.debug(f"Could not pass advice {advice} for {path}: {e}")
+        return False
+    finally:
+        os.close(fd)
+
+
+class IOHints:
+    """
+    Issue page cache hints on a worker thread. Reading ahead can block for a
+    while on network storage, so callers only queue the paths.
+
+    ``will_need`` is meant for inputs of programs that are about to run, so
+    their reads overlap with whatever runs now. ``dont_need`` is for files that
+    must be kept but won't be read again soon.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None) -> None:
+        self.enabled = _HAS_FADVISE and (enabled is None or bool(enabled))
+
+        self._pending: Deque[Tuple[str, Optional[int]]] = deque()
+        self._unfinished = 0
+
+        self._condition = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+
+    def _submit(self, paths: Iterable[os.PathLike], advice: Optional[int]):
+        if not self.enabled:
+            return
+
+        with self._condition:
+            for path in paths:
+                self._pending.append((os.fspath(path), advice))
+                self._unfinished += 1
+
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="scipion-bridge-io-hints", daemon=True
+                )
+                self._worker.start()
+
+            self._condition.notify_all()
+
+    def will_need(self, paths: Iterable[os.PathLike]):
+        self._submit(paths, WILLNEED)
+
+    def dont_need(self, paths: Iterable[os.PathLike]):
+        self._submit(paths, DONTNEED)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._pending:
+                    self._condition.wait(1.0)
+
+                if not self._pending:
+                    self._worker = None
+                    return
+
+                path, advice = self._pending.popleft()
+
+            advise(path, advice)
+
+            with self._condition:
+                self._unfinished -= 1
+                self._condition.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until all queued hints were passed to the kernel."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._unfinished == 0, timeout)
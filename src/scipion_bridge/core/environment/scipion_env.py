@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+_MARKER = "SCIPION_BRIDGE_ENVIRONMENT="
+
+# Prints the environment the launcher sets up for the programs it runs
+_PRINT_ENVIRONMENT = (
+    f"import os, json; print({_MARKER!r} + json.dumps(dict(os.environ)))"
+)
+
+
+# Kept up to date by the shells the launcher runs in, not set up by it
+_SHELL_VARIABLES = {"PWD", "OLDPWD", "SHLVL", "_"}
+
+# Variables the launcher sets, and paths it adds in front of or behind
+# variables such as PATH
+Changes = Dict[str, Dict[str, str]]
+
+
+def default_cache_dir() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "scipion_bridge"
+
+
+def _stat_key(path: str) -> List:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [path, None]
+
+    return [path, stat.st_mtime_ns, stat.st_size]
+
+
+def _environment_changes(before: Dict[str, str], after: Dict[str, str]) -> Changes:
+    """Variables added or changed in ``after``, compared to ``before``."""
+    changes: Changes = {"set": {}, "prepend": {}, "append": {}}
+
+    for name, value in after.items():
+        old = before.get(name)
+        if value == old or name in _SHELL_VARIABLES:
+            continue
+
+        if old and value.endswith(os.pathsep + old):
+            changes["prepend"][name] = value[: -len(old) - 1]
+        elif old and value.startswith(old + os.pathsep):
+            changes["append"][name] = value[len(old) + 1 :]
+        else:
+            changes["set"][name] = value
+
+    return changes
+
+
+def _apply_changes(changes: Changes, environ: Mapping[str, str]) -> Dict[str, str]:
+    environment = dict(environ)
+
+    for name, value in changes["prepend"].items():
+        old = environment.get(name)
+        environment[name] = f"{value}{os.pathsep}{old}" if old else value
+
+    for name, value in changes["append"].items():
+        old = environment.get(name)
+        environment[name] = f"{old}{os.pathsep}{value}" if old else value
+
+    environment.update(changes["set"])
+    return environment
+
+
+class ScipionEnvironment:
+    """
+    Environment and binary paths the Scipion launcher (``scipion run``) sets
+    up for the programs it starts, captured once so programs can be executed
+    directly without booting the launcher for every call.
+
+    Only the variables the launcher adds or changes are persisted, in
+    ``cache_dir`` under a fingerprint of the launcher and its configuration
+    files, so they are captured again after the installation changes. They are
+    applied on top of the environment of this process when a program starts.
+    If they cannot be captured, programs are started through the launcher as
+    before.
+
+    Programs are run directly for domains declared with ``direct=True``, or for
+    every domain if ``direct`` is set (``scipion_env.direct`` in the
+    configuration). Otherwise they go through the launcher.
+    """
+
+    def __init__(
+        self, cache_dir: Optional[str] = None, direct: Optional[bool] = None
+    ) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.direct = bool(direct)
+
+        self._changes: Dict[Tuple[str, ...], Optional[Changes]] = {}
+        self._binaries: Dict[Tuple[Tuple[str, ...], str], Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def _fingerprint(self, launcher: Sequence[str]) -> Optional[str]:
+        executable = shutil.which(launcher[0])
+        if executable is None:
+            return None
+
+        executable = os.path.realpath(executable)
+        install_dir = Path(executable).parent.parent
+
+        config_files = [
+            os.environ.get("SCIPION_CONFIG", ""),
+            str(Path.home() / ".config" / "scipion" / "scipion.conf"),
+            str(install_dir / "config" / "scipion.conf"),
+        ]
+
+        contents = json.dumps(
+            [
+                list(launcher),
+                _stat_key(executable),
+                *(_stat_key(f) for f in config_files if f),
+                os.environ.get("SCIPION_HOME"),
+            ]
+        )
+        return hashlib.blake2b(contents.encode(), digest_size=16).hexdigest()
+
+    def _capture(self, launcher: Sequence[str]) -> Changes:
+        logging.debug(f"Capturing environment of {' '.join(launcher)}")
+
+        environ = dict(os.environ)
+        proc = subprocess.run(
+            [*launcher, sys.executable, "-c", _PRINT_ENVIRONMENT],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=environ,
+            check=True,
+        )
+
+        # The launcher may print banners of its own
+        for line in proc.stdout.decode("utf-8").splitlines():
+            if line.startswith(_MARKER):
+                return _environment_changes(environ, json.loads(line[len(_MARKER) :]))
+
+        raise ValueError("Launcher did not run the program")
+
+    def _load(self, cache_file: Path) -> Optional[Changes]:
+        try:
+            with open(cache_file) as f:
+                changes = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(changes, dict) or set(changes) != {
+            "set",
+            "prepend",
+            "append",
+        }:
+            return None
+
+        return changes
+
+    def _store(self, cache_file: Path, changes: Changes):
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+
+            # Write to a temporary file first, so other processes never read a
+            # partial environment
+            fd, partial = tempfile.mkstemp(dir=cache_file.parent, suffix=".part")
+            with os.fdopen(fd, "w") as f:
+                json.dump(changes, f)
+            os.replace(partial, cache_file)
+
+        except OSError as e:
+            logging.debug(f"Could not persist environment at {cache_file}: {e}")
+
+    def _resolve(self, launcher: Tuple[str, ...]) -> Optional[Changes]:
+        fingerprint = self._fingerprint(launcher)
+        if fingerprint is None:
+            return None
+
+        cache_file = self.cache_dir / f"environment-{fingerprint}.json"
+
+        changes = self._load(cache_file)
+        if changes is not None:
+            return changes
+
+        try:
+            changes = self._capture(launcher)
+        except (OSError, ValueError, subprocess.CalledProcessError) as e:
+            logging.warning(
+                f"Could not capture environment of {' '.join(launcher)}; programs are started through it: {e}"
+            )
+            return None
+
+        self._store(cache_file, changes)
+        return changes
+
+    def environment(self, launcher: Sequence[str]) -> Optional[Dict[str, str]]:
+        """
+        Environment of programs started by ``launcher``: the environment of
+        this process with the launcher's changes, captured once per process.
+        """
+        key = tuple(launcher)
+
+        with self._lock:
+            if key not in self._changes:
+                self._changes[key] = self._resolve(key)
+
+            changes = self._changes[key]
+
+        if changes is None:
+            return None
+
+        return _apply_changes(changes, os.environ)
+
+    def command(
+        self, launcher: Sequence[str], program: str
+    ) -> Tuple[List[str], Optional[Dict[str, str]]]:
+        """
+        Command and environment to run ``program`` with. Falls back to the
+        launcher if the environment or the binary cannot be found.
+        """
+        environment = self.environment(launcher)
+        if environment is None:
+            return [*launcher, program], None
+
+        key = (tuple(launcher), program)
+        with self._lock:
+            if key not in self._binaries:
+                self._binaries[key] = shutil.which(
+                    program, path=environment.get("PATH", "")
+                )
+
+            binary = self._binaries[key]
+
+        if binary is None:
+            return [*launcher, program], None
+
+        return [binary], environment
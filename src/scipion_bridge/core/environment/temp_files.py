@@ -1,20 +1,464 @@
 import os
+import glob
+import atexit
+import shutil
+import socket
+import itertools
+import threading
+from contextvars import ContextVar
+from enum import Enum
 from pathlib import Path
 import tempfile
-from typing import Optional
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 
 import logging
 
+if TYPE_CHECKING:
+    from .budget import ScratchBudget
+    from .dedup import ContentStore
+
+# Small files stored next to a managed file that are deleted together with it
+STATISTICS_SUFFIX = ".stats.json"
+REFERENCES_SUFFIX = ".refs"  # Counts of files shared with other processes
+COLD_SUFFIX = ".gz"  # Compressed copies of idle files
+PARTIAL_SUFFIX = ".part"  # Files being compressed or decompressed
+SIDECAR_SUFFIXES = (
+    STATISTICS_SUFFIX,
+    REFERENCES_SUFFIX,
+    COLD_SUFFIX,
+    PARTIAL_SUFFIX,
+    COLD_SUFFIX + PARTIAL_SUFFIX,
+)
+
+DEFAULT_FAST_DIR = "/dev/shm"
+DEFAULT_FAST_MAX_BYTES = 64 * 1024 * 1024
+
+SCRATCH_PREFIX = "scipion-bridge-"
+
+
+class Tier(Enum):
+    FAST = "fast"  # RAM disk or other fast local storage
+    BULK = "bulk"  # Scratch disk for everything else
+
+
+def _process_prefix(host: str, pid: int) -> str:
+    return f"{SCRATCH_PREFIX}{host}-{pid}-"
+
+
+class ScratchDirectory:
+    """
+    Directory owned by a single process in which file names are reserved
+    without touching the filesystem. Names of deleted files are handed out
+    again.
+
+    ``root`` is the tier directory the scratch directory was created in.
+    """
+
+    def __init__(
+        self, parent: str, prefix: Optional[str] = None, root: Optional[str] = None
+    ) -> None:
+        prefix = prefix or _process_prefix(socket.gethostname(), os.getpid())
+        self.path = Path(tempfile.mkdtemp(prefix=prefix, dir=os.path.abspath(parent)))
+        self.root = os.path.abspath(root or parent)
+
+        self._counter = itertools.count()
+        self._free: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, suffix: str) -> Path:
+        with self._lock:
+            free = self._free.get(suffix)
+            name = free.pop() if free else f"{next(self._counter):06x}{suffix}"
+
+        return self.path / name
+
+    def release(self, path: os.PathLike):
+        """Return the name of a deleted file to the pool."""
+        name = os.path.basename(path)
+        slot, dot, suffix = name.partition(".")
+
+        # Programs derive their own file names from untyped outputs (e.g.
+        # <name>.vol), so only names with an extension are safe to reuse
+        if not dot:
+            return
+
+        with self._lock:
+            self._free.setdefault(dot + suffix, []).append(name)
+
+
+_scratch_directories: Dict[Tuple[str, int], ScratchDirectory] = {}
+_scratch_directories_by_path: Dict[Path, ScratchDirectory] = {}
+_scratch_lock = threading.Lock()
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Owned by another user
+
+    return True
+
+
+def _holds_shared_files(path: str) -> bool:
+    return any(Path(path).rglob(f"*{REFERENCES_SUFFIX}"))
+
+
+def sweep_stale_directories(parent: str) -> List[Path]:
+    """
+    Remove the scratch directories in ``parent`` left behind by processes on
+    this host that are no longer running, and return them. Directories with
+    files handed to other processes are kept.
+    """
+    host_prefix = f"{SCRATCH_PREFIX}{socket.gethostname()}-"
+    removed = []
+
+    try:
+        entries = list(os.scandir(parent))
+    except OSError:
+        return removed
+
+    for entry in entries:
+        if not entry.name.startswith(host_prefix) or not entry.is_dir():
+            continue
+
+        pid = entry.name[len(host_prefix) :].split("-")[0]
+        if not pid.isdigit() or _is_alive(int(pid)):
+            continue
+
+        if _holds_shared_files(entry.path):
+            continue
+
+        logging.info(f"Removing scratch directory of dead process at {entry.path}")
+        shutil.rmtree(entry.path, ignore_errors=True)
+        removed.append(Path(entry.path))
+
+    return removed
+
+
+def scratch_directory(parent: str) -> ScratchDirectory:
+    """
+    Return the scratch directory of this process in ``parent``. Directories
+    left by crashed processes are swept when it is first created.
+    """
+    key = (os.path.abspath(parent), os.getpid())
+
+    with _scratch_lock:
+        if key not in _scratch_directories:
+            sweep_stale_directories(parent)
+            scratch = ScratchDirectory(parent)
+            atexit.register(shutil.rmtree, scratch.path, ignore_errors=True)
+
+            _scratch_directories[key] = scratch
+            _scratch_directories_by_path[scratch.path] = scratch
+
+        return _scratch_directories[key]
+
+
+def _find_scratch_directory(path: os.PathLike) -> Optional[ScratchDirectory]:
+    return _scratch_directories_by_path.get(Path(os.path.abspath(path)).parent)
+
+
+def derived_files(path: os.PathLike) -> List[Path]:
+    """
+    Return the existing files belonging to a managed file: the file, its
+    sidecars and, for names reserved in a scratch directory, the files a
+    program derived from the name (e.g. ``<name>.vol`` for untyped outputs).
+    Files outside scratch directories are never matched by name.
+    """
+    if _find_scratch_directory(path) is not None:
+        # Reserved names are unique, so no other file starts with them
+        name = os.path.basename(path)
+        candidates = [Path(path), *Path(path).parent.glob(f"{glob.escape(name)}.*")]
+    else:
+        candidates = [Path(f"{path}{tail}") for tail in ("", *SIDECAR_SUFFIXES)]
+
+    return [file for file in candidates if os.path.lexists(file)]
+
+
+class Arena:
+    """
+    Directory per tier holding all temporary files created while the arena is
+    active. Closing the arena removes the directories with everything in them,
+    whether or not the files are still referenced.
+    """
+
+    def __init__(self, parent: Optional["Arena"] = None) -> None:
+        self.parent = parent
+        self._directories: Dict[str, ScratchDirectory] = {}
+        self._lock = threading.Lock()
+
+    def _enclosing_directory(self, root: str) -> ScratchDirectory:
+        if self.parent is not None:
+            return self.parent.scratch_directory(root)
+        else:
+            return scratch_directory(root)
+
+    def scratch_directory(self, root: str) -> ScratchDirectory:
+        """Return the directory of the arena on the tier at ``root``."""
+        root = os.path.abspath(root)
+
+        with self._lock:
+            if root not in self._directories:
+                enclosing = self._enclosing_directory(root)
+                scratch = ScratchDirectory(enclosing.path, prefix="arena-", root=root)
+
+                self._directories[root] = scratch
+                with _scratch_lock:
+                    _scratch_directories_by_path[scratch.path] = scratch
+
+            return self._directories[root]
+
+    def owns(self, path: os.PathLike) -> bool:
+        scratch = _find_scratch_directory(path)
+        return scratch is not None and scratch in self._directories.values()
+
+    def move_out(self, path: os.PathLike) -> Path:
+        """
+        Move a file (and its sidecars) from the arena to the enclosing arena
+        or the scratch directory of the process, and return its new path.
+        """
+        scratch = _find_scratch_directory(path)
+        if scratch is None or scratch not in self._directories.values():
+            return Path(path)
+
+        _, dot, suffix = os.path.basename(path).partition(".")
+        new_path = self._enclosing_directory(scratch.root).reserve(dot + suffix)
+
+        # Untyped outputs may only exist under a name the program derived
+        # from the reserved one, so move everything sharing the name
+        for file in derived_files(path):
+            os.rename(file, f"{new_path}{file.name[len(os.path.basename(path)):]}")
+
+        return new_path
+
+    def close(self):
+        with self._lock:
+            directories = list(self._directories.values())
+            self._directories.clear()
+
+        with _scratch_lock:
+            for scratch in directories:
+                _scratch_directories_by_path.pop(scratch.path, None)
+
+        for scratch in directories:
+            shutil.rmtree(scratch.path, ignore_errors=True)
+
+
+_current_arena: ContextVar[Optional[Arena]] = ContextVar(
+    "scipion_bridge_arena", default=None
+)
+
+
+def current_arena() -> Optional[Arena]:
+    return _current_arena.get()
+
+
+def preallocate_file(path: os.PathLike, n_bytes: int):
+    """Reserve ``n_bytes`` of disk space for a new file, where supported."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, n_bytes)
+        else:  # pragma: no cover
+            os.ftruncate(fd, n_bytes)
+    except OSError as e:
+        logging.debug(f"Could not preallocate {n_bytes} bytes for {path}: {e}")
+    finally:
+        os.close(fd)
+
 
 class TemporaryFilesProvider:
+    """
+    Create temporary files on a fast tier (``/dev/shm`` by default) if they
+    are expected to be smaller than ``fast_max_bytes`` and in ``bulk_dir`` (the
+    default temporary directory unless set) otherwise. Set ``fast_dir`` to an
+    empty string to disable the fast tier.
+
+    Files are placed in a per-process scratch directory on each tier (see
+    :class:`ScratchDirectory`); new files are not created until they are
+    written, unless space is preallocated for them.
+
+    With a ``budget``, the bytes of every file are accounted and files that do
+    not fit wait or spill to the bulk tier (see :class:`ScratchBudget`). With
+    a ``content_store``, completed files with the same contents share a blob
+    (see :class:`ContentStore`).
+    """
+
+    def __init__(
+        self,
+        fast_dir: Optional[str] = None,
+        bulk_dir: Optional[str] = None,
+        fast_max_bytes: Optional[int] = None,
+        budget: Optional["ScratchBudget"] = None,
+        content_store: Optional["ContentStore"] = None,
+    ) -> None:
+        if fast_dir is None and os.path.isdir(DEFAULT_FAST_DIR):
+            fast_dir = DEFAULT_FAST_DIR
+
+        self.fast_dir = fast_dir or None
+        self.bulk_dir = bulk_dir or None
+        self.fast_max_bytes = (
+            int(fast_max_bytes)
+            if fast_max_bytes is not None
+            else DEFAULT_FAST_MAX_BYTES
+        )
+        self.budget = budget
+        self.content_store = content_store
+
+    def directory(self, tier: Tier) -> str:
+        if tier == Tier.FAST and self.fast_dir is not None:
+            return self.fast_dir
+
+        return self.bulk_dir or tempfile.gettempdir()
+
+    def select_tier(self, expected_size: Optional[int]) -> Tier:
+        if (
+            self.fast_dir is None
+            or expected_size is None
+            or expected_size > self.fast_max_bytes
+        ):
+            return Tier.BULK
+
+        # A RAM disk that runs full takes memory from everything else, so keep
+        # plenty of room
+        try:
+            stat = os.statvfs(self.fast_dir)
+        except OSError:
+            return Tier.BULK
+
+        return (
+            Tier.FAST
+            if 2 * expected_size <= stat.f_bavail * stat.f_frsize
+            else Tier.BULK
+        )
+
+    def tier_of(self, path: os.PathLike) -> Optional[Tier]:
+        """Return the tier a file was created on, or ``None`` for other files."""
+        scratch = _find_scratch_directory(path)
+        if scratch is None:
+            return None
 
-    def new_temporary_file(self, suffix: Optional[str]) -> os.PathLike:
-        new_file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False).name
-        logging.debug(f"Creating new temporary file at {new_file}")
+        for tier in (Tier.FAST, Tier.BULK):
+            if scratch.root == os.path.abspath(self.directory(tier)):
+                return tier
 
-        return Path(new_file)
+        return None
+
+    def new_temporary_file(
+        self,
+        suffix: Optional[str],
+        expected_size: Optional[int] = None,
+        preallocate: bool = False,
+    ) -> os.PathLike:
+        """
+        Reserve a name for a new temporary file. With ``preallocate``, the
+        file is created with ``expected_size`` bytes of space reserved; only
+        use it for files that are written without being truncated first.
+        """
+        tier = self.select_tier(expected_size)
+        if self.budget is not None:
+            tier = self.budget.acquire(expected_size or 0, tier, spill_to=Tier.BULK)
+
+        directory = self.directory(tier)
+
+        arena = current_arena()
+        scratch = (
+            arena.scratch_directory(directory)
+            if arena is not None
+            else scratch_directory(directory)
+        )
+
+        new_file = scratch.reserve(suffix or "")
+        logging.debug(f"Reserving temporary file at {new_file}")
+
+        if self.budget is not None:
+            self.budget.track(new_file, tier, suffix or "", expected_size or 0)
+
+        if preallocate and expected_size:
+            preallocate_file(new_file, expected_size)
+
+        return new_file
+
+    def _size_on_disk(self, path: os.PathLike) -> int:
+        n_bytes = 0
+        for file in derived_files(path):
+            try:
+                n_bytes += os.stat(file).st_size
+            except FileNotFoundError:
+                pass
+
+        return n_bytes
+
+    def _blob_directory(self, path: os.PathLike) -> Optional[Path]:
+        # Blobs are kept in the process scratch directory of the file's tier,
+        # which holds the arenas too
+        scratch = _find_scratch_directory(path)
+        return scratch_directory(scratch.root).path if scratch is not None else None
+
+    @staticmethod
+    def _invalidate_arrays(path: os.PathLike):
+        # Imported here; typed modules depend on the environment
+        from ..typed.cache import array_cache
+
+        array_cache.invalidate(path)
+
+    def complete(self, path: os.PathLike):
+        """
+        Deduplicate a file once it has been written and charge it its size on
+        disk; duplicates are charged nothing, as their blob is charged to the
+        first file linked to it (see :meth:`delete`).
+        """
+        duplicate = False
+
+        blob_directory = self._blob_directory(path)
+        if self.content_store is not None and blob_directory is not None:
+            duplicate = self.content_store.add(path, blob_directory)
+
+        if duplicate:
+            self._invalidate_arrays(path)
+
+        if self.budget is not None:
+            self.budget.resize(path, 0 if duplicate else self._size_on_disk(path))
+
+    def moved(self, path: os.PathLike, new_path: os.PathLike):
+        self._invalidate_arrays(path)
+
+        if self.budget is not None:
+            self.budget.move(path, new_path)
+
+        if self.content_store is not None:
+            self.content_store.move(path, new_path)
 
     def delete(self, path: os.PathLike):
         logging.debug(f"Remove file at {path}")
 
-        os.remove(path)
+        self._invalidate_arrays(path)
+
+        # Reserved names may never have been written to
+        for file in derived_files(path):
+            try:
+                os.remove(file)
+            except FileNotFoundError:
+                pass
+
+        # Files of closed arenas are no longer in a scratch directory, but
+        # their blobs still need to be released
+        if self.content_store is not None:
+            linked = self.content_store.release(path)
+
+            # The blob takes up space as long as any file links to it
+            if linked is not None and self.budget is not None:
+                self.budget.transfer(path, linked)
+
+        if self.budget is not None:
+            self.budget.release(path)
+
+        # Only hand the name out again once nothing refers to it anymore;
+        # otherwise the entries of a new file under the same name would be
+        # released
+        scratch = _find_scratch_directory(path)
+        if scratch is not None:
+            scratch.release(path)
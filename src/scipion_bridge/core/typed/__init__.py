@@ -1,2 +1,4 @@
 from . import resolve
 from . import common
+from . import convert
+from . import stack
@@ -1,5 +1,6 @@
 import numpy as np
-from .resolve import current_registry
+from .resolve import current_registry, Registry
+from .cache import array_cache, fingerprint
 
 from functools import partial, wraps
 from typing import Type
@@ -7,13 +8,38 @@ from typing import Type
 
 class ArrayConvertable:
 
-    def __init__(self) -> None:
+    # Set to True on a class or an instance to keep decoded arrays in the
+    # process-wide array cache
+    cache_array = False
+
+    # Weight of the ndarray resolver; formats that should not be picked by
+    # default when resolving arrays use a higher weight
+    array_resolver_weight = 0
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+
+        # Only register classes that can actually be created from an array
+        if cls.from_numpy.__func__ is ArrayConvertable.from_numpy.__func__:  # type: ignore
+            return
 
         resolver_fn = wraps(resolve_output_to_proxy)(
-            partial(resolve_output_to_proxy, cls=type(self))
+            partial(resolve_output_to_proxy, cls=cls)
         )
 
-        current_registry().add_resolver(np.ndarray, type(self), resolver_fn)
+        default_resolver_namespace = Registry._namespace_from_symbol(
+            module=str(__package__),
+            qualname=resolve_output_to_proxy.__name__,
+            strip_last=True,
+        )
+
+        current_registry().add_resolver(
+            np.ndarray,
+            cls,
+            resolver_fn,
+            namespace=default_resolver_namespace,
+            weight=cls.array_resolver_weight,
+        )
 
     def to_numpy(self):
         raise NotImplementedError
@@ -22,8 +48,31 @@ class ArrayConvertable:
     def from_numpy(cls, data: np.ndarray):
         raise NotImplementedError
 
-    def __array__(self):
-        return self.to_numpy()
+    def cached_numpy(self) -> np.ndarray:
+        """
+        Return the decoded array, reusing a cached copy if the file did not
+        change since it was decoded. Cached arrays are read-only.
+        """
+        if not self.cache_array:
+            return self.to_numpy()
+
+        path = self.path  # type: ignore
+        key = (type(self), str(path))
+
+        data = array_cache.get(key, path)
+        if data is None:
+            file_fingerprint = fingerprint(path)
+            data = array_cache.put(key, file_fingerprint, np.asarray(self.to_numpy()))
+
+        return data
+
+    def __array__(self, dtype=None, copy=None):
+        data = self.cached_numpy()
+
+        if dtype is not None and data.dtype != dtype:
+            return data.astype(dtype)
+
+        return np.array(data, copy=True) if copy else data
 
 
 def resolve_output_to_proxy(
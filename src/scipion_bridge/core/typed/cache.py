@@ -0,0 +1,124 @@
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+
+from typing import Hashable, NamedTuple, Optional, Tuple
+
+Fingerprint = Tuple[int, int, int]
+
+DEFAULT_MAX_BYTES = 1024**3
+
+
+class _Entry(NamedTuple):
+    fingerprint: Fingerprint
+    data: np.ndarray
+
+
+def fingerprint(path: os.PathLike) -> Fingerprint:
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+class ArrayCache:
+    """
+    Process-wide LRU cache of decoded arrays with a shared byte budget.
+
+    Entries are keyed by the proxy type and path and remember the file's
+    inode, size and modification time; an entry is dropped as soon as the
+    file no longer matches. Cached arrays are read-only so callers cannot
+    modify data shared with other proxies.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_bytes = max_bytes
+
+        self.current_bytes = 0
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value: int):
+        with self._lock:
+            self._max_bytes = value
+            self._evict(0)
+
+    def _evict(self, required: int):
+        while self._entries and self.current_bytes + required > self._max_bytes:
+            _, entry = self._entries.popitem(last=False)
+            self.current_bytes -= entry.data.nbytes
+
+    def _pop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.data.nbytes
+
+    def get(self, key: Hashable, path: os.PathLike) -> Optional[np.ndarray]:
+        try:
+            current = fingerprint(path)
+        except FileNotFoundError:
+            current = None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            if entry.fingerprint != current:
+                self._pop(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return entry.data
+
+    def put(
+        self, key: Hashable, file_fingerprint: Fingerprint, data: np.ndarray
+    ) -> np.ndarray:
+        with self._lock:
+            self._pop(key)
+
+            if data.nbytes > self._max_bytes:
+                return data
+
+            # Only arrays shared through the cache are frozen
+            data.flags.writeable = False
+
+            self._evict(data.nbytes)
+            self._entries[key] = _Entry(file_fingerprint, data)
+            self.current_bytes += data.nbytes
+
+        return data
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            self._pop(key)
+
+    def invalidate(self, path: os.PathLike):
+        """
+        Drop the entries of a file that was deleted, moved or replaced, so a
+        new file reusing its name is never served the old data.
+        """
+        path = os.fspath(path)
+
+        with self._lock:
+            # Proxies key their entries by type and path
+            stale = [
+                k for k in self._entries if isinstance(k, tuple) and k[1:] == (path,)
+            ]
+            for key in stale:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+array_cache = ArrayCache()
@@ -1,4 +1,5 @@
 from .resolve import current_registry, resolver
+from ..utils.external_call import Words
 
 
 @resolver
@@ -8,4 +9,5 @@ def resolve_any_to_str(value: object) -> str:
 
 @resolver
 def resolve_tuple_to_str(value: tuple) -> str:
-    return " ".join([current_registry().resolve(v, astype=str) for v in value])
+    # Programs receive the items as separate words
+    return Words(current_registry().resolve(v, astype=str) for v in value)
@@ -0,0 +1,156 @@
+import os
+import errno
+import numpy as np
+
+from . import spider, mrc
+from .slabs import iter_slabs, update_header
+from .stats import read_sidecar, write_sidecar
+from .volume import SpiderFile, MRCFile
+from .resolve import current_registry, Registry
+
+_HAS_COPY_FILE_RANGE = hasattr(os, "copy_file_range")
+
+COPY_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Conversions read and write whole volumes, so the path finder should prefer
+# creating a proxy of the requested format directly where it can
+CONVERSION_WEIGHT = 2
+
+
+# copy_file_range fails with these when the files are on different filesystems
+# (e.g. a RAM disk and scratch) or the filesystem doesn't support it
+_COPY_FILE_RANGE_UNSUPPORTED = (
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.EOPNOTSUPP,
+)
+
+
+def _copy_data_block(
+    src: os.PathLike, src_offset: int, dst: os.PathLike, dst_offset: int, n_bytes: int
+):
+    """Copy ``n_bytes`` of ``src`` starting at ``src_offset`` into ``dst``."""
+    with open(src, "rb") as f_src, open(dst, "r+b") as f_dst:
+        if _HAS_COPY_FILE_RANGE:
+            # Copies inside the kernel (or shares extents on filesystems that
+            # support reflinks) without passing the voxels through Python
+            try:
+                while n_bytes > 0:
+                    copied = os.copy_file_range(
+                        f_src.fileno(), f_dst.fileno(), n_bytes, src_offset, dst_offset
+                    )
+                    if copied == 0:
+                        raise ValueError(
+                            f"File at {src} is shorter than its header says"
+                        )
+
+                    src_offset += copied
+                    dst_offset += copied
+                    n_bytes -= copied
+
+            except OSError as e:
+                if e.errno not in _COPY_FILE_RANGE_UNSUPPORTED:
+                    raise
+
+        f_src.seek(src_offset)
+        f_dst.seek(dst_offset)
+
+        while n_bytes > 0:
+            chunk = f_src.read(min(n_bytes, COPY_CHUNK_BYTES))
+            if not chunk:
+                raise ValueError(f"File at {src} is shorter than its header says")
+
+            f_dst.write(chunk)
+            n_bytes -= len(chunk)
+
+
+def _is_native_float32(dtype: np.dtype) -> bool:
+    return dtype == np.dtype("=f4")
+
+
+def resolve_mrc_to_spider(value: MRCFile) -> SpiderFile:
+    header = mrc.read_header(value.path)
+    statistics = read_sidecar(value.path)
+    new_proxy = SpiderFile.new_temporary_proxy(
+        spider.file_size(header.shape), preallocate=True
+    )
+
+    if header.axes == (0, 1, 2) and _is_native_float32(header.dtype):
+        # Same voxel layout; only the header needs to be rewritten
+        header_bytes = spider.make_header(
+            header.shape, header.sampling, header.origin, statistics
+        )
+        update_header(new_proxy.path, header_bytes)
+
+        n_bytes = int(np.prod(header.shape)) * 4
+        _copy_data_block(
+            value.path, header.offset, new_proxy.path, header_bytes.nbytes, n_bytes
+        )
+    else:
+        statistics = spider.write_volume(
+            new_proxy.path,
+            iter_slabs(mrc.open_memmap(value.path)),
+            shape=header.shape,
+            sampling=header.sampling,
+            origin=header.origin,
+        )
+
+    if statistics is not None:
+        write_sidecar(new_proxy.path, statistics)
+
+    return new_proxy
+
+
+def resolve_spider_to_mrc(value: SpiderFile) -> MRCFile:
+    header = spider.read_header(value.path)
+    statistics = read_sidecar(value.path)
+    new_proxy = MRCFile.new_temporary_proxy(
+        mrc.file_size(header.shape), preallocate=True
+    )
+
+    if _is_native_float32(header.dtype):
+        header_bytes = mrc.make_header(
+            header.shape, header.sampling, header.origin, statistics=statistics
+        )
+        update_header(new_proxy.path, header_bytes)
+
+        n_bytes = int(np.prod(header.shape)) * 4
+        _copy_data_block(
+            value.path, header.offset, new_proxy.path, header_bytes.nbytes, n_bytes
+        )
+    else:
+        statistics = mrc.write_volume(
+            new_proxy.path,
+            iter_slabs(spider.open_memmap(value.path)),
+            shape=header.shape,
+            voxel_size=header.sampling,
+            origin=header.origin,
+        )
+
+    if statistics is not None:
+        write_sidecar(new_proxy.path, statistics)
+
+    return new_proxy
+
+
+_default_resolver_namespace = Registry._namespace_from_symbol(
+    module=str(__package__),
+    qualname=resolve_mrc_to_spider.__name__,
+    strip_last=True,
+)
+
+current_registry().add_resolver(
+    MRCFile,
+    SpiderFile,
+    resolve_mrc_to_spider,
+    namespace=_default_resolver_namespace,
+    weight=CONVERSION_WEIGHT,
+)
+current_registry().add_resolver(
+    SpiderFile,
+    MRCFile,
+    resolve_spider_to_mrc,
+    namespace=_default_resolver_namespace,
+    weight=CONVERSION_WEIGHT,
+)
@@ -0,0 +1,344 @@
+import os
+import sys
+import numpy as np
+
+from .slabs import Shape, VolumeData, as_slabs, update_header, write_slabs
+from .stats import VolumeStatistics
+
+from typing import Any, Iterable, NamedTuple, Optional, Tuple, Union
+
+HEADER_BYTES = 1024
+
+Vector = Tuple[float, float, float]
+
+# Voxel data types by MRC mode; complex and packed 4-bit modes are not supported
+MODES = {
+    0: np.dtype(np.int8),
+    1: np.dtype(np.int16),
+    2: np.dtype(np.float32),
+    6: np.dtype(np.uint16),
+    12: np.dtype(np.float16),
+}
+
+_HEADER_FIELDS = [
+    ("nx", "i4"),
+    ("ny", "i4"),
+    ("nz", "i4"),
+    ("mode", "i4"),
+    ("nxstart", "i4"),
+    ("nystart", "i4"),
+    ("nzstart", "i4"),
+    ("mx", "i4"),
+    ("my", "i4"),
+    ("mz", "i4"),
+    ("cella", "f4", 3),
+    ("cellb", "f4", 3),
+    ("mapc", "i4"),
+    ("mapr", "i4"),
+    ("maps", "i4"),
+    ("dmin", "f4"),
+    ("dmax", "f4"),
+    ("dmean", "f4"),
+    ("ispg", "i4"),
+    ("nsymbt", "i4"),
+    ("extra1", "V8"),
+    ("exttyp", "S4"),
+    ("nversion", "i4"),
+    ("extra2", "V84"),
+    ("origin", "f4", 3),
+    ("map", "S4"),
+    ("machst", "u1", 4),
+    ("rms", "f4"),
+    ("nlabl", "i4"),
+    ("label", "S80", 10),
+]
+
+
+def _header_dtype(byteorder: str) -> np.dtype:
+    return np.dtype(
+        [
+            (name, np.dtype(dtype).newbyteorder(byteorder), *shape)
+            for name, dtype, *shape in _HEADER_FIELDS
+        ]
+    )
+
+
+HEADER_DTYPE = _header_dtype("=")
+assert HEADER_DTYPE.itemsize == HEADER_BYTES
+
+# Machine stamps for little and big endian files
+_MACHST = {"<": (0x44, 0x44, 0x00, 0x00), ">": (0x11, 0x11, 0x00, 0x00)}
+
+
+class Header(NamedTuple):
+    shape: Shape  # (z, y, x) after applying the axis order
+    offset: int
+    dtype: np.dtype
+    axes: Tuple[int, int, int]  # Transposes stored data to (z, y, x)
+    voxel_size: Vector  # (x, y, z)
+    origin: Vector  # (x, y, z)
+
+    @property
+    def sampling(self) -> float:
+        return self.voxel_size[0]
+
+
+def _byteorder(raw: bytes) -> str:
+    machst = raw[212]
+    if machst in (0x44, 0x41):
+        return "<"
+    elif machst == 0x11:
+        return ">"
+
+    # Some writers leave the machine stamp empty; fall back on the mode
+    # being one of the few values it can take
+    mode = int(np.frombuffer(raw, dtype="<i4", count=1, offset=12)[0])
+    return "<" if mode in MODES else ">"
+
+
+def _read_fields(path: os.PathLike) -> np.void:
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_BYTES)
+
+    if len(raw) < HEADER_BYTES:
+        raise ValueError(f"File at {path} is too short to be an MRC file")
+
+    return np.frombuffer(raw, dtype=_header_dtype(_byteorder(raw)))[0]
+
+
+def read_header(path: os.PathLike) -> Header:
+    """Read the shape, data type and geometry of an MRC/CCP4 map."""
+    header = _read_fields(path)
+    byteorder = header.dtype["nx"].byteorder
+
+    mode = int(header["mode"])
+    if mode not in MODES:
+        raise ValueError(f"MRC mode {mode} of file at {path} is not supported")
+
+    dtype = MODES[mode].newbyteorder(byteorder)
+
+    stored_shape = (int(header["nz"]), int(header["ny"]), int(header["nx"]))
+    if min(stored_shape) <= 0:
+        raise ValueError(f"File at {path} does not have a valid MRC header")
+
+    # Stored axes run (section, row, column); mapc/mapr/maps say which of
+    # X (1), Y (2) and Z (3) each of them is
+    stored_axes = (int(header["maps"]), int(header["mapr"]), int(header["mapc"]))
+    if sorted(stored_axes) != [1, 2, 3]:
+        stored_axes = (3, 2, 1)
+
+    axes = tuple(stored_axes.index(a) for a in (3, 2, 1))
+    shape = tuple(stored_shape[a] for a in axes)
+
+    sampling = (int(header["mx"]), int(header["my"]), int(header["mz"]))
+    cell = tuple(float(c) for c in header["cella"])
+    voxel_size = tuple(c / s if s > 0 else 1.0 for c, s in zip(cell, sampling))
+
+    return Header(
+        shape,  # type: ignore
+        HEADER_BYTES + int(header["nsymbt"]),
+        dtype,
+        axes,  # type: ignore
+        voxel_size,  # type: ignore
+        tuple(float(o) for o in header["origin"]),  # type: ignore
+    )
+
+
+def open_memmap(path: os.PathLike) -> np.ndarray:
+    """
+    Map the voxels of an MRC/CCP4 map without reading them. The result is a
+    read-only view indexed as ``(z, y, x)``.
+    """
+    header = read_header(path)
+    stored_shape = tuple(header.shape[header.axes.index(a)] for a in range(3))
+
+    data = np.memmap(
+        path, dtype=header.dtype, mode="r", offset=header.offset, shape=stored_shape
+    )
+
+    return data.transpose(header.axes)
+
+
+def read_region(
+    path: os.PathLike,
+    z: Any = slice(None),
+    y: Any = slice(None),
+    x: Any = slice(None),
+) -> np.ndarray:
+    """Read a sub-box of an MRC/CCP4 map, touching only the pages that hold it."""
+    region = open_memmap(path)[z, y, x]
+
+    return np.array(region, dtype=region.dtype.newbyteorder("="), copy=True)
+
+
+def _as_vector(value: Union[float, Vector]) -> Vector:
+    if np.ndim(value) == 0:
+        return (float(value),) * 3  # type: ignore
+    else:
+        return tuple(float(v) for v in value)  # type: ignore
+
+
+def file_size(shape: Shape) -> int:
+    """Size in bytes of a float32 MRC map with shape ``(z, y, x)``."""
+    return HEADER_BYTES + int(np.prod(shape)) * 4
+
+
+def make_header(
+    shape: Shape,
+    voxel_size: Union[float, Vector] = 1.0,
+    origin: Vector = (0.0, 0.0, 0.0),
+    dtype=np.float32,
+    statistics: Optional[VolumeStatistics] = None,
+) -> np.ndarray:
+    """Build an MRC2014 header for data with shape ``(z, y, x)``."""
+    nz, ny, nx = shape
+    voxel_size = _as_vector(voxel_size)
+
+    modes = {v: k for k, v in MODES.items()}
+
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["nx"], header["ny"], header["nz"] = nx, ny, nz
+    header["mode"] = modes[np.dtype(dtype)]
+    header["mx"], header["my"], header["mz"] = nx, ny, nz
+    header["cella"] = [n * v for n, v in zip((nx, ny, nz), voxel_size)]
+    header["cellb"] = 90.0
+    header["mapc"], header["mapr"], header["maps"] = 1, 2, 3
+
+    if statistics is not None:
+        header["dmin"], header["dmax"] = statistics.minimum, statistics.maximum
+        header["dmean"], header["rms"] = statistics.mean, statistics.std
+    else:
+        # dmax < dmin and a negative rms mark the statistics as not computed
+        header["dmin"], header["dmax"], header["dmean"], header["rms"] = 0, -1, -2, -1
+
+    header["ispg"] = 1
+    header["nversion"] = 20140
+    header["origin"] = _as_vector(origin)
+    header["map"] = b"MAP "
+    header["machst"] = _MACHST["<" if sys.byteorder == "little" else ">"]
+
+    return header
+
+
+def write_volume(
+    path: os.PathLike,
+    data: VolumeData,
+    *,
+    shape: Optional[Shape] = None,
+    voxel_size: Union[float, Vector] = 1.0,
+    origin: Vector = (0.0, 0.0, 0.0),
+    max_workers: Optional[int] = None,
+) -> VolumeStatistics:
+    """
+    Write a float32 MRC/CCP4 map from an ndarray or from an iterable of
+    z-slabs and return the statistics of its voxels. When passing slabs,
+    ``shape`` must describe the full ``(z, y, x)`` volume.
+    """
+    slabs, shape = as_slabs(data, shape)
+    header = make_header(shape, voxel_size, origin)
+
+    statistics = write_slabs(path, header, slabs, shape, np.float32, max_workers)
+    update_header(path, make_header(shape, voxel_size, origin, statistics=statistics))
+
+    return statistics
+
+
+class StackHeader(NamedTuple):
+    shape: Shape  # Shape of a single image, (1, y, x) for 2D images
+    n_images: int
+    offset: int
+    dtype: np.dtype
+    voxel_size: Vector  # (x, y, z)
+    origin: Vector  # (x, y, z)
+
+
+def read_stack_header(path: os.PathLike) -> StackHeader:
+    """Read the image shape and layout of an MRC image or volume stack."""
+    header = read_header(path)
+    fields = _read_fields(path)
+
+    if header.axes != (0, 1, 2):
+        raise ValueError(f"Stack at {path} does not store images section by section")
+
+    nz, ny, nx = header.shape
+
+    # Space groups 401-630 mark stacks of volumes with mz sections each; any
+    # other stack holds 2D images (RELION leaves ispg at 0 or 1 for those)
+    mz = int(fields["mz"])
+    if int(fields["ispg"]) >= 401 and mz > 0 and nz % mz == 0:
+        shape, n_images = (mz, ny, nx), nz // mz
+    else:
+        shape, n_images = (1, ny, nx), nz
+
+    return StackHeader(
+        shape, n_images, header.offset, header.dtype, header.voxel_size, header.origin
+    )
+
+
+def open_stack_memmap(path: os.PathLike) -> np.ndarray:
+    """
+    Map the images of an MRC stack without reading them. The result is a
+    read-only view indexed as ``(image, z, y, x)``.
+    """
+    header = read_stack_header(path)
+
+    return np.memmap(
+        path,
+        dtype=header.dtype,
+        mode="r",
+        offset=header.offset,
+        shape=(header.n_images, *header.shape),
+    )
+
+
+def make_stack_header(
+    shape: Shape,
+    n_images: int,
+    voxel_size: Union[float, Vector] = 1.0,
+    origin: Vector = (0.0, 0.0, 0.0),
+    statistics: Optional[VolumeStatistics] = None,
+) -> np.ndarray:
+    """
+    Build an MRC2014 header for ``n_images`` images with shape ``(z, y, x)``;
+    2D images use ``z = 1``.
+    """
+    nz, ny, nx = shape
+    voxel_size = _as_vector(voxel_size)
+
+    header = make_header(
+        (n_images * nz, ny, nx), voxel_size, origin, statistics=statistics
+    )
+
+    # mz is the number of sections of a single image
+    header["mz"] = nz
+    header["cella"] = [n * v for n, v in zip((nx, ny, nz), voxel_size)]
+    header["ispg"] = 0 if nz == 1 else 401
+
+    return header
+
+
+def write_stack(
+    path: os.PathLike,
+    images: Iterable[np.ndarray],
+    *,
+    shape: Shape,
+    n_images: int,
+    voxel_size: Union[float, Vector] = 1.0,
+    origin: Vector = (0.0, 0.0, 0.0),
+    max_workers: Optional[int] = None,
+) -> VolumeStatistics:
+    """
+    Write images of the same ``(z, y, x)`` shape to a float32 MRC stack and
+    return the statistics of all voxels.
+    """
+    nz, ny, nx = shape
+    header = make_stack_header(shape, n_images, voxel_size, origin)
+
+    statistics = write_slabs(
+        path, header, images, (n_images * nz, ny, nx), np.float32, max_workers
+    )
+    update_header(
+        path, make_stack_header(shape, n_images, voxel_size, origin, statistics)
+    )
+
+    return statistics
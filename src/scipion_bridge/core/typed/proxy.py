@@ -1,25 +1,55 @@
 import os
+import asyncio
 import inspect
+import contextvars
 from pathlib import Path, PurePath
 import logging
 import warnings
 from enum import Enum
 from functools import partial, wraps
+import copy
 import shutil
+import weakref
+from concurrent.futures import Future
 
 from dependency_injector.wiring import Provide, inject
 from ..environment.container import Container
-from ..environment.temp_files import TemporaryFilesProvider
+from ..environment.temp_files import TemporaryFilesProvider, Tier
+from ..environment.cold import ColdStore
+from ..environment.io_hints import IOHints
+from ..environment.call_cache import CallCache
+from ..environment.executor import CallExecutor
 from ..utils.arc import manager as arc_manager
 from ..utils.func_params import extract_func_params
+from ..utils.pipeline import NOT_RESTORED, Node, Pipeline, current_pipeline
 
 from ..utils.arc import manager as arc_manager
 
-from .resolve import current_registry, resolve_params, resolver, Registry
-from typing import Optional, Generic, Type, Union, TYPE_CHECKING, Any
+from .resolve import (
+    current_registry,
+    resolve_params,
+    resolver,
+    resolve_as_caller,
+    Registry,
+    ResolverDeclined,
+    _find_calling_frame,
+)
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Generic,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    TYPE_CHECKING,
+    Any,
+    NamedTuple,
+)
 from typing_extensions import TypeAlias, TypeVar, get_args, get_origin
 
-
 Casted = TypeVar("Casted")
 T = TypeVar("T")
 
@@ -28,22 +58,54 @@ Origin = TypeVar("Origin", default=Any)
 
 
 class FuncParam:
+    __slots__ = ("str_rep", "dtype", "managed_proxy", "owner")
+
     def __init__(
-        self, str_rep: str, dtype: Optional[Type[T]] = None, managed_proxy=False
+        self,
+        str_rep: str,
+        dtype: Optional[Type[T]] = None,
+        managed_proxy=False,
+        owner: Optional["Proxy"] = None,
     ) -> None:
         self.str_rep = str_rep
         self.dtype = dtype
         self.managed_proxy = managed_proxy
 
-        if managed_proxy:
-            arc_manager.add_reference(Path(str_rep))
+        # Holding on to the proxy keeps its managed file alive for as long as
+        # the parameter is in use, without touching the reference count
+        self.owner = owner
 
     def __repr__(self) -> str:
         return f"{FuncParam.__name__} ({self.str_rep}, dtype={self.dtype}, managed_proxy={self.managed_proxy})"
 
-    def __del__(self):
-        if self.managed_proxy:
-            arc_manager.remove_reference(Path(self.str_rep))
+
+def _release_managed_file(path: Path):
+    try:
+        arc_manager.remove_reference(path)
+
+    except Exception as e:
+        logging.warning(f"Failed to delete file at {path}: {e}")
+        pass  # Fail silently
+
+
+class SharedProxy(NamedTuple):
+    """
+    Picklable handle to a managed file returned by :meth:`Proxy.share`. It
+    holds a reference on behalf of the process receiving it, which must take
+    it over with :meth:`adopt` exactly once.
+    """
+
+    proxy_type: Type["Proxy"]
+    path: Path
+
+    def adopt(self) -> "Proxy":
+        arc_manager.adopt(self.path)
+        new_proxy = self.proxy_type(self.path, managed=True)
+
+        # The proxy holds the reference that was handed over
+        arc_manager.remove_reference(self.path)
+
+        return new_proxy
 
 
 class ProxyMetaclass(type):
@@ -55,14 +117,18 @@ class ProxyMetaclass(type):
             path_ext = value.suffix
 
             if not proxy_ext == path_ext:
-                raise TypeError(
+                # Paths with another extension are resolved through the proxy
+                # type for their extension, if there is one
+                raise ResolverDeclined(
                     f"The file extension did not match the proxy (Expected {proxy_ext} but received {path_ext})"
                 )
 
             return x(value, managed=False)
 
         # Put this in the scipion_bridge namespace so the user can shadow this
-        # default resolver with their own if needed
+        # default resolver with their own if needed. Other resolvers shipped
+        # with the typed proxies (arrays, conversions, stacks) are registered
+        # there too, so they are found whenever the proxies are
         default_resolver_namespace = Registry._namespace_from_symbol(
             module=str(__package__),
             qualname=resolve_path_proxy.__name__,
@@ -79,18 +145,118 @@ class ProxyMetaclass(type):
         return x
 
 
+@inject
+def _tier_of(
+    path: Path,
+    temp_file_provider: TemporaryFilesProvider = Provide[Container.temp_file_provider],
+) -> Optional[Tier]:
+    return temp_file_provider.tier_of(path)
+
+
+@inject
+def _complete(
+    path: Path,
+    temp_file_provider: TemporaryFilesProvider = Provide[Container.temp_file_provider],
+    cold_store: ColdStore = Provide[Container.cold_store],
+):
+    temp_file_provider.complete(path)
+
+    # Outputs that are never read again still go cold once idle
+    cold_store.track(path)
+
+
+@inject
+def _access(path: Path, cold_store: ColdStore = Provide[Container.cold_store]):
+    cold_store.access(path)
+
+
+@inject
+def _will_need(paths: List[Path], io_hints: IOHints = Provide[Container.io_hints]):
+    io_hints.will_need(paths)
+
+
+@inject
+def _call_cache(call_cache: CallCache = Provide[Container.call_cache]) -> CallCache:
+    return call_cache
+
+
+@inject
+def _executor(executor: CallExecutor = Provide[Container.executor]) -> CallExecutor:
+    return executor
+
+
+@inject
+def _pin(path: Path, cold_store: ColdStore = Provide[Container.cold_store]):
+    cold_store.pin(path)
+
+
+@inject
+def _unpin(path: Path, cold_store: ColdStore = Provide[Container.cold_store]):
+    cold_store.unpin(path)
+
+
 class Proxy(metaclass=ProxyMetaclass):
+    __slots__ = ("_path", "managed", "_finalizer", "__weakref__")
 
     def __init__(self, path: os.PathLike, managed=False, *args, **kwargs):
 
-        self.path = Path(path)
+        self._path = Path(path)
         self.managed = managed
 
         if self.managed == True:
-            arc_manager.add_reference(self.path)
+            arc_manager.add_reference(self._path)
+
+            # Finalizers run when the proxy is collected (or at exit) and skip
+            # the dependency injection a __del__ method would go through
+            self._finalizer = weakref.finalize(self, _release_managed_file, self._path)
+        else:
+            self._finalizer = None
 
         super().__init__(*args, **kwargs)
 
+    @property
+    def path(self) -> Path:
+        """
+        Path of the file. Managed files that were compressed while idle are
+        decompressed first.
+        """
+        if self.managed:
+            _access(self._current_path())
+
+        return self._path
+
+    def _current_path(self) -> Path:
+        # Every proxy of a managed file follows it when it is moved, e.g. out
+        # of an arena by another proxy
+        if self.managed:
+            self._path = arc_manager.current_path(self._path)
+
+        return self._path
+
+    def __reduce__(self):
+        # Handing a managed file to another process takes a reference, which
+        # can't be tied to pickling (copies may be loaded any number of times)
+        if self.managed:
+            raise TypeError(
+                f"Managed {type(self).__name__} can't be pickled; pass proxy.share() to other processes instead"
+            )
+
+        return (type(self), (self._path,))
+
+    def share(self) -> SharedProxy:
+        """
+        Take a reference to the managed file for another process and return a
+        picklable handle to it. The file lives until both processes released
+        it; the receiving process gets its proxy with :meth:`SharedProxy.adopt`.
+        """
+        if not self.managed:
+            raise ValueError("Only managed proxies can be shared")
+
+        path = self._current_path()
+
+        arc_manager.share(path)
+        return SharedProxy(type(self), path)
+
     @classmethod
     def file_ext(cls) -> Optional[str]:
         return None
@@ -105,13 +271,37 @@ class Proxy(metaclass=ProxyMetaclass):
             return ext
 
     @classmethod
-    def new_temporary_proxy(cls) -> "Proxy":
+    def new_temporary_proxy(
+        cls, expected_size: Optional[int] = None, preallocate: bool = False
+    ) -> "Proxy":
+        """
+        Create a proxy for a new managed file. ``expected_size`` in bytes lets
+        the temporary files provider place small files on a faster tier and,
+        with ``preallocate``, reserve their space up front.
+        """
         file_ext = cls.file_ext()
         file_ext = file_ext if file_ext is not None else ""
 
-        temp_file = arc_manager.new_managed_file(file_ext)
+        temp_file = arc_manager.new_managed_file(file_ext, expected_size, preallocate)
+        new_proxy = cls(temp_file, managed=True)
 
-        return cls(temp_file, managed=True)
+        # The proxy now holds the only reference to the new file
+        arc_manager.remove_reference(temp_file)
+
+        return new_proxy
+
+    def _relocate(self, new_path: os.PathLike):
+        """Point the proxy at the new location of its file after a move."""
+        self._path = Path(new_path)
+
+        if self._finalizer is not None:
+            self._finalizer.detach()
+            self._finalizer = weakref.finalize(self, _release_managed_file, self._path)
+
+    @property
+    def tier(self) -> Optional[Tier]:
+        """Storage tier of a managed file; ``None`` for other files."""
+        return _tier_of(self._current_path()) if self.managed else None
 
     def typed(self, *, astype: Type[Casted], copy_data=True) -> Casted:
         if self.file_ext() is not None:
@@ -135,31 +325,24 @@ class Proxy(metaclass=ProxyMetaclass):
 
         return new_proxy
 
-    @inject
-    def __del__(
-        self,
-        temp_file_provider: TemporaryFilesProvider = Provide[
-            Container.temp_file_provider
-        ],
-    ):
-
-        try:
-            if self.managed == True:
-                arc_manager.remove_reference(self.path)
-
-        except Exception as e:
-            logging.warning(f"Failed to delete file at {self.path}: {e}")
-            pass  # Fail silently
-
     def __str__(self):
         is_owned = "managed" if self.managed else "unmanaged"
-        return f"<{self.__class__.__name__} for {self.path} ({is_owned})>"
+        return f"<{self.__class__.__name__} for {self._path} ({is_owned})>"
 
 
 class Output(Generic[T]):
-    def __init__(self, dtype: Type[T]) -> None:
+    def __init__(
+        self,
+        dtype: Type[T],
+        size_hint: Union[None, int, Callable[[Dict[str, Any]], Optional[int]]] = None,
+    ) -> None:
+        """
+        ``size_hint`` is the expected size of the output in bytes, or a
+        function computing it from the arguments of the call.
+        """
         assert issubclass(dtype, Proxy)
         self.dtype = dtype
+        self.size_hint = size_hint
 
         current_registry().add_resolver(Output, dtype, resolver=resolve_output_to_proxy)
 
@@ -175,7 +358,7 @@ def namedproxy(typename: str, *, file_ext: str):
     def file_ext_func(cls) -> Optional[str]:
         return file_ext
 
-    proxy_subclass = type(typename, (Proxy,), {})
+    proxy_subclass = type(typename, (Proxy,), {"__slots__": ()})
     proxy_subclass.file_ext = file_ext_func  # type: ignore
 
     return proxy_subclass
@@ -193,6 +376,51 @@ else:
         pass  # Marker Type
 
 
+def _result(value):
+    return value.result() if isinstance(value, (Future, Node)) else value
+
+
+class _PreparedCall:
+    """Arguments of a proxified call, resolved and ready to run."""
+
+    __slots__ = (
+        "resolved",
+        "n_positional",
+        "output_names",
+        "pinned",
+        "call_cache",
+        "cache_key",
+    )
+
+    def __init__(
+        self,
+        resolved: List[Tuple[str, FuncParam]],
+        n_positional: int,
+        output_names: Set[str],
+        pinned: List[Path],
+        call_cache: CallCache,
+        cache_key: Optional[str],
+    ) -> None:
+        self.resolved = resolved
+        self.n_positional = n_positional
+        self.output_names = output_names
+        self.pinned = pinned
+        self.call_cache = call_cache
+        self.cache_key = cache_key
+
+    @property
+    def args(self) -> List[str]:
+        return [v.str_rep for _, v in self.resolved[: self.n_positional]]
+
+    @property
+    def kwargs(self) -> Dict[str, str]:
+        return {k: v.str_rep for k, v in self.resolved[self.n_positional :]}
+
+    @property
+    def output_paths(self) -> List[Path]:
+        return [Path(v.str_rep) for k, v in self.resolved if k in self.output_names]
+
+
 def proxify(f):
 
     signature = inspect.signature(f)
@@ -218,28 +446,185 @@ def proxify(f):
             value, astype=FuncParam, intermediate=intermediate
         )
 
-    @wraps(f)
-    def wrapped(*args, **kwargs):
+    func_name = f"{f.__module__}.{f.__qualname__}"
+
+    # Pass use_cache=False to run the function even if its result is cached
+    accepts_use_cache = "use_cache" not in signature.parameters
+
+    # External programs are identified by their command line and binary, so
+    # changing how arguments are passed to them invalidates their entries
+    command = getattr(f, "command", None)
+    binary = getattr(f, "binary", None)
+
+    def _key(
+        call_cache: CallCache,
+        arguments: List[Tuple[str, Any]],
+        values: Dict[str, Any],
+    ) -> Optional[str]:
+        # ``values`` are the arguments passed as they are, the others files
+        if command is None or binary is None:
+            return call_cache.key(func_name, arguments)
+
+        # Files are passed as placeholders, which are keyed like the arguments
+        files = {f"<{k}>": v for k, v in arguments if k not in values}
+        placeholders = {k: f"<{k}>" for k, _ in arguments if k not in values}
+
+        try:
+            argv = command(**values, **placeholders)
+        except (TypeError, ValueError) as e:
+            logging.debug(f"Not caching {func_name}: {e}")
+            return None
+
+        def _word(word: str):
+            if word in files:
+                return files[word]
+
+            embedded = [v for p, v in files.items() if p in word]
+            return [word, *embedded] if embedded else word
+
+        return call_cache.command_key([_word(w) for w in argv], binary())
+
+    def _cache_key(
+        call_cache: CallCache, resolved: List[Tuple[str, FuncParam]], outputs
+    ) -> Optional[str]:
+        arguments: List[Tuple[str, Any]] = []
+        values: Dict[str, Any] = {}
+        for name, v in resolved:
+            if name in outputs:
+                # Outputs may also be passed as plain paths
+                file_ext = v.dtype.file_ext() if v.dtype is not None else None
+                arguments.append((name, ("output", file_ext or "")))
+            elif v.dtype is not None or os.path.isfile(v.str_rep):
+                arguments.append((name, ("input", v.str_rep)))
+            else:
+                arguments.append((name, v.str_rep))
+                values[name] = v.str_rep
+
+        return _key(call_cache, arguments, values)
+
+    def _bind_size_hint(value, arguments: Dict[str, Any]):
+        if not isinstance(value, Output) or not callable(value.size_hint):
+            return value
+
+        bound = copy.copy(value)
+        bound.size_hint = value.size_hint(arguments)
+
+        return bound
+
+    def _graph_key(args, kwargs) -> Optional[str]:
+        # Calls in a pipeline are keyed by the keys of the nodes they consume,
+        # so unchanged sub-graphs are found in the cache before they run
+        call_cache = _call_cache()
+        kwargs = dict(kwargs)
+        use_cache = kwargs.pop("use_cache", True) if accepts_use_cache else True
+        if not call_cache.enabled or not use_cache:
+            return None
+
+        arguments: List[Tuple[str, Any]] = []
+        values: Dict[str, Any] = {}
+        for param, v in extract_func_params(args, kwargs, signature).items():
+            if isinstance(v, Node):
+                if v.key is None:
+                    return None
+                arguments.append((param.name, ("node", v.key)))
+            elif isinstance(v, Output):
+                arguments.append((param.name, ("output", v.dtype.file_ext() or "")))
+            elif isinstance(v, Proxy):
+                arguments.append((param.name, ("input", os.fspath(v.path))))
+            elif isinstance(v, (str, PurePath)) and os.path.isfile(v):
+                arguments.append((param.name, ("input", os.fspath(v))))
+            elif isinstance(v, Future):
+                return None
+            else:
+                arguments.append((param.name, str(v)))
+                values[param.name] = v
+
+        return _key(call_cache, arguments, values)
+
+    def _prepare(
+        args, kwargs, cache_key: Optional[str] = None, outputs_only: bool = False
+    ) -> _PreparedCall:
+        use_cache = kwargs.pop("use_cache", True) if accepts_use_cache else True
+
+        # Outputs of submitted calls are passed on once they are ready
+        if not outputs_only:
+            args = tuple(_result(v) for v in args)
+            kwargs = {k: _result(v) for k, v in kwargs.items()}
 
         func_args = extract_func_params(args, kwargs, signature)
+        arguments = {param.name: v for param, v in func_args.items()}
 
         should_return = {
             k: isinstance(v.default, Output) for k, v in signature.parameters.items()
         }
 
+        # Only the outputs are needed to restore them from the cache; inputs
+        # may not exist then
         resolved = [
-            (param.name, _resolve_proxy_arg(v, param)) for param, v in func_args.items()
+            (
+                param.name,
+                _resolve_proxy_arg(
+                    _bind_size_hint(v, arguments) if not outputs_only else v, param
+                ),
+            )
+            for param, v in func_args.items()
+            if not outputs_only or should_return[param.name]
         ]
 
-        resolved_args = [v.str_rep for _, v in resolved[: len(args)]]
-        resolved_kwargs = {k: v.str_rep for k, v in resolved[len(args) :]}
+        # Start reading the inputs into the page cache while the program is
+        # being launched; outputs don't exist yet and are skipped
+        _will_need([Path(v.str_rep) for _, v in resolved if v.dtype is not None])
+
+        # Keep the files the program works on from being compressed under it
+        pinned = [Path(v.str_rep) for _, v in resolved if v.managed_proxy]
+        for path in pinned:
+            _pin(path)
+
+        call_cache = _call_cache()
+        output_names = {k for k, _ in resolved if should_return[k]}
+
+        if not (call_cache.enabled and use_cache and output_names):
+            cache_key = None
+        elif cache_key is None:
+            cache_key = _cache_key(call_cache, resolved, output_names)
+
+        n_positional = len(args) if not outputs_only else 0
+        return _PreparedCall(
+            resolved, n_positional, output_names, pinned, call_cache, cache_key
+        )
+
+    def _restore(call: _PreparedCall) -> bool:
+        return call.cache_key is not None and call.call_cache.restore(
+            call.cache_key, call.output_paths
+        )
+
+    def _unpin_all(call: _PreparedCall):
+        for path in call.pinned:
+            _unpin(path)
 
-        out_val = f(*resolved_args, **resolved_kwargs)
+    def _abort(call: _PreparedCall):
+        # Dropping the parameters releases the reserved output files, which
+        # removes the files programs derived from their names too. Outputs at
+        # paths passed by the caller are left alone.
+        call.resolved.clear()
 
+    def _finish(call: _PreparedCall, out_val, cached: bool):
         return_vals = [
-            _proxy_from_func_param(v) for k, v in resolved if should_return[k]
+            _proxy_from_func_param(v)
+            for k, v in call.resolved
+            if k in call.output_names
         ]
 
+        # Outputs are deduplicated and measured once the program wrote them
+        for proxy in return_vals:
+            if proxy.managed:
+                _complete(proxy._path)
+
+        if cached:
+            call.call_cache.register(call.cache_key, call.output_paths)
+        elif call.cache_key is not None:
+            call.call_cache.store(call.cache_key, func_name, call.output_paths)
+
         try:
             outputs = out_val if isinstance(out_val, tuple) else tuple([out_val])
             outputs_are_proxies = all(isinstance(o, Proxy) for o in outputs)
@@ -259,9 +644,173 @@ def proxify(f):
         else:
             return tuple(return_vals)
 
+    def _run(call: _PreparedCall):
+        try:
+            cached = _restore(call)
+            out_val = f(*call.args, **call.kwargs) if not cached else None
+        except BaseException:
+            _abort(call)
+            raise
+        finally:
+            _unpin_all(call)
+
+        return _finish(call, out_val, cached)
+
+    def _run_node(frame, cache_key: Optional[str], *args, **kwargs):
+        with resolve_as_caller(frame):
+            call = _prepare(args, kwargs, cache_key=cache_key)
+
+        return _run(call)
+
+    def _restore_node(frame, args, kwargs, cache_key: str):
+        if not _call_cache().contains(cache_key):
+            return NOT_RESTORED
+
+        with resolve_as_caller(frame):
+            call = _prepare(args, dict(kwargs), cache_key, outputs_only=True)
+
+        try:
+            cached = _restore(call)
+        finally:
+            _unpin_all(call)
+
+        if not cached:
+            _abort(call)
+            return NOT_RESTORED
+
+        return _finish(call, None, cached)
+
+    def _defer(graph: Pipeline, args, kwargs) -> Node:
+        # Nodes run on worker threads, which resolve values as the caller
+        frame = _find_calling_frame()
+
+        key = _graph_key(args, kwargs)
+        restore = None
+        if key is not None and has_outputs:
+            restore = partial(_restore_node, frame, args, kwargs, key)
+
+        return graph.add(
+            partial(_run_node, frame, key),
+            args,
+            kwargs,
+            key=key,
+            restore=restore,
+            name=f.__qualname__,
+        )
+
+    has_outputs = any(
+        isinstance(p.default, Output) for p in signature.parameters.values()
+    )
+
+    @wraps(f)
+    def wrapped(*args, **kwargs):
+        graph = current_pipeline()
+        if graph is not None:
+            return _defer(graph, args, kwargs)
+
+        return _run(_prepare(args, kwargs))
+
+    def submit(*args, **kwargs) -> Future:
+        """
+        Run the function on the call executor and return a future of its
+        outputs. Futures can be passed as arguments of later calls, which
+        then wait for them to finish.
+        """
+
+        # Resolvers look up the frame of the caller, which is gone by the time
+        # a worker runs the call
+        frame = _find_calling_frame()
+
+        def _submitted():
+            with resolve_as_caller(frame):
+                call = _prepare(args, kwargs)
+
+            return _run(call)
+
+        # Workers don't inherit the caller's context, e.g. the current arena
+        return _executor().submit(contextvars.copy_context().run, _submitted)
+
+    wrapped.submit = submit  # type: ignore
+
+    run_async = getattr(f, "run_async", None)
+    if run_async is not None:
+
+        def wrapped_async(*args, **kwargs):
+            """
+            Awaitable variant of the function. Arguments are resolved and
+            outputs completed on worker threads, so hashing and decompressing
+            files doesn't block the event loop. If the call is cancelled, the
+            program is killed and its outputs are removed.
+            """
+
+            # Resolvers look up the frame of the caller, which is gone once
+            # the coroutine runs
+            frame = _find_calling_frame()
+            context = contextvars.copy_context()
+
+            def _prepare_as_caller():
+                with resolve_as_caller(frame):
+                    return _prepare(args, kwargs)
+
+            def _discard(prepared: "asyncio.Future[_PreparedCall]"):
+                if prepared.cancelled() or prepared.exception() is not None:
+                    return
+
+                _unpin_all(prepared.result())
+                _abort(prepared.result())
+
+            async def _run():
+                loop = asyncio.get_running_loop()
+
+                # Worker threads don't inherit the context, e.g. the arena
+                prepared = loop.run_in_executor(None, context.run, _prepare_as_caller)
+                try:
+                    call = await asyncio.shield(prepared)
+                except asyncio.CancelledError:
+                    prepared.add_done_callback(_discard)
+                    raise
+
+                restoring = loop.run_in_executor(None, _restore, call)
+                try:
+                    cached = await asyncio.shield(restoring)
+                    out_val = (
+                        await run_async(*call.args, **call.kwargs)
+                        if not cached
+                        else None
+                    )
+                except BaseException:
+                    # Cancelled while cached files are linked into the outputs;
+                    # release them once the worker is done
+                    if restoring.done():
+                        _abort(call)
+                    else:
+                        restoring.add_done_callback(lambda _: _abort(call))
+                    raise
+                finally:
+                    _unpin_all(call)
+
+                return await loop.run_in_executor(
+                    None, context.run, _finish, call, out_val, cached
+                )
+
+            return _run()
+
+        wrapped.run_async = wrapped_async  # type: ignore
+
     return wrapped
 
 
+@inject
+def prefetch(
+    *values: Union[Proxy, os.PathLike], io_hints: IOHints = Provide[Container.io_hints]
+):
+    """
+    Ask the kernel to read files into the page cache in the background, e.g.
+    the inputs of the next program while the current one is still running.
+    """
+    io_hints.will_need([v.path if isinstance(v, Proxy) else Path(v) for v in values])
+
+
 @resolver
 def resolve_path_to_func_param(value: Path) -> FuncParam:
     return FuncParam(str(value))
@@ -274,7 +823,9 @@ def resolve_str_to_func_param(value: str) -> FuncParam:
 
 @resolver
 def resolve_proxy_to_func_param(value: Proxy) -> FuncParam:
-    return FuncParam(str(value.path), type(value), managed_proxy=value.managed)
+    return FuncParam(
+        str(value.path), type(value), managed_proxy=value.managed, owner=value
+    )
 
 
 @resolver
@@ -286,7 +837,10 @@ def resolve_output_to_proxy(
     value: Output,
 ) -> Proxy:
 
-    new_proxy = value.dtype.new_temporary_proxy()
+    # External programs usually truncate their outputs, so the hint is only
+    # used to pick the tier and space is not preallocated
+    size_hint = value.size_hint if isinstance(value.size_hint, int) else None
+    new_proxy = value.dtype.new_temporary_proxy(size_hint)
 
     assert isinstance(new_proxy, Proxy)
     return new_proxy
@@ -6,7 +6,10 @@ import logging
 import warnings
 import time
 from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import wraps, partial
+from types import FrameType
 
 from ..utils.func_params import extract_func_params
 from .dijkstra import find_shortest_path, PathfindingContainer
@@ -33,6 +36,15 @@ if sys.version_info < (3, 11):
         RuntimeWarning,
     )
 
+
+class ResolverDeclined(TypeError):
+    """
+    Raised by a resolver that does not handle the value it was given, e.g. a
+    path with another extension. Resolution continues along the next best
+    path without the resolver.
+    """
+
+
 ResolveStep = namedtuple("ResolveStep", ("func", "description"))
 ResolveContext = namedtuple(
     "ResolveContext", ("registry", "namespaces", "caller_namespace", "recursion_level")
@@ -59,7 +71,22 @@ def _passthrough(x):
     return x
 
 
+# Resolutions run concurrently in several threads, each with its own context
+_current_context: ContextVar[Optional[ResolveContext]] = ContextVar(
+    "_current_context", default=None
+)
+
+# Frame of the caller for values resolved on its behalf in another thread
+_calling_frame: ContextVar[Optional[FrameType]] = ContextVar(
+    "_calling_frame", default=None
+)
+
+
 def _find_calling_frame():
+    frame = _calling_frame.get()
+    if frame is not None:
+        return frame
+
     frame = inspect.currentframe()
     while frame is not None:
         if not frame.f_globals["__name__"].startswith(__package__):
@@ -70,6 +97,16 @@ def _find_calling_frame():
         raise RuntimeError("Could not find calling frame. This is a bug.")
 
 
+@contextmanager
+def resolve_as_caller(frame: FrameType):
+    """Resolve values as if called from ``frame``."""
+    token = _calling_frame.set(frame)
+    try:
+        yield
+    finally:
+        _calling_frame.reset(token)
+
+
 def _get_qualname(co_func) -> Optional[str]:
     try:
         return co_func.co_qualname
@@ -126,20 +163,26 @@ class ScopedPathfindingContainer(PathfindingContainer):
                 path_length = len(symbol_path.split("."))
                 other_path_length = len(other_symbol_path.split("."))
 
-                if (
-                    other_path_length == path_length
-                    and self.edge_attributes.resolver_fn
-                    is not other.edge_attributes.resolver_fn
-                ):
-                    pass
-
-                    # warnings.warn(
-                    #     f"Found ambiguous resolvers {symbol_path} and {other_symbol_path} during type resolution.",
-                    # )
+                if other_path_length == path_length:
+                    # Break ties by name, so the path doesn't depend on the
+                    # order resolvers were registered in
+                    return (
+                        symbol_path,
+                        _type_name(self.value),
+                        _type_name(self.previous),
+                    ) < (
+                        other_symbol_path,
+                        _type_name(other.value),
+                        _type_name(other.previous),
+                    )
 
                 return other_path_length < path_length
 
 
+def _type_name(dtype) -> str:
+    return f"{getattr(dtype, '__module__', '')}.{getattr(dtype, '__qualname__', dtype)}"
+
+
 def build_default_container(
     graph: nx.DiGraph,
     value: Type,
@@ -169,29 +212,27 @@ class resolution_context:
         self, registry: "Registry", namespace: Set[str], caller_namespace: str
     ):
 
-        global CURRENT_CTX
-        self._old_context = CURRENT_CTX
+        self._old_context = _current_context.get()
 
         if self._old_context is None:
-            CURRENT_CTX = ResolveContext(
+            context = ResolveContext(
                 registry, namespace, caller_namespace, recursion_level=0
             )
         else:
-            CURRENT_CTX = ResolveContext(
+            context = ResolveContext(
                 self._old_context.registry,
                 self._old_context.namespaces,
                 self._old_context.caller_namespace,
                 recursion_level=self._old_context.recursion_level + 1,
             )
 
-    def __enter__(self):
-        global CURRENT_CTX
+        self._token = _current_context.set(context)
 
-        return CURRENT_CTX
+    def __enter__(self):
+        return _current_context.get()
 
     def __exit__(self, *args, **kws):
-        global CURRENT_CTX
-        CURRENT_CTX = self._old_context
+        _current_context.reset(self._token)
 
 
 class Registry:
@@ -225,6 +266,7 @@ class Registry:
         target: Type[Origin],
         resolver: Callable,
         namespace: Optional[str] = None,
+        weight: int = 0,
     ):
 
         if namespace is None:
@@ -263,7 +305,7 @@ class Registry:
                 # print(f"Add downcast: {subclass} -> {dtype} in {__package__}, {weight}")
 
         self.graph.add_edge(
-            origin, target, resolver=resolver, weight=0, module=namespace
+            origin, target, resolver=resolver, weight=weight, module=namespace
         )
 
         # Add edges to downcast data
@@ -310,36 +352,63 @@ class Registry:
                 f"'{origin.__qualname__}' could not be resolved as '{target.__qualname__}'"
             )
 
-        try:
-            path = find_shortest_path(
-                subgraph,
-                upcast_origin,
-                target,
-                intermediate,
-                weight="weight",
-                container_builder=partial(
-                    build_default_container, local_scope_name=local_scope_name
-                ),
-            )
-        except (nx.NetworkXNoPath, nx.NodeNotFound, StopIteration):
-            raise TypeError(
-                f"'{origin.__qualname__}' could not be resolved as '{target.__qualname__}'"
-            )
+        def _find_edges(graph: nx.DiGraph, source: Type, via: Optional[Type]):
+            try:
+                path = find_shortest_path(
+                    graph,
+                    source,
+                    target,
+                    via,
+                    weight="weight",
+                    container_builder=partial(
+                        build_default_container, local_scope_name=local_scope_name
+                    ),
+                )
+            except (nx.NetworkXNoPath, nx.NodeNotFound, StopIteration):
+                raise TypeError(
+                    f"'{origin.__qualname__}' could not be resolved as '{target.__qualname__}'"
+                )
 
-        steps = [
-            _make_step((u, v), subgraph.get_edge_data(u, v))
-            for u, v in zip(path, path[1:])
-        ]
+            return list(zip(path, path[1:]))
+
+        edges = _find_edges(subgraph, upcast_origin, intermediate)
 
         def resolver_fn(value: Origin) -> Target:
             if not isinstance(value, origin):
                 raise TypeError("The input value for did not match origin data type")
 
+            graph = subgraph
+            remaining = edges
+            via = intermediate
+
             x = value
-            for step in steps:
+            steps = []
+            while remaining:
+                u, v = remaining[0]
+                step = _make_step((u, v), graph.get_edge_data(u, v))
                 logging.debug(step.description)
 
-                x = step.func(x)  # type: ignore
+                try:
+                    x = step.func(x)  # type: ignore
+                except ResolverDeclined as e:
+                    logging.debug(f"Declined: {e}")
+
+                    # Continue along the best path without the declining resolver
+                    if graph is subgraph:
+                        graph = subgraph.copy()
+                    graph.remove_edge(u, v)
+
+                    try:
+                        remaining = _find_edges(graph, u, via)
+                    except TypeError as no_path:
+                        raise no_path from e
+
+                    continue
+
+                steps.append(step)
+                remaining = remaining[1:]
+                if v == via:
+                    via = None
 
             if not isinstance(x, target):
                 resolve_desc = "\n".join([step.description for step in steps])
@@ -496,14 +565,13 @@ class Registry:
 
 
 DEFAULT_REGISTRY = Registry()
-CURRENT_CTX = None
 
 
 def current_registry() -> Registry:
-    global CURRENT_CTX
+    context = _current_context.get()
 
-    if CURRENT_CTX:
-        return CURRENT_CTX.registry
+    if context:
+        return context.registry
     else:
         return DEFAULT_REGISTRY
 
@@ -0,0 +1,189 @@
+import os
+import shutil
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from .stats import StatisticsAccumulator, VolumeStatistics
+
+from typing import Iterable, Iterator, Optional, Tuple, Union
+
+# Positional writes leave the file pointer alone, so several threads can write
+# slabs into the same descriptor at once
+_HAS_PWRITE = hasattr(os, "pwrite")
+
+SLAB_BYTES = 8 * 1024 * 1024  # Target size of the slabs an ndarray is split into
+
+Shape = Tuple[int, int, int]
+VolumeData = Union[np.ndarray, Iterable[np.ndarray]]
+
+
+def iter_slabs(data: np.ndarray, slab_bytes: int = SLAB_BYTES) -> Iterator[np.ndarray]:
+    """Split a volume into z-slabs of roughly ``slab_bytes`` each."""
+    _, ny, nx = data.shape
+    depth = max(1, slab_bytes // (ny * nx * data.itemsize))
+
+    for z in range(0, data.shape[0], depth):
+        yield data[z : z + depth]
+
+
+def as_slabs(
+    data: VolumeData, shape: Optional[Shape] = None
+) -> Tuple[Iterable[np.ndarray], Shape]:
+    """
+    Normalize an ndarray or an iterable of z-slabs into slabs and the shape of
+    the full ``(z, y, x)`` volume.
+    """
+    if isinstance(data, np.ndarray):
+        if data.ndim == 2:
+            data = data[None, ...]
+        if data.ndim != 3:
+            raise ValueError(f"Expected a 2D or 3D array but got shape {data.shape}")
+
+        return iter_slabs(data), data.shape  # type: ignore
+
+    elif shape is None:
+        raise ValueError("The shape of the volume is required when writing slabs")
+
+    else:
+        return data, tuple(int(s) for s in shape)  # type: ignore
+
+
+def break_links(path: os.PathLike, keep_contents: bool = True):
+    """
+    Give a file that shares its data through hard links, such as a
+    deduplicated output, an inode of its own before it is written in place, so
+    the other links keep their contents.
+    """
+    try:
+        if os.stat(path).st_nlink <= 1:
+            return
+    except FileNotFoundError:
+        return
+
+    if not keep_contents:
+        os.remove(path)
+        return
+
+    staging = f"{os.fspath(path)}.cow"
+    shutil.copy2(path, staging)
+    os.replace(staging, path)
+
+
+def _as_slab(slab: np.ndarray, shape: Shape, dtype: np.dtype) -> np.ndarray:
+    _, ny, nx = shape
+
+    slab = np.asarray(slab)
+    if slab.ndim == 2:
+        slab = slab[None, ...]
+
+    if slab.ndim != 3 or slab.shape[1:] != (ny, nx):
+        raise ValueError(
+            f"Slab with shape {slab.shape} does not match the volume shape {shape}"
+        )
+
+    return np.ascontiguousarray(slab, dtype=dtype)
+
+
+def _pwrite_all(fd: int, buffer: memoryview, offset: int):
+    while buffer:
+        written = os.pwrite(fd, buffer, offset)
+        buffer = buffer[written:]
+        offset += written
+
+
+def write_slabs(
+    path: os.PathLike,
+    header: np.ndarray,
+    slabs: Iterable[np.ndarray],
+    shape: Shape,
+    dtype=np.float32,
+    max_workers: Optional[int] = None,
+) -> VolumeStatistics:
+    """
+    Write a header followed by the voxels of a ``(z, y, x)`` volume and return
+    the statistics of the written voxels.
+
+    The file is sized up front and every slab is written at its own offset by
+    a pool of threads, so slabs produced by a generator never have to be held
+    in memory together.
+    """
+    dtype = np.dtype(dtype)
+    nz, ny, nx = shape
+
+    data_offset = header.nbytes
+    slice_bytes = ny * nx * dtype.itemsize
+
+    max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+
+    # Bound the number of slabs waiting to be written to keep memory in check
+    # when the slabs come from a generator
+    in_flight = threading.BoundedSemaphore(2 * max_workers)
+    seek_lock = threading.Lock()
+
+    statistics = StatisticsAccumulator()
+
+    # Every byte is overwritten, so the file is resized rather than truncated
+    # to keep space that was preallocated for it
+    break_links(path, keep_contents=False)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        os.ftruncate(fd, data_offset + nz * slice_bytes)
+
+        def _write(buffer: memoryview, offset: int, slab: Optional[np.ndarray]):
+            try:
+                if slab is not None:
+                    statistics.update(slab)
+
+                if _HAS_PWRITE:
+                    _pwrite_all(fd, buffer, offset)
+                else:  # pragma: no cover
+                    with seek_lock:
+                        os.lseek(fd, offset, os.SEEK_SET)
+                        os.write(fd, buffer)
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            header_bytes = np.ascontiguousarray(header).view(np.uint8)
+
+            in_flight.acquire()
+            futures = [executor.submit(_write, memoryview(header_bytes), 0, None)]
+
+            z = 0
+            for slab in slabs:
+                slab = _as_slab(slab, shape, dtype)
+                if z + slab.shape[0] > nz:
+                    raise ValueError(f"Received more than {nz} slices")
+
+                in_flight.acquire()
+                futures.append(
+                    executor.submit(
+                        _write,
+                        memoryview(slab).cast("B"),
+                        data_offset + z * slice_bytes,
+                        slab,
+                    )
+                )
+                z += slab.shape[0]
+
+            for future in futures:
+                future.result()
+
+        if z != nz:
+            raise ValueError(f"Expected {nz} slices but received {z}")
+
+    finally:
+        os.close(fd)
+
+    return statistics.result()
+
+
+def update_header(path: os.PathLike, header: np.ndarray):
+    """Overwrite the header of a file in place, creating the file if needed."""
+    break_links(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        _pwrite_all(fd, memoryview(np.ascontiguousarray(header).tobytes()), 0)
+    finally:
+        os.close(fd)
@@ -0,0 +1,289 @@
+import os
+import numpy as np
+
+from .slabs import (
+    SLAB_BYTES,
+    Shape,
+    VolumeData,
+    as_slabs,
+    break_links,
+    update_header,
+    write_slabs,
+)
+from .stats import VolumeStatistics
+
+from typing import Any, Iterable, NamedTuple, Optional, Tuple
+
+Vector = Tuple[float, float, float]
+
+
+def _header_size(shape: Shape) -> int:
+    _, _, nx = shape
+
+    # The header is made of whole records, each as long as one row of voxels
+    record_bytes = nx * 4
+    n_records = -(-1024 // record_bytes)
+
+    return n_records * record_bytes
+
+
+def file_size(shape: Shape) -> int:
+    """Size in bytes of a float32 SPIDER volume with shape ``(z, y, x)``."""
+    return _header_size(shape) + int(np.prod(shape)) * 4
+
+
+def make_header(
+    shape: Shape,
+    sampling: float = 1.0,
+    origin: Vector = (0.0, 0.0, 0.0),
+    statistics: Optional[VolumeStatistics] = None,
+) -> np.ndarray:
+    """
+    Build a SPIDER volume header for data with shape ``(z, y, x)``.
+
+    The layout matches the one written by ``xmipp_metadata`` so files can be
+    read by both ``xmippLib`` and the ``ImageSpider`` reader.
+    """
+    nz, ny, nx = shape
+    n_bytes = _header_size(shape)
+
+    header = np.zeros(n_bytes // 4, dtype=np.float32)
+
+    # SPIDER uses Fortran indices: word k is stored at header[k - 1]
+    header[0] = nz
+    header[1] = ny
+    header[2] = ny
+    header[4] = 3.0 if nz > 1 else 1.0  # Volume or image
+    header[11] = nx
+    header[12] = n_bytes // (nx * 4)
+    header[20] = 1.0 if sampling == 0.0 else sampling
+    header[21] = n_bytes
+    header[22] = nx * 4
+    header[25] = 1.0  # Number of objects in the file
+    header[17:20] = origin  # XOFF, YOFF and ZOFF (words 18 to 20)
+
+    if statistics is not None:
+        header[5] = 1.0  # The statistics below are up to date
+        header[6] = statistics.maximum
+        header[7] = statistics.minimum
+        header[8] = statistics.mean
+        header[9] = statistics.std
+
+    return header
+
+
+class Header(NamedTuple):
+    shape: Shape
+    offset: int
+    sampling: float
+    dtype: np.dtype
+    origin: Vector  # (x, y, z)
+
+
+def _is_valid_header(words: np.ndarray) -> bool:
+    with np.errstate(all="ignore"):
+        nz, nx, n_bytes = words[0], words[11], words[21]
+
+        return bool(
+            np.isfinite(words[:23]).all()
+            and 0 < nz < 2**24
+            and 0 < nx < 2**24
+            and n_bytes >= 1024
+            and n_bytes == int(n_bytes)
+        )
+
+
+def _read_words(path: os.PathLike) -> np.ndarray:
+    with open(path, "rb") as f:
+        raw = f.read(1024)
+
+    if len(raw) < 1024:
+        raise ValueError(f"File at {path} is too short to be a SPIDER file")
+
+    # Files written on machines with a different byte order have swapped words
+    for dtype in (np.dtype("=f4"), np.dtype("=f4").newbyteorder()):
+        words = np.frombuffer(raw, dtype=dtype)
+        if _is_valid_header(words):
+            return words
+
+    raise ValueError(f"File at {path} does not have a valid SPIDER header")
+
+
+def read_header(path: os.PathLike) -> Header:
+    """Read the shape and data layout of a SPIDER volume from its header."""
+    words = _read_words(path)
+
+    if words[23] != 0:
+        raise ValueError(f"File at {path} is a SPIDER stack, not a volume")
+
+    shape = (int(words[0]), int(words[1]), int(words[11]))
+    origin = tuple(float(o) for o in words[17:20])
+    return Header(shape, int(words[21]), float(words[20]), words.dtype, origin)  # type: ignore
+
+
+def open_memmap(path: os.PathLike) -> np.memmap:
+    """Map the voxels of a SPIDER volume without reading them."""
+    header = read_header(path)
+
+    return np.memmap(
+        path, dtype=header.dtype, mode="r", offset=header.offset, shape=header.shape
+    )
+
+
+def read_region(
+    path: os.PathLike,
+    z: Any = slice(None),
+    y: Any = slice(None),
+    x: Any = slice(None),
+) -> np.ndarray:
+    """
+    Read a sub-box of a SPIDER volume, touching only the pages that hold it.
+
+    ``z``, ``y`` and ``x`` accept anything numpy accepts as an index for the
+    respective axis.
+    """
+    region = open_memmap(path)[z, y, x]
+
+    return np.array(region, dtype=np.float32, copy=True)
+
+
+def write_volume(
+    path: os.PathLike,
+    data: VolumeData,
+    *,
+    shape: Optional[Shape] = None,
+    sampling: float = 1.0,
+    origin: Vector = (0.0, 0.0, 0.0),
+    max_workers: Optional[int] = None,
+) -> VolumeStatistics:
+    """
+    Write a SPIDER volume from an ndarray or from an iterable of z-slabs and
+    return the statistics of its voxels.
+
+    Slabs are written in parallel at their offsets (see
+    :func:`slabs.write_slabs`). When passing slabs, ``shape`` must describe
+    the full ``(z, y, x)`` volume.
+    """
+    slabs, shape = as_slabs(data, shape)
+    header = make_header(shape, sampling, origin)
+
+    statistics = write_slabs(path, header, slabs, shape, np.float32, max_workers)
+    update_header(path, make_header(shape, sampling, origin, statistics))
+
+    return statistics
+
+
+class StackHeader(NamedTuple):
+    shape: Shape  # Shape of a single image, (1, y, x) for 2D images
+    n_images: int
+    offset: int  # Offset of the first image header
+    record_bytes: int  # Size of an image header and its voxels
+    sampling: float
+    dtype: np.dtype
+
+
+def stack_file_size(shape: Shape, n_images: int) -> int:
+    """Size in bytes of a SPIDER stack of ``n_images`` images."""
+    return _header_size(shape) + n_images * file_size(shape)
+
+
+def make_stack_header(
+    shape: Shape, n_images: int, sampling: float = 1.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build the overall header of a SPIDER stack and the header preceding each of
+    its images. ``imgnum`` (word 27) of the image header is set per image.
+    """
+    stack_header = make_header(shape, sampling)
+    stack_header[23] = 2.0  # ISTACK: the file is a stack
+    stack_header[24] = 1.0
+    stack_header[25] = n_images  # MAXIM: highest image number in use
+
+    image_header = make_header(shape, sampling)
+    image_header[23] = 0.0
+    image_header[24] = 1.0
+    image_header[25] = 0.0
+
+    return stack_header, image_header
+
+
+def read_stack_header(path: os.PathLike) -> StackHeader:
+    """Read the image shape and layout of a SPIDER stack."""
+    words = _read_words(path)
+
+    if words[23] == 0:
+        raise ValueError(f"File at {path} is a SPIDER volume, not a stack")
+
+    shape = (int(words[0]), int(words[1]), int(words[11]))
+    header_bytes = int(words[21])
+
+    return StackHeader(
+        shape,  # type: ignore
+        int(words[25]),
+        header_bytes,
+        header_bytes + int(np.prod(shape)) * 4,
+        float(words[20]),
+        words.dtype,
+    )
+
+
+def open_stack_memmap(path: os.PathLike) -> np.ndarray:
+    """
+    Map the images of a SPIDER stack without reading them. The result is
+    indexed as ``(image, z, y, x)``.
+    """
+    header = read_stack_header(path)
+    header_words = (header.record_bytes // 4) - int(np.prod(header.shape))
+
+    records = np.memmap(
+        path,
+        dtype=header.dtype,
+        mode="r",
+        offset=header.offset,
+        shape=(header.n_images, header.record_bytes // 4),
+    )
+
+    # Skip the image headers; the voxels of each image are contiguous so this
+    # stays a view
+    return records[:, header_words:].reshape((header.n_images, *header.shape))
+
+
+def write_stack(
+    path: os.PathLike,
+    images: Iterable[np.ndarray],
+    *,
+    shape: Shape,
+    n_images: int,
+    sampling: float = 1.0,
+):
+    """
+    Write images of the same ``(z, y, x)`` shape to a SPIDER stack.
+
+    Headers and images are written in order through a single buffer, so a
+    stack of many small images takes a handful of sequential writes.
+    """
+    stack_header, image_header = make_stack_header(shape, n_images, sampling)
+
+    break_links(path, keep_contents=False)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    os.ftruncate(fd, stack_file_size(shape, n_images))
+
+    with open(fd, "wb", buffering=SLAB_BYTES) as f:
+        f.write(stack_header.tobytes())
+
+        n_written = 0
+        for image in images:
+            image = np.ascontiguousarray(image, dtype=np.float32)
+            if image.shape not in (shape, shape[1:]) or image.size != np.prod(shape):
+                raise ValueError(
+                    f"Image with shape {image.shape} does not match the stack shape {shape}"
+                )
+
+            image_header[26] = n_written + 1  # IMGNUM
+            f.write(image_header.tobytes())
+            f.write(memoryview(image).cast("B"))
+
+            n_written += 1
+
+    if n_written != n_images:
+        raise ValueError(f"Expected {n_images} images but received {n_written}")
@@ -0,0 +1,164 @@
+import numpy as np
+
+from .proxy import Proxy
+from .array import ArrayConvertable
+from .resolve import current_registry, Registry
+from . import spider, mrc
+
+from typing import Iterator, List, Sequence, Tuple, Union
+
+
+class ImageStack(ArrayConvertable):
+    """
+    Images of the same shape stored in a single file. Images are read lazily
+    by index, so only the pages holding the requested images are touched.
+    """
+
+    def open_memmap(self) -> np.ndarray:
+        raise NotImplementedError
+
+    def _images(self) -> np.ndarray:
+        images = self.open_memmap()
+
+        # 2D images are indexed as (image, y, x)
+        return images[:, 0] if images.shape[1] == 1 else images
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Shape of a single image in the stack."""
+        return self._images().shape[1:]
+
+    def __len__(self) -> int:
+        return self.open_memmap().shape[0]
+
+    def __getitem__(self, key) -> np.ndarray:
+        images = self._images()[key]
+        return np.array(images, dtype=images.dtype.newbyteorder("="))
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_numpy(self) -> np.ndarray:
+        """Return a read-only, memory mapped view of all images."""
+        return self._images()
+
+
+def _validate_images(images: Sequence[np.ndarray]) -> Tuple[int, int, int]:
+    if not images:
+        raise ValueError("Cannot write an empty stack")
+
+    if not all(isinstance(image, np.ndarray) for image in images):
+        raise TypeError("Only lists of ndarrays can be written to a stack")
+
+    shape = images[0].shape
+    if len(shape) not in (2, 3):
+        raise ValueError(f"Expected 2D or 3D images but got shape {shape}")
+
+    for image in images:
+        if image.shape != shape:
+            raise ValueError(
+                f"All images in a stack must have the same shape ({image.shape} != {shape})"
+            )
+
+    return (1, *shape) if len(shape) == 2 else shape  # type: ignore
+
+
+class SpiderStack(Proxy, ImageStack):
+
+    @classmethod
+    def file_ext(cls):
+        return ".stk"
+
+    @classmethod
+    def from_arrays(cls, images: Sequence[np.ndarray], *, sampling: float = 1.0):
+        """Pack arrays of the same shape into a new managed Spider stack."""
+        shape = _validate_images(images)
+
+        new_proxy = cls.new_temporary_proxy(
+            spider.stack_file_size(shape, len(images)), preallocate=True
+        )
+        spider.write_stack(
+            new_proxy.path,
+            images,
+            shape=shape,
+            n_images=len(images),
+            sampling=sampling,
+        )
+
+        return new_proxy
+
+    def header(self) -> spider.StackHeader:
+        return spider.read_stack_header(self.path)
+
+    def open_memmap(self) -> np.ndarray:
+        return spider.open_stack_memmap(self.path)
+
+
+class MRCStack(Proxy, ImageStack):
+    """Proxy for MRC image stacks (``.mrcs``) and stacks of volumes."""
+
+    @classmethod
+    def file_ext(cls):
+        return ".mrcs"
+
+    @classmethod
+    def from_arrays(
+        cls,
+        images: Sequence[np.ndarray],
+        *,
+        voxel_size: Union[float, Tuple[float, float, float]] = 1.0,
+    ):
+        """Pack arrays of the same shape into a new managed MRC stack."""
+        shape = _validate_images(images)
+
+        nz, ny, nx = shape
+
+        new_proxy = cls.new_temporary_proxy(
+            mrc.file_size((len(images) * nz, ny, nx)), preallocate=True
+        )
+        mrc.write_stack(
+            new_proxy.path,
+            images,
+            shape=shape,
+            n_images=len(images),
+            voxel_size=voxel_size,
+        )
+
+        return new_proxy
+
+    def header(self) -> mrc.StackHeader:
+        return mrc.read_stack_header(self.path)
+
+    def open_memmap(self) -> np.ndarray:
+        return mrc.open_stack_memmap(self.path)
+
+
+def resolve_arrays_to_spider_stack(value: List[np.ndarray]) -> SpiderStack:
+    return SpiderStack.from_arrays(value)
+
+
+def resolve_arrays_to_mrc_stack(value: List[np.ndarray]) -> MRCStack:
+    return MRCStack.from_arrays(value)
+
+
+_default_resolver_namespace = Registry._namespace_from_symbol(
+    module=str(__package__),
+    qualname=resolve_arrays_to_spider_stack.__name__,
+    strip_last=True,
+)
+
+current_registry().add_resolver(
+    list,
+    SpiderStack,
+    resolve_arrays_to_spider_stack,
+    namespace=_default_resolver_namespace,
+)
+# Lists resolve to Spider stacks unless MRC is requested explicitly
+current_registry().add_resolver(
+    list,
+    MRCStack,
+    resolve_arrays_to_mrc_stack,
+    namespace=_default_resolver_namespace,
+    weight=1,
+)
@@ -0,0 +1,116 @@
+import os
+import json
+import threading
+import numpy as np
+from pathlib import Path
+from dataclasses import dataclass, asdict
+
+from .cache import fingerprint
+from ..environment.temp_files import STATISTICS_SUFFIX
+
+from typing import Iterable, Optional
+
+
+@dataclass(frozen=True)
+class VolumeStatistics:
+    minimum: float
+    maximum: float
+    mean: float
+    std: float
+    nonzero: int
+    count: int
+
+
+class StatisticsAccumulator:
+    """
+    Combine statistics of slabs processed in any order and on any thread,
+    using the pairwise update for the mean and variance.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.nonzero = 0
+
+    def update(self, slab: np.ndarray):
+        if slab.size == 0:
+            return
+
+        # Reduce outside of the lock; numpy releases the GIL while doing so
+        count = slab.size
+        mean = float(slab.mean(dtype=np.float64))
+        m2 = float(slab.var(dtype=np.float64)) * count
+        minimum, maximum = float(slab.min()), float(slab.max())
+        nonzero = int(np.count_nonzero(slab))
+
+        with self._lock:
+            total = self.count + count
+            delta = mean - self.mean
+
+            self.mean += delta * count / total
+            self.m2 += m2 + delta**2 * self.count * count / total
+            self.count = total
+
+            self.minimum = min(self.minimum, minimum)
+            self.maximum = max(self.maximum, maximum)
+            self.nonzero += nonzero
+
+    def result(self) -> VolumeStatistics:
+        if self.count == 0:
+            return VolumeStatistics(0.0, 0.0, 0.0, 0.0, 0, 0)
+
+        return VolumeStatistics(
+            self.minimum,
+            self.maximum,
+            self.mean,
+            float(np.sqrt(self.m2 / self.count)),
+            self.nonzero,
+            self.count,
+        )
+
+
+def compute_statistics(slabs: Iterable[np.ndarray]) -> VolumeStatistics:
+    accumulator = StatisticsAccumulator()
+    for slab in slabs:
+        accumulator.update(np.asarray(slab))
+
+    return accumulator.result()
+
+
+def sidecar_path(path: os.PathLike) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + STATISTICS_SUFFIX)
+
+
+def write_sidecar(path: os.PathLike, statistics: VolumeStatistics):
+    """Store statistics next to the file they were computed for."""
+    contents = {
+        "fingerprint": fingerprint(path),
+        "statistics": asdict(statistics),
+    }
+
+    with open(sidecar_path(path), "w") as f:
+        json.dump(contents, f)
+
+
+def read_sidecar(path: os.PathLike) -> Optional[VolumeStatistics]:
+    """
+    Read the statistics stored for a file, or ``None`` if there are none or
+    the file changed since they were computed.
+    """
+    try:
+        with open(sidecar_path(path)) as f:
+            contents = json.load(f)
+
+        if tuple(contents["fingerprint"]) != fingerprint(path):
+            return None
+
+        return VolumeStatistics(**contents["statistics"])
+
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
@@ -2,8 +2,11 @@ import numpy as np
 
 from .proxy import Proxy
 from .array import ArrayConvertable
+from . import spider, mrc
+from .slabs import as_slabs, iter_slabs
+from .stats import VolumeStatistics, compute_statistics, read_sidecar, write_sidecar
 
-from xmipp_metadata.image_handler import ImageSpider as _BackendSpiderImage
+from typing import Iterable, Optional, Tuple, Union
 
 
 class VolumeVisualizeable:
@@ -23,22 +26,92 @@ class VolumeVisualizeable:
         plot.display()
 
 
-class SpiderFile(Proxy, ArrayConvertable, VolumeVisualizeable):
+class VolumeMetadata:
+    """
+    Geometry read from the file header and voxel statistics, available without
+    decoding the volume.
+    """
+
+    def header(self):
+        raise NotImplementedError
+
+    def open_memmap(self) -> np.ndarray:
+        raise NotImplementedError
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.header().shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.header().dtype
+
+    @property
+    def sampling(self) -> float:
+        return self.header().sampling
+
+    @property
+    def origin(self) -> Tuple[float, float, float]:
+        return self.header().origin
+
+    def statistics(self) -> VolumeStatistics:
+        """
+        Return min, max, mean, std and the number of nonzero voxels. Files
+        written by ``from_numpy`` have them stored in a sidecar; other files
+        are streamed once.
+        """
+        statistics = read_sidecar(self.path)  # type: ignore
+        if statistics is None:
+            statistics = compute_statistics(iter_slabs(self.open_memmap()))
+
+            # Leave files we don't own untouched
+            if self.managed:  # type: ignore
+                write_sidecar(self.path, statistics)  # type: ignore
+
+        return statistics
+
+
+class SpiderFile(Proxy, ArrayConvertable, VolumeMetadata, VolumeVisualizeable):
 
     @classmethod
     def file_ext(cls):
         return ".vol"
 
     @classmethod
-    def from_numpy(cls, data: np.ndarray):
-        import xmippLib  # type: ignore
+    def from_numpy(
+        cls,
+        data: Union[np.ndarray, Iterable[np.ndarray]],
+        *,
+        shape: Optional[Tuple[int, int, int]] = None,
+        sampling: float = 1.0,
+        origin: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+    ):
+        """
+        Write an array, or an iterable of z-slabs with the given ``shape``, to
+        a new managed Spider file.
+        """
+        slabs, shape = as_slabs(data, shape)
+
+        new_proxy = cls.new_temporary_proxy(spider.file_size(shape), preallocate=True)
+        statistics = spider.write_volume(
+            new_proxy.path, slabs, shape=shape, sampling=sampling, origin=origin
+        )
+        write_sidecar(new_proxy.path, statistics)
+
+        return new_proxy
 
-        new_proxy = cls.new_temporary_proxy()
+    def header(self) -> spider.Header:
+        return spider.read_header(self.path)
 
-        volume = _BackendSpiderImage()
-        volume.write(data, filename=str(new_proxy.path))
+    def open_memmap(self) -> np.ndarray:
+        return spider.open_memmap(self.path)
 
-        return new_proxy
+    def read_region(self, z=slice(None), y=slice(None), x=slice(None)) -> np.ndarray:
+        """Read a sub-box of the volume without loading the whole file."""
+        return spider.read_region(self.path, z, y, x)
+
+    def __getitem__(self, key) -> np.ndarray:
+        return np.array(spider.open_memmap(self.path)[key], dtype=np.float32)
 
     def to_numpy(self):
         import xmippLib  # type: ignore
@@ -47,7 +120,73 @@ class SpiderFile(Proxy, ArrayConvertable, VolumeVisualizeable):
         return np.array(volume.getData().astype(np.float32), copy=True)
 
     def get_volume_data(self) -> np.ndarray:
-        return self.to_numpy()
+        return self.cached_numpy()
+
+
+class MRCFile(Proxy, ArrayConvertable, VolumeMetadata, VolumeVisualizeable):
+    """
+    Proxy for MRC/CCP4 maps. Voxels are memory mapped, so maps can be
+    inspected and cropped without loading them.
+    """
+
+    # Arrays resolve to Spider files unless MRC is requested explicitly
+    array_resolver_weight = 1
+
+    @classmethod
+    def file_ext(cls):
+        return ".mrc"
+
+    @classmethod
+    def from_numpy(
+        cls,
+        data: Union[np.ndarray, Iterable[np.ndarray]],
+        *,
+        shape: Optional[Tuple[int, int, int]] = None,
+        voxel_size: Union[float, Tuple[float, float, float]] = 1.0,
+        origin: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+    ):
+        """
+        Write an array, or an iterable of z-slabs with the given ``shape``, to
+        a new managed MRC file.
+        """
+        slabs, shape = as_slabs(data, shape)
+
+        new_proxy = cls.new_temporary_proxy(mrc.file_size(shape), preallocate=True)
+        statistics = mrc.write_volume(
+            new_proxy.path, slabs, shape=shape, voxel_size=voxel_size, origin=origin
+        )
+        write_sidecar(new_proxy.path, statistics)
+
+        return new_proxy
+
+    def header(self) -> mrc.Header:
+        return mrc.read_header(self.path)
+
+    def open_memmap(self) -> np.ndarray:
+        return mrc.open_memmap(self.path)
+
+    def read_region(self, z=slice(None), y=slice(None), x=slice(None)) -> np.ndarray:
+        """Read a sub-box of the map without loading the whole file."""
+        return mrc.read_region(self.path, z, y, x)
+
+    def __getitem__(self, key) -> np.ndarray:
+        region = mrc.open_memmap(self.path)[key]
+        return np.array(region, dtype=region.dtype.newbyteorder("="))
+
+    def to_numpy(self) -> np.ndarray:
+        """Return a read-only, memory mapped view of the voxels."""
+        return mrc.open_memmap(self.path)
+
+    def get_volume_data(self) -> np.ndarray:
+        return self.cached_numpy()
+
+
+class MapFile(MRCFile):
+    """MRC/CCP4 map with the ``.map`` extension used by EMDB."""
+
+    @classmethod
+    def file_ext(cls):
+        return ".map"
 
 
 if __name__ == "__main__":
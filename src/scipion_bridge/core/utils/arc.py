@@ -1,77 +1,295 @@
 import os
-from typing import Dict
+import sys
+import struct
+import threading
+from typing import Dict, Set
 import warnings
 from pathlib import Path
 
 from dependency_injector.wiring import Provide, inject
 from ..environment.container import Container
-from ..environment.temp_files import TemporaryFilesProvider
+from ..environment.temp_files import TemporaryFilesProvider, REFERENCES_SUFFIX
+from ..environment.deleter import BackgroundDeleter
+from ..environment.budget import ScratchBudget, ScratchMetrics
 
 from typing import Optional
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # Not available on Windows; files can't be shared with other processes
+    # there, but everything else works
+    fcntl = None  # type: ignore
+
+# Number of locks guarding the counts; paths are spread over them by hash so
+# threads releasing different files rarely contend
+N_LOCK_STRIPES = 64
+
+
+def _key(path: os.PathLike) -> str:
+    # Interned strings hash once and compare by identity, which is much cheaper
+    # than hashing and comparing Path objects on every update
+    return sys.intern(os.fspath(path))
+
+
+def _require_flock():
+    if fcntl is None:
+        raise NotImplementedError(
+            "Sharing managed files with other processes requires flock, which is not available on this platform"
+        )
+
+
+def update_shared_count(path: os.PathLike, delta: int, initial: int = 0) -> int:
+    """
+    Add ``delta`` to the number of processes holding a file and return the new
+    count. The count is kept next to the file and locked with ``flock``, so it
+    can be updated from any process on the host.
+    """
+    _require_flock()
+
+    fd = os.open(f"{os.fspath(path)}{REFERENCES_SUFFIX}", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+
+        data = os.pread(fd, 8, 0)
+        count = struct.unpack("<q", data)[0] if len(data) == 8 else initial
+        count += delta
+
+        os.pwrite(fd, struct.pack("<q", count), 0)
+        return count
+    finally:
+        os.close(fd)  # Releases the lock
+
 
 class FileReferenceCounter:
 
     def __init__(self) -> None:
-        self.references: Dict[os.PathLike, int] = {}
+        self.references: Dict[str, int] = {}
+
+        # Files moved while referenced; proxies still holding the old path
+        # release the moved file. Chains are collapsed, so every old path maps
+        # to the current one, and dropped once that file is released
+        self._moved: Dict[str, str] = {}
+        self._moved_from: Dict[str, Set[str]] = {}
+        self._moves_lock = threading.Lock()
+
+        # Files shared with other processes; the process's own references
+        # count as one in the shared count
+        self._shared: Set[str] = set()
+
+        self._locks = [threading.Lock() for _ in range(N_LOCK_STRIPES)]
+
+    def _lock(self, key: str) -> threading.Lock:
+        return self._locks[hash(key) % N_LOCK_STRIPES]
+
+    def _resolve(self, key: str) -> str:
+        return self._moved.get(key, key)
+
+    def _record_move(self, key: str, new_key: str):
+        with self._moves_lock:
+            # Files kept by nested arenas may be moved several times; point the
+            # earlier paths straight at the new one
+            old_keys = self._moved_from.pop(key, set())
+            old_keys.add(key)
+            old_keys.discard(new_key)
+
+            self._moved.pop(new_key, None)
+            for old_key in old_keys:
+                self._moved[old_key] = new_key
+
+            if old_keys:
+                self._moved_from[new_key] = old_keys
+
+    def _forget_moves(self, key: str):
+        with self._moves_lock:
+            for old_key in self._moved_from.pop(key, ()):
+                self._moved.pop(old_key, None)
 
     def new_managed_file(
         self,
         file_ext: Optional[str],
+        expected_size: Optional[int] = None,
+        preallocate: bool = False,
         temp_file_provider: TemporaryFilesProvider = Provide[
             Container.temp_file_provider
         ],
     ) -> Path:
 
-        new_path = temp_file_provider.new_temporary_file(file_ext)
+        new_path = temp_file_provider.new_temporary_file(
+            file_ext, expected_size=expected_size, preallocate=preallocate
+        )
         assert isinstance(new_path, Path)
 
-        self.references[new_path] = 1
+        key = _key(new_path)
+        with self._lock(key):
+            self.references[key] = 1
 
         return new_path
 
     def add_reference(self, path: os.PathLike):
-        if path not in self.references:
-            self.references[path] = 1
+        key = _key(path)
+
+        with self._lock(key):
+            count = self.references.get(key, 0)
+            self.references[key] = count + 1
+
+        if count == 0:
             warnings.warn(
                 "Counting references for non-temporary files is deprecated (these files are most likely created by the user at a persistent location, so reference counting would delete them)",
                 DeprecationWarning,
             )
-        else:
-            count = self.references[path]
-            self.references[path] = count + 1
+
+    def remove_reference(self, path: os.PathLike):
+        key = self._resolve(_key(path))
+        path = Path(key)
+
+        with self._lock(key):
+            assert (
+                key in self.references
+            ), f"Path {path} not managed by automatic reference counting"
+            count = self.references[key]
+
+            if count > 1:
+                self.references[key] = count - 1
+                return
+
+            del self.references[key]
+            self._forget_moves(key)
+
+            shared = key in self._shared
+            if not shared:
+                # Hand the file to the deleter while holding the lock so a new
+                # reference to the same path can't be added in between
+                self._delete(path)
+                return
+
+            self._shared.discard(key)
+
+        # The shared count is locked on disk, which would hold up every path on
+        # the stripe. Processes adopting the file meanwhile hold a reference in
+        # the count, so it only drops to zero once nobody uses the file.
+        if update_shared_count(path, -1) > 0:
+            return  # Still used by other processes
+
+        self._delete(path)
+
+    def share(self, path: os.PathLike):
+        """
+        Take a reference on behalf of another process before handing the file
+        over. The caller must hold a reference while sharing, and the receiving
+        process must :meth:`adopt` it exactly once.
+        """
+        _require_flock()
+        key = self._resolve(_key(path))
+
+        with self._lock(key):
+            assert (
+                key in self.references
+            ), f"Path {path} not managed by automatic reference counting"
+
+            self._shared.add(key)
+
+        # This process holds the file, so a count that doesn't exist yet starts
+        # with its own references
+        update_shared_count(key, 1, initial=1)
+
+    def adopt(self, path: os.PathLike):
+        """Take over a reference shared by another process with :meth:`share`."""
+        key = self._resolve(_key(path))
+
+        with self._lock(key):
+            if key in self.references:
+                # The process holds the file already, so the shared reference
+                # is redundant; the count can't drop to zero here. This stays
+                # under the lock, so the process's own references can't be
+                # released from the count in between.
+                update_shared_count(key, -1)
+                self.references[key] += 1
+            else:
+                self.references[key] = 1
+                self._shared.add(key)
+
+    @inject
+    def move(
+        self,
+        path: os.PathLike,
+        new_path: os.PathLike,
+        temp_file_provider: TemporaryFilesProvider = Provide[
+            Container.temp_file_provider
+        ],
+    ):
+        """Transfer the references of a file that was renamed to ``new_path``."""
+        key, new_key = _key(path), _key(new_path)
+
+        # Take both locks in a fixed order so concurrent moves can't deadlock
+        locks = sorted(
+            {self._lock(key), self._lock(new_key)}, key=lambda l: self._locks.index(l)
+        )
+        for lock in locks:
+            lock.acquire()
+
+        try:
+            assert (
+                key in self.references
+            ), f"Path {path} not managed by automatic reference counting"
+
+            self.references[new_key] = self.references.pop(key)
+            self._record_move(key, new_key)
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+        temp_file_provider.moved(path, new_path)
 
     @inject
-    def remove_reference(
+    def _delete(
         self,
         path: os.PathLike,
         temp_file_provider: TemporaryFilesProvider = Provide[
             Container.temp_file_provider
         ],
+        deleter: BackgroundDeleter = Provide[Container.deleter],
     ):
-        assert (
-            path in self.references
-        ), f"Path {path} not managed by automatic reference counting"
-        count = self.references[path]
+        # Unlinking large files can take a while; keep it off the thread
+        # releasing the reference
+        deleter.submit(path, temp_file_provider)
+
+    @inject
+    def wait_for_deletions(
+        self,
+        timeout: Optional[float] = None,
+        deleter: BackgroundDeleter = Provide[Container.deleter],
+    ) -> bool:
+        """Block until all released files are deleted."""
+        return deleter.wait(timeout)
+
+    @inject
+    def scratch_metrics(
+        self, budget: ScratchBudget = Provide[Container.scratch_budget]
+    ) -> ScratchMetrics:
+        """Live and peak bytes and file counts of the managed files."""
+        return budget.metrics()
 
-        if count > 1:
-            self.references[path] = count - 1
-        else:
-            temp_file_provider.delete(path)
-            del self.references[path]
+    def current_path(self, path: os.PathLike) -> Path:
+        """Path a managed file was moved to, or ``path`` if it wasn't moved."""
+        key = _key(path)
+        new_key = self._resolve(key)
+
+        return Path(new_key) if new_key is not key else Path(path)
 
     def is_tracked(self, path: os.PathLike):
-        return path in self.references
+        return self._resolve(_key(path)) in self.references
 
     def get_count(self, path: os.PathLike):
-        if not self.is_tracked(path):
+        count = self.references.get(self._resolve(_key(path)), 0)
+
+        if count == 0:
             warnings.warn(
                 "Reference count requested for untracked path {path}; returned 0",
                 UserWarning,
             )
-            return 0
-        else:
-            return self.references[path]
+
+        return count
 
     def _print_reference_count(self):  # pragma: no cover
         from tabulate import tabulate
@@ -0,0 +1,52 @@
+from contextlib import contextmanager
+
+from ..environment.temp_files import Arena, _current_arena
+from ..utils.arc import manager as arc_manager
+
+from typing import Iterator, TypeVar, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..typed.proxy import Proxy
+
+P = TypeVar("P", bound="Proxy")
+
+
+class ArenaScope:
+    """Handle to an active arena, returned by :func:`arena`."""
+
+    def __init__(self, arena: Arena) -> None:
+        self._arena = arena
+
+    def keep(self, proxy: P) -> P:
+        """
+        Move the file of ``proxy`` out of the arena so it outlives the scope.
+        Other proxies for the same file follow it to the new path.
+        """
+        if not proxy.managed or not self._arena.owns(proxy.path):
+            return proxy
+
+        new_path = self._arena.move_out(proxy.path)
+        arc_manager.move(proxy.path, new_path)
+        proxy._relocate(new_path)
+
+        return proxy
+
+
+@contextmanager
+def arena() -> Iterator[ArenaScope]:
+    """
+    Create all temporary files in a scoped directory that is removed as a whole
+    when the block exits, including crashes. Results that must survive the
+    block are passed to :meth:`ArenaScope.keep`.
+
+    Arenas nest and are tracked per context, so threads started inside the
+    block do not allocate in it.
+    """
+    scope = Arena(parent=_current_arena.get())
+    token = _current_arena.set(scope)
+
+    try:
+        yield ArenaScope(scope)
+    finally:
+        _current_arena.reset(token)
+        scope.close()
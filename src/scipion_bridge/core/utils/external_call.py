@@ -1,6 +1,7 @@
 import os
 import sys
 import re
+import shutil
 from dataclasses import dataclass
 from subprocess import Popen, PIPE
 from dependency_injector import containers, providers
@@ -8,11 +9,12 @@ from dependency_injector.wiring import Provide, inject
 
 from ..environment.container import Container
 from ..environment.cmd_exec import ShellExecProvider
+from ..environment.scipion_env import ScipionEnvironment
 
 import ast
 import inspect
 import autopep8
-from typing import Dict, Any, Callable, Set, List
+from typing import Dict, Any, Callable, Iterable, Set, List, Tuple
 
 import itertools
 import functools
@@ -21,11 +23,79 @@ from functools import partial
 from .func_params import extract_func_params
 
 
+class Words(str):
+    """
+    Value made of several command line words, such as a resolved tuple. It
+    reads as the words joined by spaces, but programs started without a shell
+    receive every word as an argument of its own.
+    """
+
+    words: Tuple[str, ...]
+
+    def __new__(cls, words: Iterable[str]):
+        words = tuple(words)
+
+        self = super().__new__(cls, " ".join(words))
+        self.words = words
+        return self
+
+    def __reduce__(self):
+        # Copies and pickles are created from the words, not the joined string
+        return (type(self), (self.words,))
+
+
+def _value_to_cmd_args(value: Any, split_values: bool) -> List[str]:
+    if not split_values:
+        return [str(value)]
+
+    # Without a shell, every string is passed as a single word, even if it
+    # holds spaces or quotes
+    if isinstance(value, Words):
+        return list(value.words)
+    elif isinstance(value, (tuple, list)):
+        return [str(v) for v in value]
+    else:
+        return [str(value)]
+
+
 @dataclass
 class Domain:
     name: str
     command: List[str]
 
+    # Run programs directly in the environment ``command`` sets up for them,
+    # instead of starting them through it
+    direct: bool = False
+
+
+@inject
+def _program_command(
+    domain: Domain,
+    func_name: str,
+    run_args: Dict[str, Any],
+    scipion_env: ScipionEnvironment = Provide[Container.scipion_env],
+) -> Tuple[List[str], Dict[str, Any]]:
+    if not (domain.direct or scipion_env.direct):
+        return domain.command + [func_name], run_args
+
+    command, environment = scipion_env.command(domain.command, func_name)
+    if environment is not None:
+        run_args = {**run_args, "env": environment}
+
+    return command, run_args
+
+
+@inject
+def _program_binary(
+    domain: Domain,
+    func_name: str,
+    scipion_env: ScipionEnvironment = Provide[Container.scipion_env],
+) -> str:
+    # Programs started through the launcher are looked up in its environment
+    # too, so a changed installation is noticed
+    command, _ = scipion_env.command(domain.command, func_name)
+    return shutil.which(command[0]) or command[0]
+
 
 def _func_is_empty(func):
 
@@ -45,7 +115,11 @@ def _func_is_empty(func):
 
 
 def _param_to_cmd_args(
-    param: inspect.Parameter, value: Any, args_map, boolean_params: Set[str]
+    param: inspect.Parameter,
+    value: Any,
+    args_map,
+    boolean_params: Set[str],
+    split_values: bool = False,
 ):
 
     k = param.name
@@ -60,7 +134,7 @@ def _param_to_cmd_args(
         is_keyword = param.kind == inspect.Parameter.KEYWORD_ONLY
         prefix = "--" if is_keyword else "-"
 
-        return [prefix + param.name, str(value)]
+        return [prefix + param.name, *_value_to_cmd_args(value, split_values)]
 
 
 def foreign_function(
@@ -111,19 +185,15 @@ def foreign_function(
     if boolean_params.intersection(pos_args):
         raise RuntimeError("Positional arguments cannot be declared as boolean flags")
 
-    run_args.setdefault("shell", True)
+    # Programs are started directly from argv; a shell is only used on request
+    run_args.setdefault("shell", False)
+    split_values = not run_args["shell"]
     # run_args["stdout"]=PIPE
     run_args["stderr"] = PIPE
 
     args_validation = {k: re.compile(v) for k, v in args_validation.items()}
 
-    @functools.wraps(f)
-    @inject
-    def wrapper(
-        *args,
-        __scipion_bridge_runner__: ShellExecProvider = Provide[Container.shell_exec],
-        **kwargs,
-    ):
+    def _command(args, kwargs) -> Tuple[List[str], Dict[str, Any]]:
         _ = f(
             *args, **kwargs
         )  # Call function for Python to throw error if args and kwargs aren't passed correctly
@@ -146,15 +216,45 @@ def foreign_function(
                 )
 
         raw_args = [
-            _param_to_cmd_args(p, v, args_map, boolean_params)
+            _param_to_cmd_args(p, v, args_map, boolean_params, split_values)
             for p, v in merged_args.items()
         ]
         if postprocess_fn is not None:
             raw_args = postprocess_fn(raw_args)
 
         raw_args = itertools.chain.from_iterable(raw_args)
-        raw_args = domain.command + [func_name, *raw_args]
 
-        return __scipion_bridge_runner__(func_name, domain, raw_args, run_args)
+        command, call_run_args = _program_command(domain, func_name, run_args)
+        return command + [*raw_args], call_run_args
+
+    @functools.wraps(f)
+    @inject
+    def wrapper(
+        *args,
+        __scipion_bridge_runner__: ShellExecProvider = Provide[Container.shell_exec],
+        **kwargs,
+    ):
+        raw_args, call_run_args = _command(args, kwargs)
+        return __scipion_bridge_runner__(func_name, domain, raw_args, call_run_args)
+
+    @inject
+    async def run_async(
+        *args,
+        __scipion_bridge_runner__: ShellExecProvider = Provide[Container.shell_exec],
+        **kwargs,
+    ):
+        """Awaitable variant of the program; cancelling it kills the program."""
+        raw_args, call_run_args = _command(args, kwargs)
+        return await __scipion_bridge_runner__.run_async(
+            func_name, domain, raw_args, call_run_args
+        )
+
+    def command(*args, **kwargs) -> List[str]:
+        """Command line the program is started with for the given arguments."""
+        return _command(args, kwargs)[0]
+
+    wrapper.run_async = run_async  # type: ignore
+    wrapper.command = command  # type: ignore
+    wrapper.binary = partial(_program_binary, domain, func_name)  # type: ignore
 
     return wrapper
@@ -0,0 +1,267 @@
+import queue
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from enum import Enum
+
+from dependency_injector.wiring import Provide, inject
+from ..environment.container import Container
+from ..environment.executor import CallExecutor
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class NodeState(Enum):
+    PENDING = "pending"  # Not needed (yet)
+    WANTED = "wanted"  # Needed, waiting for its inputs
+    RUNNING = "running"
+    DONE = "done"
+    FREED = "freed"  # Done, but the result was released after its last use
+
+
+# Returned by restore functions if the outputs were not in the cache
+NOT_RESTORED = object()
+
+
+class Node:
+    """
+    Deferred call in a :class:`Pipeline`. Nodes are passed to later calls in
+    place of their outputs; :meth:`result` returns the outputs once the
+    pipeline ran.
+    """
+
+    __slots__ = (
+        "_run",
+        "_restore",
+        "args",
+        "kwargs",
+        "key",
+        "name",
+        "dependencies",
+        "consumers",
+        "state",
+        "kept",
+        "_result",
+        "_unfinished_consumers",
+        "_pipeline",
+    )
+
+    def __init__(
+        self,
+        pipeline: "Pipeline",
+        run: Callable[..., Any],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        key: Optional[str] = None,
+        restore: Optional[Callable[[], Any]] = None,
+        name: str = "",
+    ) -> None:
+        self._pipeline = pipeline
+        self._run = run
+        self._restore = restore
+        self.args = args
+        self.kwargs = kwargs
+        self.key = key
+        self.name = name
+
+        values = [*args, *kwargs.values()]
+        self.dependencies = list(
+            {id(v): v for v in values if isinstance(v, Node)}.values()
+        )
+        self.consumers: List[Node] = []
+        for dependency in self.dependencies:
+            dependency.consumers.append(self)
+
+        self.state = NodeState.PENDING
+        self.kept = False
+
+        self._result: Any = None
+        self._unfinished_consumers = 0
+
+    def __getitem__(self, index: int) -> "Node":
+        """Node for one of several outputs of the call."""
+        key = f"{self.key}[{index}]" if self.key is not None else None
+        return self._pipeline.add(
+            lambda outputs: outputs[index],
+            (self,),
+            {},
+            key=key,
+            name=f"{self.name}[{index}]",
+        )
+
+    def keep(self) -> "Node":
+        """Keep the result of an intermediate node after the pipeline ran."""
+        self.kept = True
+        return self
+
+    def result(self) -> Any:
+        if self.state == NodeState.FREED:
+            raise RuntimeError(
+                f"Result of intermediate node {self.name} was released; call keep() to retain it"
+            )
+        if self.state != NodeState.DONE:
+            raise RuntimeError(f"Node {self.name} has not run yet")
+
+        return self._result
+
+    def __repr__(self) -> str:
+        return f"Node({self.name}, {self.state.value})"
+
+
+def _materialize(value):
+    return value.result() if isinstance(value, Node) else value
+
+
+class Pipeline:
+    """
+    Graph of deferred calls, run with :meth:`run` in topological order on the
+    call executor. Calls that don't depend on each other run in parallel.
+
+    Results of intermediate nodes are released as soon as their last consumer
+    finished, so their files are deleted while the pipeline still runs. Nodes
+    whose outputs are in the call cache are restored from it instead of run,
+    and the nodes only they consume are skipped altogether.
+    """
+
+    def __init__(self) -> None:
+        self.nodes: List[Node] = []
+
+    def add(
+        self,
+        run: Callable[..., Any],
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        key: Optional[str] = None,
+        restore: Optional[Callable[[], Any]] = None,
+        name: str = "",
+    ) -> Node:
+        node = Node(self, run, args, kwargs, key, restore, name)
+        self.nodes.append(node)
+
+        return node
+
+    def _is_output(self, node: Node) -> bool:
+        return node.kept or not node.consumers
+
+    @inject
+    def run(self, executor: CallExecutor = Provide[Container.executor]):
+        """Run every node whose result is needed."""
+        completed: "queue.Queue[Tuple[Node, bool, Any]]" = queue.Queue()
+        n_running = 0
+        error: Optional[BaseException] = None
+
+        # Nodes run in the context of the caller, e.g. its arena, which worker
+        # threads don't inherit
+        context = copy_context()
+
+        def _submit(node: Node, fn: Callable[[], Any], restoring: bool):
+            nonlocal n_running
+
+            def _task():
+                try:
+                    completed.put((node, restoring, fn()))
+                except BaseException as e:
+                    completed.put((node, restoring, e))
+
+            node.state = NodeState.RUNNING
+            n_running += 1
+            # A context can only be entered by one thread at a time
+            executor.submit(context.copy().run, _task)
+
+        def _start_if_ready(node: Node):
+            if node.state == NodeState.WANTED and all(
+                d.state == NodeState.DONE for d in node.dependencies
+            ):
+                args = tuple(_materialize(v) for v in node.args)
+                kwargs = {k: _materialize(v) for k, v in node.kwargs.items()}
+                _submit(node, lambda: node._run(*args, **kwargs), restoring=False)
+
+        def _demand(node: Node):
+            if node.state == NodeState.FREED:
+                # Needed again by a node that could not be restored after all
+                node.state = NodeState.PENDING
+
+            if node.state != NodeState.PENDING:
+                return
+
+            node.state = NodeState.WANTED
+            if node._restore is not None:
+                _submit(node, node._restore, restoring=True)
+                return
+
+            for dependency in node.dependencies:
+                dependency._unfinished_consumers += 1
+                _demand(dependency)
+
+            _start_if_ready(node)
+
+        def _release_inputs(node: Node):
+            for dependency in node.dependencies:
+                dependency._unfinished_consumers -= 1
+                if dependency._unfinished_consumers == 0 and not self._is_output(
+                    dependency
+                ):
+                    logging.debug(f"Releasing result of {dependency.name}")
+                    dependency._result = None
+                    dependency.state = NodeState.FREED
+
+        for node in self.nodes:
+            if self._is_output(node):
+                _demand(node)
+
+        while n_running > 0:
+            node, restoring, value = completed.get()
+            n_running -= 1
+
+            if isinstance(value, BaseException):
+                # Let running calls finish, but don't start new ones
+                error = error or value
+                node.state = NodeState.PENDING
+                continue
+
+            if restoring and value is NOT_RESTORED:
+                # Evicted from the cache after all; run the node instead
+                node.state = NodeState.PENDING
+                node._restore = None
+                _demand(node)
+                continue
+
+            node._result = value
+            node.state = NodeState.DONE
+
+            if not restoring:
+                _release_inputs(node)
+
+            if error is None:
+                for consumer in node.consumers:
+                    _start_if_ready(consumer)
+
+        if error is not None:
+            raise error
+
+
+_current_pipeline: ContextVar[Optional[Pipeline]] = ContextVar(
+    "scipion_bridge_pipeline", default=None
+)
+
+
+def current_pipeline() -> Optional[Pipeline]:
+    return _current_pipeline.get()
+
+
+@contextmanager
+def pipeline() -> Iterator[Pipeline]:
+    """
+    Defer calls of proxified functions inside the block. Calls return
+    :class:`Node` objects instead of outputs, and the graph they build is run
+    when the block exits.
+    """
+    graph = Pipeline()
+    token = _current_pipeline.set(graph)
+
+    try:
+        yield graph
+    finally:
+        _current_pipeline.reset(token)
+
+    graph.run()
@@ -7,6 +7,9 @@ from ..core.utils.external_call import foreign_function, Domain
 from ..core.typed.proxy import proxify, Proxy, Output, ProxyParam
 from ..core.typed.array import ArrayConvertable
 from ..core.typed.resolve import Resolve
+from ..core.typed import spider
+
+from typing import Any, Dict, Optional
 
 # from ..typed.volume import SpiderFile
 
@@ -41,6 +44,13 @@ xmipp_func = partial(foreign_function, domain=Domain("XMIPP", ["scipion", "run"]
 #     pass
 
 
+def _pdb_volume_size(arguments: Dict[str, Any]) -> Optional[int]:
+    # The program writes a cubic SPIDER volume of --size voxels per side next
+    # to the output path
+    size = arguments.get("size")
+    return spider.file_size((int(size),) * 3) if size is not None else None
+
+
 @proxify
 @partial(
     xmipp_func,
@@ -48,7 +58,7 @@ xmipp_func = partial(foreign_function, domain=Domain("XMIPP", ["scipion", "run"]
 )
 def xmipp_volume_from_pdb(
     inputs: str,
-    outputs: Resolve[Proxy, Output] = Output(Proxy),
+    outputs: Resolve[Proxy, Output] = Output(Proxy, size_hint=_pdb_volume_size),
     *,
     center_pdb: str,
     sampling: float,
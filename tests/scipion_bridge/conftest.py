@@ -0,0 +1,30 @@
+from scipion_bridge.core.environment.container import Container
+
+import pytest
+
+# Modules creating and releasing managed files
+PROXY_MODULES = ["scipion_bridge.core.typed.proxy", "scipion_bridge.core.utils.arc"]
+
+
+@pytest.fixture
+def wire_container(request):
+    """
+    Create containers wired into the test module and the proxy modules, with
+    optional configuration and extra modules to wire.
+    """
+
+    def _wire(config=None, modules=()) -> Container:
+        container = Container()
+        if config is not None:
+            container.config.from_dict(config)
+
+        container.wire(modules=[request.module, *PROXY_MODULES, *modules])
+        return container
+
+    return _wire
+
+
+@pytest.fixture
+def container(tmp_path, wire_container) -> Container:
+    """Container keeping temporary files in the temporary directory of the test."""
+    return wire_container({"temp_files": {"fast_dir": "", "bulk_dir": str(tmp_path)}})
@@ -12,7 +12,9 @@ class TempFileMock:
     def __init__(self):
         self.count = 0
 
-    def new_temporary_file(self, suffix: str) -> os.PathLike:
+    def new_temporary_file(
+        self, suffix: str, expected_size=None, preallocate=False
+    ) -> os.PathLike:
         file = f"/tmp/temp_file_{self.count}{suffix}"
         self.count += 1
 
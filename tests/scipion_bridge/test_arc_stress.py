@@ -0,0 +1,151 @@
+import os
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from scipion_bridge.core.utils.arc import FileReferenceCounter
+from scipion_bridge.core.utils.arc import manager as arc_manager
+from scipion_bridge.core.typed.proxy import Proxy
+
+import pytest
+
+N_THREADS = 16
+
+
+class TempFileMock:
+
+    def __init__(self):
+        self.count = 0
+        self.deleted = []
+        self._lock = threading.Lock()
+
+    def new_temporary_file(
+        self, suffix: str, expected_size=None, preallocate=False
+    ) -> os.PathLike:
+        with self._lock:
+            file = f"/tmp/temp_file_{self.count}{suffix}"
+            self.count += 1
+
+        return Path(file)
+
+    def delete(self, path: os.PathLike):
+        self.deleted.append(os.fspath(path))
+
+
+@pytest.fixture(autouse=True)
+def frequent_thread_switches():
+    # Switch threads as often as possible to make races show up
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
+
+
+@pytest.fixture
+def temp_file_mock(container):
+    temp_file_mock = TempFileMock()
+    with container.temp_file_provider.override(temp_file_mock):
+        yield temp_file_mock
+
+    # Deletions may still be in flight in the background
+    container.deleter().wait()
+
+
+def _run_threads(target, n_threads=N_THREADS):
+    barrier = threading.Barrier(n_threads)
+
+    def _run(i):
+        barrier.wait()
+        target(i)
+
+    threads = [threading.Thread(target=_run, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_shared_file(temp_file_mock):
+    manager = FileReferenceCounter()
+    path = manager.new_managed_file(".vol")
+
+    def _add_and_remove(_):
+        for _ in range(2000):
+            manager.add_reference(path)
+            manager.remove_reference(Path(path))
+
+    _run_threads(_add_and_remove)
+
+    assert manager.get_count(path) == 1
+    assert manager.wait_for_deletions()
+    assert temp_file_mock.deleted == []
+
+    manager.remove_reference(path)
+    assert manager.wait_for_deletions()
+    assert temp_file_mock.deleted == [os.fspath(path)]
+
+
+def test_concurrent_release(temp_file_mock):
+    manager = FileReferenceCounter()
+    paths = [manager.new_managed_file(".vol") for _ in range(200)]
+
+    for path in paths:
+        for _ in range(N_THREADS - 1):
+            manager.add_reference(path)
+
+    # Every thread releases one reference to every file
+    _run_threads(lambda _: [manager.remove_reference(p) for p in paths])
+
+    assert manager.wait_for_deletions()
+
+    deleted = Counter(temp_file_mock.deleted)
+    assert set(deleted) == {os.fspath(p) for p in paths}
+    assert set(deleted.values()) == {1}
+    assert manager.references == {}
+
+
+def test_interleaved_files(temp_file_mock):
+    manager = FileReferenceCounter()
+
+    def _churn(_):
+        for _ in range(500):
+            path = manager.new_managed_file(".vol")
+            manager.add_reference(path)
+            manager.remove_reference(path)
+            manager.remove_reference(path)
+
+    _run_threads(_churn)
+
+    assert manager.wait_for_deletions()
+
+    deleted = Counter(temp_file_mock.deleted)
+    assert len(deleted) == N_THREADS * 500
+    assert set(deleted.values()) == {1}
+    assert manager.references == {}
+
+
+def test_proxies_on_thread_pool(temp_file_mock):
+    class Volume(Proxy):
+        @classmethod
+        def file_ext(cls):
+            return ".vol"
+
+    volumes = [Volume.new_temporary_proxy() for _ in range(100)]
+    paths = [os.fspath(v.path) for v in volumes]
+
+    # Share each file between proxies on different threads
+    def _copy(volume):
+        return [Volume(volume.path, managed=True) for _ in range(8)]
+
+    with ThreadPoolExecutor(N_THREADS) as executor:
+        copies = list(executor.map(_copy, volumes))
+
+    del volumes
+
+    with ThreadPoolExecutor(N_THREADS) as executor:
+        executor.map(lambda c: c.clear(), copies)
+
+    assert arc_manager.wait_for_deletions()
+    assert Counter(temp_file_mock.deleted) == Counter(paths)
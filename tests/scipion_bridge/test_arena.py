@@ -0,0 +1,126 @@
+import os
+import socket
+import numpy as np
+
+import scipion_bridge
+from scipion_bridge.core.environment.dedup import ContentStore
+from scipion_bridge.core.environment.temp_files import (
+    TemporaryFilesProvider,
+    scratch_directory,
+    sweep_stale_directories,
+)
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.utils.arc import manager as arc_manager
+
+import pytest
+
+pytestmark = pytest.mark.usefixtures("container")
+
+
+def test_arena_removed_at_exit(tmp_path):
+    with scipion_bridge.arena():
+        volume = SpiderFile.from_numpy(np.zeros([4, 4, 4], dtype=np.float32))
+        arena_dir = volume.path.parent
+
+        assert arena_dir.parent == scratch_directory(str(tmp_path)).path
+        assert volume.path.exists()
+
+    assert not arena_dir.exists()
+
+    # Releasing the proxy after the arena is gone is harmless
+    del volume
+    assert arc_manager.wait_for_deletions(timeout=5.0)
+
+
+def test_keep_result(tmp_path):
+    with scipion_bridge.arena() as scope:
+        intermediate = SpiderFile.from_numpy(np.ones([4, 4, 4], dtype=np.float32))
+        result = scope.keep(
+            SpiderFile.from_numpy(np.full([4, 4, 4], 2, dtype=np.float32))
+        )
+
+        stale = SpiderFile(intermediate.path, managed=True)
+
+    assert not intermediate.path.exists()
+
+    assert result.path.parent == scratch_directory(str(tmp_path)).path
+    assert np.array_equal(result[:], np.full([4, 4, 4], 2))
+    assert result.statistics().mean == 2.0
+    assert arc_manager.get_count(result.path) == 1
+
+    path = result.path
+    del intermediate, stale, result
+    assert arc_manager.wait_for_deletions(timeout=5.0)
+    assert not path.exists()
+
+
+def test_release_blobs_after_close(tmp_path):
+    store = ContentStore(enabled=True, min_bytes=0)
+    provider = TemporaryFilesProvider(
+        fast_dir="", bulk_dir=str(tmp_path), content_store=store
+    )
+
+    with scipion_bridge.arena():
+        first, second = [provider.new_temporary_file(".vol") for _ in range(2)]
+        for path in (first, second):
+            path.write_bytes(b"a" * 1000)
+            provider.complete(path)
+
+        assert os.path.samefile(first, second)
+
+    # Files of a closed arena are still released from the store
+    provider.delete(first)
+    provider.delete(second)
+    assert len(store) == 0
+
+
+def test_nested_arenas(tmp_path):
+    with scipion_bridge.arena() as outer:
+        with scipion_bridge.arena() as inner:
+            volume = SpiderFile.from_numpy(np.ones([4, 4, 4], dtype=np.float32))
+            alias = SpiderFile(volume.path, managed=True)
+            inner_dir = volume.path.parent
+
+            inner.keep(volume)
+
+        assert not inner_dir.exists()
+        assert volume.path.exists()
+
+        outer.keep(volume)
+
+    assert volume.path.parent == scratch_directory(str(tmp_path)).path
+
+    # The alias follows the file
+    assert alias.path == volume.path
+    assert np.array_equal(alias[:], np.ones([4, 4, 4]))
+
+    del alias
+    assert arc_manager.get_count(volume.path) == 1
+
+    # Moves are recorded against the final path and dropped with it
+    first_path = str(inner_dir / volume.path.name)
+    assert arc_manager._moved[first_path] == str(volume.path)
+
+    path = volume.path
+    del volume
+    assert arc_manager.wait_for_deletions(timeout=5.0)
+    assert first_path not in arc_manager._moved
+    assert str(path) not in arc_manager._moved_from
+
+
+def test_sweep_stale_directories(tmp_path):
+    host = socket.gethostname()
+
+    dead = tmp_path / f"scipion-bridge-{host}-999999999-abcd"
+    alive = tmp_path / f"scipion-bridge-{host}-{os.getpid()}-abcd"
+    other_host = tmp_path / "scipion-bridge-elsewhere-999999999-abcd"
+
+    for path in (dead, alive, other_host):
+        path.mkdir()
+        (path / "000000.vol").touch()
+
+    assert sweep_stale_directories(str(tmp_path)) == [dead]
+
+    assert not dead.exists()
+    assert alive.exists()
+    assert other_host.exists()
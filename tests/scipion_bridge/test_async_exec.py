@@ -0,0 +1,212 @@
+import os
+import sys
+import asyncio
+import threading
+import numpy as np
+from functools import partial
+from subprocess import PIPE
+
+from scipion_bridge.core.environment.cmd_exec import ShellExecProvider
+from scipion_bridge.core.utils.external_call import foreign_function, Domain
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed.proxy import Output, proxify
+from scipion_bridge.core.typed import spider
+from scipion_bridge.core.utils.arc import manager as arc_manager
+
+import pytest
+
+# Stands in for the XMIPP programs: copies the input to the output, or writes
+# its pid and the pid of a child to a file and sleeps
+PROGRAM = """
+import sys, time, shutil, subprocess
+name, args = sys.argv[1], dict(zip(sys.argv[2::2], sys.argv[3::2]))
+if name == "fake_copy":
+    time.sleep(float(args.get("--delay", 0)))
+    shutil.copyfile(args["-inputs"], args["-outputs"])
+else:
+    open(args["-outputs"] + ".log", "w").close()
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    with open(args["--pidfile"], "w") as f:
+        f.write(f"{child.pid} {args['-outputs']}")
+    time.sleep(60)
+"""
+
+python_domain = Domain("PY", [sys.executable, "-c", PROGRAM])
+python_func = partial(foreign_function, domain=python_domain)
+
+
+@python_func
+def fake_copy(inputs: str, outputs: str, *, delay: str):
+    pass
+
+
+@proxify
+@partial(python_func, func_name="fake_copy")
+def copy_volume_async(inputs, outputs=Output(SpiderFile), *, delay: str):
+    pass
+
+
+@proxify
+@partial(python_func, func_name="fake_hang")
+def hang(inputs, outputs=Output(SpiderFile), *, pidfile: str):
+    pass
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+
+    # Orphans are not always reaped in containers
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split()[2] != "Z"
+    except OSError:
+        return True
+
+
+@pytest.fixture
+def container(tmp_path, wire_container):
+    (tmp_path / "scratch").mkdir()
+
+    return wire_container(
+        {"temp_files": {"fast_dir": "", "bulk_dir": str(tmp_path / "scratch")}},
+        modules=["scipion_bridge.core.utils.external_call"],
+    )
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    spider.write_volume(tmp_path / "map.vol", np.ones([4, 4, 4], dtype=np.float32))
+    return SpiderFile(tmp_path / "map.vol")
+
+
+def test_run_async():
+    provider = ShellExecProvider()
+
+    async def _run(code: int):
+        return await provider.run_async(
+            "python",
+            python_domain,
+            [sys.executable, "-c", f"import sys; sys.exit({code})"],
+            run_args={"stderr": PIPE},
+        )
+
+    assert asyncio.run(_run(0)) == 0
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(_run(42))
+
+
+def test_foreign_function_run_async(tmp_path, container, inputs):
+    asyncio.run(
+        fake_copy.run_async(inputs.path, tmp_path / "copy.vol", delay="0")  # type: ignore
+    )
+
+    assert (tmp_path / "copy.vol").read_bytes() == inputs.path.read_bytes()
+
+
+def test_proxify_run_async(container, inputs):
+    async def _run():
+        # Calls run concurrently
+        return await asyncio.gather(
+            *(copy_volume_async.run_async(inputs, delay="0.5") for _ in range(4))
+        )
+
+    outputs = asyncio.run(_run())
+
+    assert len({o.path for o in outputs}) == 4
+    for output in outputs:
+        assert isinstance(output, SpiderFile)
+        assert output.managed == True
+        assert np.array_equal(output[:], np.ones([4, 4, 4]))
+
+
+def test_complete_off_loop(container, inputs, monkeypatch):
+    from scipion_bridge.core.typed import proxy
+
+    threads = []
+    complete = proxy._complete
+
+    def _complete(path):
+        threads.append(threading.current_thread())
+        complete(path)
+
+    monkeypatch.setattr(proxy, "_complete", _complete)
+
+    # Hashing and measuring outputs doesn't block the event loop
+    output = asyncio.run(copy_volume_async.run_async(inputs, delay="0"))
+
+    assert np.array_equal(output[:], np.ones([4, 4, 4]))
+    assert threads and threading.main_thread() not in threads
+
+
+def test_cancel_kills_program(tmp_path, container, inputs):
+    pidfile = tmp_path / "pids"
+
+    async def _run():
+        task = asyncio.ensure_future(hang.run_async(inputs, pidfile=str(pidfile)))
+        while not pidfile.exists() or not pidfile.read_text():
+            await asyncio.sleep(0.05)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(_run())
+
+    child_pid, output = pidfile.read_text().split()
+    assert not _is_running(int(child_pid))
+
+    # The output and the files the program derived from it are removed
+    container.deleter().wait(5.0)
+    assert not os.path.exists(f"{output}.log")
+    assert not os.path.exists(output)
+
+
+def test_cancel_while_restoring(tmp_path, container, inputs):
+    container.config.from_dict({"call_cache": {"directory": str(tmp_path / "cache")}})
+
+    restoring, restored = threading.Event(), threading.Event()
+    outputs = []
+
+    def _restore(key, paths):
+        outputs.extend(paths)
+        restoring.set()
+        restored.wait(5.0)
+        return False
+
+    container.call_cache().restore = _restore
+
+    async def _run():
+        task = asyncio.ensure_future(copy_volume_async.run_async(inputs, delay="0"))
+        while not restoring.is_set():
+            await asyncio.sleep(0.01)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # The output is kept while cached files may still be linked into it
+        assert arc_manager.is_tracked(outputs[0])
+
+        restored.set()
+        for _ in range(500):
+            if not arc_manager.is_tracked(outputs[0]):
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(_run())
+    assert not arc_manager.is_tracked(outputs[0])
+
+
+def test_keep_files_next_to_explicit_outputs(tmp_path, container):
+    structure = tmp_path / "1abc.pdb"
+    structure.write_text("ATOM")
+
+    # The program fails; only outputs the call reserved are cleaned up
+    with pytest.raises(RuntimeError):
+        copy_volume_async(structure, outputs=tmp_path / "1abc", delay="x")
+
+    assert structure.read_text() == "ATOM"
@@ -0,0 +1,164 @@
+import threading
+from pathlib import Path
+import numpy as np
+
+from scipion_bridge.core.environment.budget import (
+    DEFAULT_TIMEOUT,
+    ScratchBudget,
+    ScratchBudgetExceeded,
+)
+from scipion_bridge.core.environment.temp_files import Tier, TemporaryFilesProvider
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed.proxy import Output, proxify
+from scipion_bridge.core.utils.arc import manager as arc_manager
+
+import pytest
+
+
+@pytest.fixture
+def tier_dirs(tmp_path):
+    (tmp_path / "fast").mkdir()
+    (tmp_path / "bulk").mkdir()
+
+    return tmp_path / "fast", tmp_path / "bulk"
+
+
+def test_account_bytes(tier_dirs):
+    _, bulk_dir = tier_dirs
+    budget = ScratchBudget()
+    provider = TemporaryFilesProvider(
+        fast_dir="", bulk_dir=str(bulk_dir), budget=budget
+    )
+
+    first = provider.new_temporary_file(".vol", expected_size=100)
+    second = provider.new_temporary_file(".mrc", expected_size=50)
+
+    first.write_bytes(b"\0" * 120)
+    provider.complete(first)
+
+    metrics = budget.metrics()
+    assert metrics.total.live_bytes == 170
+    assert metrics.total.live_files == 2
+    assert metrics.by_tier[Tier.BULK].live_bytes == 170
+    assert metrics.by_type[".vol"].live_bytes == 120
+    assert metrics.by_type[".mrc"].live_bytes == 50
+
+    provider.delete(first)
+    provider.delete(second)
+
+    metrics = budget.metrics()
+    assert metrics.total.live_bytes == 0
+    assert metrics.total.live_files == 0
+    assert metrics.total.peak_bytes == 170
+    assert metrics.total.peak_files == 2
+
+
+def test_spill(tier_dirs):
+    fast_dir, bulk_dir = tier_dirs
+    provider = TemporaryFilesProvider(
+        fast_dir=str(fast_dir),
+        bulk_dir=str(bulk_dir),
+        fast_max_bytes=1000,
+        budget=ScratchBudget(fast_max_bytes=1000, policy="spill"),
+    )
+
+    first = provider.new_temporary_file(".vol", expected_size=600)
+    second = provider.new_temporary_file(".vol", expected_size=600)
+
+    assert provider.tier_of(first) == Tier.FAST
+    assert provider.tier_of(second) == Tier.BULK
+
+    provider.delete(first)
+    third = provider.new_temporary_file(".vol", expected_size=600)
+    assert provider.tier_of(third) == Tier.FAST
+
+
+def test_block_until_released(tier_dirs):
+    _, bulk_dir = tier_dirs
+    provider = TemporaryFilesProvider(
+        fast_dir="",
+        bulk_dir=str(bulk_dir),
+        budget=ScratchBudget(bulk_max_bytes=1000, timeout=5.0),
+    )
+
+    first = provider.new_temporary_file(".vol", expected_size=600)
+
+    acquired = threading.Event()
+
+    def _allocate():
+        provider.new_temporary_file(".vol", expected_size=600)
+        acquired.set()
+
+    thread = threading.Thread(target=_allocate)
+    thread.start()
+
+    assert not acquired.wait(0.1)
+    provider.delete(first)
+    assert acquired.wait(5.0)
+
+    thread.join()
+
+
+def test_exceed_budget(tier_dirs):
+    _, bulk_dir = tier_dirs
+    provider = TemporaryFilesProvider(
+        fast_dir="",
+        bulk_dir=str(bulk_dir),
+        budget=ScratchBudget(bulk_max_bytes=1000, timeout=0.05),
+    )
+
+    with pytest.raises(ScratchBudgetExceeded):
+        provider.new_temporary_file(".vol", expected_size=2000)
+
+    provider.new_temporary_file(".vol", expected_size=600)
+    with pytest.raises(ScratchBudgetExceeded):
+        provider.new_temporary_file(".vol", expected_size=600)
+
+
+def test_default_timeout():
+    # Waiting for space never blocks forever
+    assert ScratchBudget().timeout == DEFAULT_TIMEOUT
+    assert ScratchBudget(timeout=2).timeout == 2.0
+
+
+def test_measure_outputs(tier_dirs, wire_container):
+    _, bulk_dir = tier_dirs
+
+    container = wire_container(
+        {"temp_files": {"fast_dir": "", "bulk_dir": str(bulk_dir)}}
+    )
+
+    @proxify
+    def foo(outputs=Output(SpiderFile)):
+        with open(outputs, "wb") as f:
+            f.write(b"\0" * 4096)
+
+    volume = foo()
+    mask = SpiderFile.from_numpy(np.zeros([8, 8, 8], dtype=np.float32))
+
+    metrics = arc_manager.scratch_metrics()
+    assert metrics.by_type[".vol"].live_files == 2
+    assert metrics.by_type[".vol"].live_bytes == 4096 + mask.path.stat().st_size
+
+    del volume, mask
+    assert arc_manager.wait_for_deletions(timeout=5.0)
+    assert arc_manager.scratch_metrics().total.live_bytes == 0
+
+
+def test_measure_derived_files(tier_dirs):
+    _, bulk_dir = tier_dirs
+    budget = ScratchBudget()
+    provider = TemporaryFilesProvider(
+        fast_dir="", bulk_dir=str(bulk_dir), budget=budget
+    )
+
+    # Programs write untyped outputs under a name with an extension added
+    untyped = provider.new_temporary_file("")
+    Path(f"{untyped}.vol").write_bytes(b"\0" * 300)
+    provider.complete(untyped)
+
+    assert budget.metrics().total.live_bytes == 300
+
+    provider.delete(untyped)
+    assert not Path(f"{untyped}.vol").exists()
+    assert budget.metrics().total.live_bytes == 0
@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import numpy as np
+from functools import partial
+
+from scipion_bridge.core.environment.container import Container
+from scipion_bridge.core.environment.call_cache import CallCache
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed.proxy import Output, ProxyParam, proxify
+from scipion_bridge.core.typed import common, spider
+from scipion_bridge.core.utils.external_call import Domain, foreign_function
+
+import pytest
+
+calls = []
+
+# Stands in for an XMIPP program; counts its runs in a file next to it
+PROGRAM = """
+import sys, shutil
+name, args = sys.argv[1], dict(zip(sys.argv[2::2], sys.argv[3::2]))
+if name != "fake_copy":
+    sys.exit(1)
+with open(sys.argv[0] + ".runs", "a") as f:
+    f.write("run\\n")
+shutil.copyfile(args.get("-inputs") or args["-i"], args["-outputs"])
+"""
+
+
+def _functions():
+    # Outputs register their resolver in the module creating them, so the
+    # functions are created by the tests using them
+    @proxify
+    def scale(
+        inputs: ProxyParam[SpiderFile], outputs=Output(SpiderFile), *, factor: str
+    ):
+        calls.append("scale")
+        data = np.array(spider.open_memmap(inputs)) * float(factor)
+        spider.write_volume(outputs, data)
+
+    @proxify
+    def negate(inputs: ProxyParam[SpiderFile], outputs=Output(SpiderFile)):
+        calls.append("negate")
+        spider.write_volume(outputs, -np.array(spider.open_memmap(inputs)))
+
+    return scale, negate
+
+
+def _copy(domain: Domain, **options):
+    @proxify
+    @partial(foreign_function, domain=domain, func_name="fake_copy", **options)
+    def copy(inputs, outputs=Output(SpiderFile)):
+        pass
+
+    return copy
+
+
+@pytest.fixture
+def new_container(tmp_path, wire_container):
+    # A new container starts a new run with an empty in-memory cache
+    def _new(**call_cache) -> Container:
+        return wire_container(
+            {
+                "temp_files": {"fast_dir": "", "bulk_dir": str(tmp_path / "scratch")},
+                "call_cache": {"directory": str(tmp_path / "cache"), **call_cache},
+                "scipion_env": {"cache_dir": str(tmp_path / "environments")},
+            },
+            modules=["scipion_bridge.core.utils.external_call"],
+        )
+
+    return _new
+
+
+@pytest.fixture(autouse=True)
+def inputs(tmp_path):
+    calls.clear()
+    (tmp_path / "scratch").mkdir()
+
+    spider.write_volume(tmp_path / "map.vol", np.ones([4, 4, 4], dtype=np.float32))
+    return SpiderFile(tmp_path / "map.vol")
+
+
+def test_restore_cached_outputs(inputs, new_container):
+    scale, negate = _functions()
+    container = new_container()
+
+    first = scale(inputs, factor="2")
+    second = scale(inputs, factor="2")
+    other = scale(inputs, factor="3")
+
+    assert calls == ["scale", "scale"]
+    assert container.call_cache().hits == 1
+
+    assert second.managed == True
+    assert second.path != first.path
+    assert np.array_equal(second[:], np.full([4, 4, 4], 2))
+    assert np.array_equal(other[:], np.full([4, 4, 4], 3))
+
+
+def test_changed_input(tmp_path, inputs, new_container):
+    scale, negate = _functions()
+    new_container()
+    scale(inputs, factor="2")
+
+    spider.write_volume(tmp_path / "map.vol", np.zeros([4, 4, 4], dtype=np.float32))
+    result = scale(inputs, factor="2")
+
+    assert calls == ["scale", "scale"]
+    assert np.array_equal(result[:], np.zeros([4, 4, 4]))
+
+
+def test_bypass(inputs, new_container):
+    scale, negate = _functions()
+    new_container()
+
+    scale(inputs, factor="2")
+    scale(inputs, factor="2", use_cache=False)
+
+    assert calls == ["scale", "scale"]
+
+
+def test_chain_across_runs(inputs, new_container):
+    scale, negate = _functions()
+    new_container()
+    negate(scale(inputs, factor="2"))
+
+    # A new run starts with a new cache instance and new intermediate files
+    new_container()
+    result = negate(scale(inputs, factor="2"))
+
+    assert calls == ["scale", "negate"]
+    assert np.array_equal(result[:], np.full([4, 4, 4], -2))
+
+
+def test_evict_least_recently_used(tmp_path, inputs, new_container):
+    scale, negate = _functions()
+    file_size = spider.file_size((4, 4, 4))
+    container = new_container(max_bytes=2 * file_size + 1024)
+
+    scale(inputs, factor="1")
+    scale(inputs, factor="2")
+    scale(inputs, factor="1")  # Marks the first entry as recently used
+    scale(inputs, factor="3")
+
+    assert len(os.listdir(tmp_path / "cache")) == 2
+
+    scale(inputs, factor="1")
+    scale(inputs, factor="2")
+    assert calls == ["scale", "scale", "scale", "scale"]
+
+
+def test_key_programs_by_command(tmp_path, inputs, new_container):
+    program = tmp_path / "program"
+    program.write_text(f"#!{sys.executable}\n{PROGRAM}")
+    program.chmod(0o755)
+
+    domain = Domain("PY", [str(program)])
+    copy = _copy(domain)
+    copy_renamed = _copy(domain, args_map={"inputs": "i"})
+    new_container()
+
+    copy(inputs)
+    result = copy(inputs)
+    assert np.array_equal(result[:], np.ones([4, 4, 4]))
+
+    # The same function passing its arguments differently is a different call
+    copy_renamed(inputs)
+    assert len((tmp_path / "program.runs").read_text().split()) == 2
+
+    # So is a call after the program was reinstalled
+    os.utime(program, ns=(0, 0))
+    copy(inputs)
+    assert len((tmp_path / "program.runs").read_text().split()) == 3
+
+
+def test_explicit_outputs(tmp_path, inputs, new_container):
+    scale, negate = _functions()
+    new_container()
+
+    # Files next to outputs at explicit paths are not part of the outputs
+    (tmp_path / "scaled.vol.orig").write_bytes(b"\0")
+    scale(inputs, outputs=tmp_path / "scaled.vol", factor="2")
+
+    (entry,) = (tmp_path / "cache").iterdir()
+    with open(entry / "entry.json") as f:
+        (files,) = json.load(f)["outputs"]
+
+    assert [tail for tail, _ in files] == [""]
+
+
+def test_disabled(tmp_path):
+    assert not CallCache().enabled
+    assert CallCache(directory=str(tmp_path)).enabled
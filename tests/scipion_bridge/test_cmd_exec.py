@@ -36,3 +36,25 @@ def test_shell_exec():
             ],
             run_args={"shell": True, "stdout": PIPE, "stderr": PIPE},
         )
+
+
+def test_exec_without_shell(tmp_path):
+
+    provider = ShellExecProvider()
+
+    # Arguments reach the program unchanged, without quoting
+    target = tmp_path / "it's a $file"
+    provider(
+        "python",
+        PYTHON_DOMAIN,
+        [
+            "python",
+            "-c",
+            "import sys; open(sys.argv[1], 'w').write(sys.argv[2])",
+            str(target),
+            "; echo *",
+        ],
+        run_args={"stdout": PIPE, "stderr": PIPE},
+    )
+
+    assert target.read_text() == "; echo *"
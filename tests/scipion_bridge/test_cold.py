@@ -0,0 +1,144 @@
+import gzip
+import os
+import numpy as np
+from pathlib import Path
+
+from scipion_bridge.core.environment.cold import (
+    ColdStore,
+    compress_file,
+    cold_path,
+    is_cold,
+)
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed import spider
+from scipion_bridge.core.typed.proxy import Output, ProxyParam, proxify
+from scipion_bridge.core.utils.arc import manager as arc_manager
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def container(tmp_path, wire_container):
+    return wire_container(
+        {
+            "temp_files": {"fast_dir": "", "bulk_dir": str(tmp_path)},
+            "cold": {"idle_seconds": 3600},
+        }
+    )
+
+
+def test_multi_member(tmp_path, monkeypatch):
+    from scipion_bridge.core.environment import cold
+
+    monkeypatch.setattr(cold, "_CHUNK_BYTES", 1000)
+
+    data = os.urandom(10_500)
+    (tmp_path / "data").write_bytes(data)
+    compress_file(tmp_path / "data", tmp_path / "data.gz", max_workers=3)
+
+    with gzip.open(tmp_path / "data.gz") as f:
+        assert f.read() == data
+
+
+def test_freeze_and_thaw(container):
+    mask = SpiderFile.from_numpy(np.zeros([32, 32, 32], dtype=np.float32))
+    path = mask._path
+    size = path.stat().st_size
+
+    store = container.cold_store()
+    assert store.freeze_idle(0) == 1
+
+    assert is_cold(path)
+    assert os.stat(cold_path(path)).st_size < size / 10
+
+    # Accessing the path decompresses the file
+    assert np.array_equal(mask[:], np.zeros([32, 32, 32]))
+    assert not is_cold(path)
+    assert path.stat().st_size == size
+
+    del mask
+    assert arc_manager.wait_for_deletions(timeout=5.0)
+    assert not path.exists()
+    assert not os.path.exists(cold_path(path))
+
+
+def test_recently_used_stay_hot(container):
+    volume = SpiderFile.from_numpy(np.zeros([8, 8, 8], dtype=np.float32))
+    volume.path
+
+    store = container.cold_store()
+    assert store.freeze_idle() == 0
+    assert not is_cold(volume._path)
+
+
+def test_pinned_while_running(container):
+    volume = SpiderFile.from_numpy(np.zeros([8, 8, 8], dtype=np.float32))
+    store = container.cold_store()
+
+    @proxify
+    def foo(inputs: ProxyParam[SpiderFile]):
+        assert store.freeze_idle(0) == 0
+        assert os.path.exists(inputs)
+
+    foo(volume)
+    assert store.freeze_idle(0) == 1
+
+
+def test_idle_outputs(container):
+    @proxify
+    def fill(outputs=Output(SpiderFile)):
+        spider.write_volume(outputs, np.zeros([8, 8, 8], dtype=np.float32))
+
+    # Outputs are tracked once written, even if nothing reads them
+    output = fill()
+    assert output._path in map(Path, container.cold_store()._last_access)
+
+    assert container.cold_store().freeze_idle(0) == 1
+    assert is_cold(output._path)
+
+
+def test_deleted_while_compressing(tmp_path, monkeypatch):
+    from scipion_bridge.core.environment import cold
+
+    path = tmp_path / "data"
+    path.write_bytes(b"\0" * 1000)
+
+    def _compress_and_delete(path, target, *args):
+        compress_file(path, target, *args)
+        os.remove(path)
+
+    store = ColdStore(idle_seconds=3600)
+    monkeypatch.setattr(cold, "compress_file", _compress_and_delete)
+
+    assert not store.freeze(path)
+    assert not os.path.exists(cold_path(path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_interrupted_compression(tmp_path, monkeypatch):
+    from scipion_bridge.core.environment import cold
+
+    path = tmp_path / "data"
+    path.write_bytes(b"\0" * 1000)
+
+    def _fail(path, target, *args):
+        Path(target).write_bytes(b"\0")
+        raise OSError("No space left on device")
+
+    store = ColdStore(idle_seconds=3600)
+    monkeypatch.setattr(cold, "compress_file", _fail)
+
+    with pytest.raises(OSError):
+        store.freeze(path)
+
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_disabled_by_default(tmp_path, wire_container):
+    container = wire_container(
+        {"temp_files": {"fast_dir": "", "bulk_dir": str(tmp_path)}}
+    )
+
+    volume = SpiderFile.from_numpy(np.zeros([8, 8, 8], dtype=np.float32))
+    assert container.cold_store().freeze_idle(0) == 0
+    assert not is_cold(volume._path)
@@ -0,0 +1,128 @@
+import os
+import numpy as np
+
+from scipion_bridge.core.environment.budget import ScratchBudget
+from scipion_bridge.core.environment.dedup import ContentStore
+from scipion_bridge.core.environment.temp_files import TemporaryFilesProvider
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed.proxy import Output, proxify
+from scipion_bridge.core.typed import common, spider
+from scipion_bridge.core.utils.arc import manager as arc_manager
+
+import pytest
+
+
+def _write(path, contents: bytes):
+    with open(path, "wb") as f:
+        f.write(contents)
+
+
+def test_link_duplicates(tmp_path):
+    store = ContentStore(enabled=True, min_bytes=0)
+    budget = ScratchBudget()
+    provider = TemporaryFilesProvider(
+        fast_dir="", bulk_dir=str(tmp_path), budget=budget, content_store=store
+    )
+
+    first, second, third = [provider.new_temporary_file(".vol") for _ in range(3)]
+    _write(first, b"a" * 1000)
+    _write(second, b"a" * 1000)
+    _write(third, b"b" * 1000)
+
+    for path in (first, second, third):
+        provider.complete(path)
+
+    assert os.path.samefile(first, second)
+    assert not os.path.samefile(first, third)
+    assert len(store) == 2
+
+    # Duplicates cost nothing
+    assert budget.metrics().total.live_bytes == 2000
+
+    provider.delete(first)
+    assert second.read_bytes() == b"a" * 1000
+    assert len(store) == 2
+
+    # The blob is charged to the remaining link
+    assert budget.metrics().total.live_bytes == 2000
+
+    provider.delete(second)
+    provider.delete(third)
+    assert len(store) == 0
+    assert not any((first.parent / "blobs").iterdir())
+    assert budget.metrics().total.live_bytes == 0
+
+
+def test_disabled_or_small(tmp_path):
+    provider = TemporaryFilesProvider(
+        fast_dir="",
+        bulk_dir=str(tmp_path),
+        content_store=ContentStore(enabled=True, min_bytes=4096),
+    )
+
+    first, second = [provider.new_temporary_file(".vol") for _ in range(2)]
+    _write(first, b"a" * 1000)
+    _write(second, b"a" * 1000)
+
+    provider.complete(first)
+    provider.complete(second)
+
+    assert not os.path.samefile(first, second)
+    assert not provider.content_store.add(first, first.parent)
+
+    disabled = ContentStore()
+    assert not disabled.add(first, first.parent)
+    assert len(disabled) == 0
+
+
+def test_deduplicate_outputs(tmp_path, wire_container):
+    container = wire_container(
+        {
+            "temp_files": {"fast_dir": "", "bulk_dir": str(tmp_path)},
+            "dedup": {"enabled": True, "min_bytes": 0},
+        }
+    )
+
+    @proxify
+    def threshold(outputs=Output(SpiderFile), *, value: int):
+        _write(outputs, bytes([int(value)]) * 4096)
+
+    first = threshold(value=1)
+    second = threshold(value=1)
+    other = threshold(value=2)
+
+    assert os.path.samefile(first.path, second.path)
+    assert not os.path.samefile(first.path, other.path)
+
+    store = container.content_store()
+    assert len(store) == 2
+
+    del first, second, other
+    assert arc_manager.wait_for_deletions(timeout=5.0)
+    assert len(store) == 0
+
+
+def test_write_duplicate_in_place(tmp_path):
+    store = ContentStore(enabled=True, min_bytes=0)
+    provider = TemporaryFilesProvider(
+        fast_dir="", bulk_dir=str(tmp_path), content_store=store
+    )
+
+    first, second = [provider.new_temporary_file(".vol") for _ in range(2)]
+    for path in (first, second):
+        spider.write_volume(path, np.ones([4, 4, 4], dtype=np.float32))
+        provider.complete(path)
+
+    assert os.path.samefile(first, second)
+
+    # Writers copy a linked file before changing it, so the others are intact
+    spider.update_header(second, spider.make_header((4, 4, 4), sampling=2.0))
+    assert not os.path.samefile(first, second)
+    assert spider.read_header(first).sampling == 1.0
+    assert spider.read_header(second).sampling == 2.0
+    assert np.array_equal(spider.open_memmap(second), np.ones([4, 4, 4]))
+
+    spider.write_volume(first, np.zeros([4, 4, 4], dtype=np.float32))
+    assert np.array_equal(spider.open_memmap(first), np.zeros([4, 4, 4]))
+    blob = store._blobs[str(first)]
+    assert np.array_equal(spider.open_memmap(blob), np.ones([4, 4, 4]))
@@ -0,0 +1,74 @@
+import os
+import time
+import threading
+from pathlib import Path
+
+from scipion_bridge.core.environment.deleter import BackgroundDeleter
+from scipion_bridge.core.environment.temp_files import TemporaryFilesProvider
+
+import pytest
+
+
+class SlowTempFiles:
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.deleted = []
+        self.threads = set()
+
+    def delete(self, path: os.PathLike):
+        time.sleep(self.delay)
+        self.threads.add(threading.get_ident())
+        self.deleted.append(path)
+
+
+def test_delete_in_background():
+    deleter = BackgroundDeleter()
+    temp_files = SlowTempFiles(delay=0.01)
+
+    start = time.perf_counter()
+    for i in range(20):
+        deleter.submit(Path(f"/tmp/file_{i}"), temp_files)
+
+    # Submitting doesn't wait for the files to be deleted
+    assert time.perf_counter() - start < 0.1
+    assert deleter.wait(timeout=10)
+
+    assert temp_files.deleted == [Path(f"/tmp/file_{i}") for i in range(20)]
+    assert threading.get_ident() not in temp_files.threads
+    assert len(deleter) == 0
+
+
+def test_flush():
+    deleter = BackgroundDeleter()
+    temp_files = SlowTempFiles()
+
+    for i in range(1000):
+        deleter.submit(Path(f"/tmp/file_{i}"), temp_files)
+
+    deleter.flush()
+    assert len(temp_files.deleted) == 1000
+
+
+def test_failures_are_logged(tmp_path, caplog):
+    deleter = BackgroundDeleter()
+    # Directories can't be removed like files
+    deleter.submit(tmp_path, TemporaryFilesProvider())
+
+    assert deleter.wait(timeout=10)
+    assert "Failed to delete file" in caplog.text
+
+
+def test_worker_restarts_after_idle():
+    deleter = BackgroundDeleter(idle_timeout=0.01)
+    temp_files = SlowTempFiles()
+
+    deleter.submit(Path("/tmp/file_1"), temp_files)
+    assert deleter.wait(timeout=10)
+
+    time.sleep(0.1)
+    assert deleter._worker is None
+
+    deleter.submit(Path("/tmp/file_2"), temp_files)
+    assert deleter.wait(timeout=10)
+    assert temp_files.deleted == [Path("/tmp/file_1"), Path("/tmp/file_2")]
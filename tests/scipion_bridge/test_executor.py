@@ -0,0 +1,146 @@
+import time
+import threading
+import numpy as np
+from concurrent.futures import Future
+
+import scipion_bridge
+from scipion_bridge.core.environment.temp_files import scratch_directory
+from scipion_bridge.core.environment.executor import CallExecutor, available_cores
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed.proxy import Output, ProxyParam, proxify
+from scipion_bridge.core.typed import spider
+
+import pytest
+
+
+class Concurrency:
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+
+    def __exit__(self, *args):
+        with self._lock:
+            self.running -= 1
+
+
+concurrency = Concurrency()
+
+
+def _functions():
+    # Outputs register their resolver in the module creating them, so the
+    # functions are created by the tests using them
+    @proxify
+    def scale(
+        inputs: ProxyParam[SpiderFile], outputs=Output(SpiderFile), *, factor: str
+    ):
+        with concurrency:
+            time.sleep(0.2)
+            data = np.array(spider.open_memmap(inputs)) * float(factor)
+            spider.write_volume(outputs, data)
+
+    @proxify
+    def add(
+        a: ProxyParam[SpiderFile],
+        b: ProxyParam[SpiderFile],
+        outputs=Output(SpiderFile),
+    ):
+        data = np.array(spider.open_memmap(a)) + np.array(spider.open_memmap(b))
+        spider.write_volume(outputs, data)
+
+    @proxify
+    def fail(inputs: ProxyParam[SpiderFile], outputs=Output(SpiderFile)):
+        raise RuntimeError("Program failed")
+
+    return scale, add, fail
+
+
+@pytest.fixture
+def container(tmp_path, wire_container):
+    (tmp_path / "scratch").mkdir()
+    concurrency.peak = 0
+
+    container = wire_container(
+        {
+            "temp_files": {"fast_dir": "", "bulk_dir": str(tmp_path / "scratch")},
+            "executor": {"max_workers": 2},
+        }
+    )
+
+    yield container
+
+    container.executor().shutdown()
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    spider.write_volume(tmp_path / "map.vol", np.ones([4, 4, 4], dtype=np.float32))
+    return SpiderFile(tmp_path / "map.vol")
+
+
+def test_default_workers():
+    assert CallExecutor().max_workers == available_cores()
+    assert CallExecutor(max_workers=3).max_workers == 3
+
+
+def test_submit(container, inputs):
+    scale, add, fail = _functions()
+
+    futures = [scale.submit(inputs, factor=str(i)) for i in range(4)]
+    assert all(isinstance(f, Future) for f in futures)
+
+    for i, future in enumerate(futures):
+        result = future.result()
+
+        assert isinstance(result, SpiderFile)
+        assert result.managed == True
+        assert np.array_equal(result[:], np.full([4, 4, 4], i))
+
+    # Calls run in parallel, but on no more workers than configured
+    assert concurrency.peak == 2
+
+
+def test_futures_as_inputs(container, inputs):
+    scale, add, fail = _functions()
+
+    half_a = scale.submit(inputs, factor="2")
+    half_b = scale.submit(inputs, factor="3")
+
+    total = add.submit(half_a, half_b)
+    assert np.array_equal(total.result()[:], np.full([4, 4, 4], 5))
+
+    # Synchronous calls take futures too
+    doubled = scale(scale.submit(inputs, factor="2"), factor="2")
+    assert np.array_equal(doubled[:], np.full([4, 4, 4], 4))
+
+
+def test_failed_input(container, inputs):
+    scale, add, fail = _functions()
+
+    failed = fail.submit(inputs)
+    result = add.submit(failed, inputs)
+
+    with pytest.raises(RuntimeError, match="Program failed"):
+        result.result()
+
+
+def test_submit_in_arena(container, inputs):
+    scale, add, fail = _functions()
+
+    # Submitted calls see the caller's arena
+    with scipion_bridge.arena():
+        result = scale.submit(inputs, factor="2").result()
+        arena_dir = result.path.parent
+
+        assert (
+            arena_dir.parent
+            == scratch_directory(container.config.temp_files.bulk_dir()).path
+        )
+
+    assert not arena_dir.exists()
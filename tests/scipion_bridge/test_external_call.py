@@ -1,7 +1,9 @@
+import copy
+import pickle
 import itertools
 from functools import partial
 
-from scipion_bridge.core.utils.external_call import foreign_function, Domain
+from scipion_bridge.core.utils.external_call import Domain, Words, foreign_function
 from scipion_bridge.core.environment.container import Container
 
 import pytest
@@ -40,7 +42,7 @@ def test_basic_xmipp_func(mocker: MockerFixture):
                 "--keyword_param",
                 "42",
             ],
-            {"shell": True, "stderr": -1},
+            {"shell": False, "stderr": -1},
         )
 
 
@@ -73,7 +75,7 @@ def test_basic_xmipp_func_with_mapping(mocker: MockerFixture):
                 "--keyword_param",
                 "42",
             ],
-            {"shell": True, "stderr": -1},
+            {"shell": False, "stderr": -1},
         )
 
 
@@ -113,7 +115,7 @@ def test_boolean_function(mocker: MockerFixture, flag: bool, rename_flag: bool):
                 "/some/input",
             ]
             + flag_result,
-            {"shell": True, "stderr": -1},
+            {"shell": False, "stderr": -1},
         )
 
 
@@ -145,7 +147,7 @@ def test_function_with_defaults(mocker: MockerFixture):
                 "--value",
                 "42",
             ],
-            {"shell": True, "stderr": -1},
+            {"shell": False, "stderr": -1},
         )
 
 
@@ -209,7 +211,7 @@ def test_argument_validation(mocker: MockerFixture):  # , arg_name):
                 "-renamed",
                 "/some/path/to/file.vol",
             ],
-            {"shell": True, "stderr": -1},
+            {"shell": False, "stderr": -1},
         )
 
         with pytest.raises(ValueError):
@@ -240,5 +242,49 @@ def test_custom_postprocessing(mocker: MockerFixture):
                 "/some/path/to/file.vol",
                 "--flag",
             ],
-            {"shell": True, "stderr": -1},
+            {"shell": False, "stderr": -1},
         )
+
+
+def xmipp_multiword(inputs: str, *, select: str):
+    pass
+
+
+@pytest.mark.parametrize("shell", [False, True])
+def test_multiword_values(mocker: MockerFixture, shell: bool):
+    _xmipp_multiword = xmipp_func(xmipp_multiword, shell=shell)
+
+    container = Container()
+    container.wire(modules=[__name__])
+
+    exec_mock = mocker.Mock()
+
+    with container.shell_exec.override(exec_mock):
+        _xmipp_multiword("/data/EMD 1234/it's.vol", select=("below", 0.1))
+
+        # The shell splits values itself; otherwise strings are single words
+        # and only tuples are expanded
+        values = (
+            ["/data/EMD 1234/it's.vol", "--select", "('below', 0.1)"]
+            if shell
+            else ["/data/EMD 1234/it's.vol", "--select", "below", "0.1"]
+        )
+
+        exec_mock.assert_called_with(
+            "xmipp_multiword",
+            xmipp_domain,
+            ["scipion", "run", "xmipp_multiword", "-inputs", *values],
+            {"shell": shell, "stderr": -1},
+        )
+
+
+def test_copy_words():
+    words = Words(["/data/EMD 1234/map.vol", "0.1"])
+
+    for copied in (copy.copy(words), copy.deepcopy(words)):
+        assert copied.words == words.words
+
+    for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+        restored = pickle.loads(pickle.dumps(words, protocol=protocol))
+        assert restored == words
+        assert restored.words == words.words
@@ -0,0 +1,96 @@
+import os
+import numpy as np
+from dependency_injector import providers
+
+import scipion_bridge
+from scipion_bridge.core.environment.io_hints import IOHints, advise, WILLNEED
+from scipion_bridge.core.environment.cold import cold_path
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed.proxy import Output, ProxyParam, proxify
+
+import pytest
+
+
+class RecordingHints:
+
+    def __init__(self) -> None:
+        self.will_need_paths = []
+        self.dont_need_paths = []
+
+    def will_need(self, paths):
+        self.will_need_paths.extend(os.fspath(p) for p in paths)
+
+    def dont_need(self, paths):
+        self.dont_need_paths.extend(os.fspath(p) for p in paths)
+
+
+@pytest.fixture
+def container(tmp_path, wire_container):
+    container = wire_container(
+        {
+            "temp_files": {"fast_dir": "", "bulk_dir": str(tmp_path)},
+            "cold": {"idle_seconds": 3600},
+        }
+    )
+    container.io_hints.override(providers.Object(RecordingHints()))
+
+    return container
+
+
+@pytest.fixture
+def hints(container):
+    return container.io_hints()
+
+
+@pytest.mark.skipif(not hasattr(os, "posix_fadvise"), reason="No posix_fadvise")
+def test_advise(tmp_path):
+    (tmp_path / "volume.vol").write_bytes(b"\0" * 4096)
+
+    assert advise(tmp_path / "volume.vol", WILLNEED)
+    assert not advise(tmp_path / "missing.vol", WILLNEED)
+
+    io_hints = IOHints()
+    io_hints.will_need([tmp_path / "volume.vol", tmp_path / "missing.vol"])
+    assert io_hints.wait(timeout=5.0)
+    assert len(io_hints._pending) == 0
+
+
+def test_disabled():
+    io_hints = IOHints(enabled=False)
+    io_hints.will_need(["/some/file.vol"])
+
+    assert io_hints.wait(timeout=0)
+    assert io_hints._worker is None
+
+
+def test_hint_inputs(hints):
+    volume = SpiderFile.from_numpy(np.zeros([4, 4, 4], dtype=np.float32))
+
+    @proxify
+    def foo(inputs: ProxyParam[SpiderFile], outputs=Output(SpiderFile), *, size: str):
+        pass
+
+    foo(volume, size="4")
+
+    # The output is hinted too but skipped as it doesn't exist yet
+    assert hints.will_need_paths[0] == os.fspath(volume.path)
+    assert "4" not in hints.will_need_paths
+
+
+def test_prefetch(hints, tmp_path):
+    volume = SpiderFile.from_numpy(np.zeros([4, 4, 4], dtype=np.float32))
+    scipion_bridge.prefetch(volume, tmp_path / "map.mrc")
+
+    assert hints.will_need_paths == [
+        os.fspath(volume.path),
+        os.fspath(tmp_path / "map.mrc"),
+    ]
+
+
+def test_dont_need_cold_copies(container, hints):
+    volume = SpiderFile.from_numpy(np.zeros([4, 4, 4], dtype=np.float32))
+    volume.path
+
+    store = container.cold_store()
+    assert store.freeze_idle(0) == 1
+    assert hints.dont_need_paths == [cold_path(volume._path)]
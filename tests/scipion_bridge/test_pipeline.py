@@ -0,0 +1,211 @@
+import os
+import time
+import threading
+import numpy as np
+
+import scipion_bridge
+from scipion_bridge.core.environment.container import Container
+from scipion_bridge.core.environment.temp_files import scratch_directory
+from scipion_bridge.core.utils.pipeline import Node, NodeState
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed.proxy import Output, ProxyParam, proxify
+from scipion_bridge.core.typed import spider
+
+import pytest
+
+calls = []
+_lock = threading.Lock()
+
+
+def _record(name: str, running: list):
+    with _lock:
+        calls.append(name)
+        running.append(name)
+
+
+def _functions(running: list):
+    # Outputs register their resolver in the module creating them, so the
+    # functions are created by the tests using them
+    @proxify
+    def scale(
+        inputs: ProxyParam[SpiderFile], outputs=Output(SpiderFile), *, factor: str
+    ):
+        _record("scale", running)
+        time.sleep(0.2)
+        data = np.array(spider.open_memmap(inputs)) * float(factor)
+        spider.write_volume(outputs, data)
+        running.remove("scale")
+
+    @proxify
+    def add(
+        a: ProxyParam[SpiderFile],
+        b: ProxyParam[SpiderFile],
+        outputs=Output(SpiderFile),
+    ):
+        _record("add", running)
+        data = np.array(spider.open_memmap(a)) + np.array(spider.open_memmap(b))
+        spider.write_volume(outputs, data)
+        running.remove("add")
+
+    @proxify
+    def split(
+        inputs: ProxyParam[SpiderFile],
+        positive=Output(SpiderFile),
+        negative=Output(SpiderFile),
+    ):
+        _record("split", running)
+        data = np.array(spider.open_memmap(inputs))
+        spider.write_volume(positive, data)
+        spider.write_volume(negative, -data)
+        running.remove("split")
+
+    return scale, add, split
+
+
+@pytest.fixture
+def new_container(tmp_path, wire_container):
+    def _new(**config) -> Container:
+        return wire_container(
+            {
+                "temp_files": {"fast_dir": "", "bulk_dir": str(tmp_path / "scratch")},
+                "executor": {"max_workers": 4},
+                **config,
+            },
+            modules=["scipion_bridge.core.utils.pipeline"],
+        )
+
+    return _new
+
+
+@pytest.fixture(autouse=True)
+def inputs(tmp_path):
+    calls.clear()
+    (tmp_path / "scratch").mkdir()
+
+    spider.write_volume(tmp_path / "map.vol", np.ones([4, 4, 4], dtype=np.float32))
+    return SpiderFile(tmp_path / "map.vol")
+
+
+def test_deferred_calls(inputs, new_container):
+    running = []
+    scale, add, split = _functions(running)
+    container = new_container()
+
+    peak = []
+
+    with scipion_bridge.pipeline() as graph:
+        half_a = scale(inputs, factor="2")
+        half_b = scale(inputs, factor="3")
+        total = add(half_a, half_b)
+
+        assert isinstance(total, Node)
+        assert calls == []
+
+        # Sample how many calls run at once
+        watcher = threading.Thread(
+            target=lambda: [
+                (peak.append(len(running)), time.sleep(0.01)) for _ in range(30)
+            ]
+        )
+        watcher.start()
+
+    watcher.join()
+    container.executor().shutdown()
+
+    assert sorted(calls) == ["add", "scale", "scale"]
+    assert calls[-1] == "add"
+
+    # Independent branches overlap
+    assert max(peak) == 2
+
+    assert isinstance(total.result(), SpiderFile)
+    assert np.array_equal(total.result()[:], np.full([4, 4, 4], 5))
+
+
+def test_free_intermediates(tmp_path, inputs, new_container):
+    scale, add, split = _functions([])
+    container = new_container()
+
+    with scipion_bridge.pipeline():
+        doubled = scale(inputs, factor="2")
+        kept = scale(doubled, factor="2").keep()
+        result = scale(kept, factor="2")
+
+    # Nothing but the pipeline referenced the intermediate file
+    assert doubled.state == NodeState.FREED
+    with pytest.raises(RuntimeError):
+        doubled.result()
+
+    container.deleter().wait(5.0)
+    files = {f.name for f in (tmp_path / "scratch").rglob("*.vol")}
+    assert files == {kept.result().path.name, result.result().path.name}
+    assert np.array_equal(result.result()[:], np.full([4, 4, 4], 8))
+
+
+def test_multiple_outputs(inputs, new_container):
+    scale, add, split = _functions([])
+    new_container()
+
+    with scipion_bridge.pipeline():
+        parts = split(inputs)
+        total = add(parts[0], parts[1])
+
+    assert np.array_equal(total.result()[:], np.zeros([4, 4, 4]))
+
+
+def test_skip_unchanged_subgraph(tmp_path, inputs, new_container):
+    new_container(call_cache={"directory": str(tmp_path / "cache")})
+
+    def _run(inputs):
+        scale, add, split = _functions([])
+        with scipion_bridge.pipeline():
+            doubled = scale(inputs, factor="2")
+            result = add(scale(doubled, factor="3"), doubled)
+
+        return result.result()
+
+    first = _run(inputs)
+    assert calls == ["scale", "scale", "add"]
+
+    # Only the final node is restored; the calls it consumes are skipped
+    calls.clear()
+    second = _run(inputs)
+    assert calls == []
+    assert np.array_equal(second[:], first[:])
+
+    spider.write_volume(tmp_path / "map.vol", np.zeros([4, 4, 4], dtype=np.float32))
+    os.utime(tmp_path / "map.vol", ns=(time.time_ns(), time.time_ns()))
+
+    calls.clear()
+    third = _run(inputs)
+    assert calls == ["scale", "scale", "add"]
+    assert np.array_equal(third[:], np.zeros([4, 4, 4]))
+
+
+def test_failed_node(inputs, new_container):
+    scale, add, split = _functions([])
+    new_container()
+
+    with pytest.raises(ValueError):
+        with scipion_bridge.pipeline():
+            failed = scale(inputs, factor="not a number")
+            result = add(failed, inputs)
+
+    assert "add" not in calls
+    with pytest.raises(RuntimeError):
+        result.result()
+
+
+def test_run_in_arena(tmp_path, inputs, new_container):
+    scale, add, split = _functions([])
+    new_container()
+
+    # Nodes see the arena the pipeline runs in
+    with scipion_bridge.arena():
+        with scipion_bridge.pipeline():
+            result = scale(inputs, factor="2")
+
+        arena_dir = result.result().path.parent
+        assert arena_dir.parent == scratch_directory(str(tmp_path / "scratch")).path
+
+    assert not arena_dir.exists()
@@ -0,0 +1,167 @@
+import os
+import json
+import stat
+import time
+from functools import partial
+
+from scipion_bridge.core.environment.container import Container
+from scipion_bridge.core.environment.scipion_env import ScipionEnvironment
+from scipion_bridge.core.utils.external_call import foreign_function, Domain
+
+import pytest
+
+# Sets up the environment like the Scipion launcher and counts its starts
+LAUNCHER = """#!/bin/sh
+echo started >> "{log}"
+echo "Scipion v3 ()"
+shift
+export PATH="{bin}:$PATH"
+export XMIPP_SETTING=configured
+exec "$@"
+"""
+
+PROGRAM = """#!/bin/sh
+echo "$XMIPP_SETTING $@" > "{output}"
+"""
+
+
+def _write_script(path, contents: str):
+    path.write_text(contents)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+
+
+@pytest.fixture
+def launcher(tmp_path, monkeypatch):
+    (tmp_path / "launcher").mkdir()
+    (tmp_path / "bin").mkdir()
+
+    _write_script(
+        tmp_path / "launcher" / "fakescipion",
+        LAUNCHER.format(log=tmp_path / "starts", bin=tmp_path / "bin"),
+    )
+    _write_script(
+        tmp_path / "bin" / "xmipp_fake_program",
+        PROGRAM.format(output=tmp_path / "output"),
+    )
+
+    monkeypatch.setenv("PATH", f"{tmp_path / 'launcher'}:{os.environ['PATH']}")
+    return ["fakescipion", "run"]
+
+
+def _starts(tmp_path) -> int:
+    try:
+        return len((tmp_path / "starts").read_text().splitlines())
+    except FileNotFoundError:
+        return 0
+
+
+def test_run_directly(tmp_path, launcher):
+    scipion_env = ScipionEnvironment(cache_dir=str(tmp_path / "cache"))
+
+    command, environment = scipion_env.command(launcher, "xmipp_fake_program")
+    assert command == [str(tmp_path / "bin" / "xmipp_fake_program")]
+    assert environment["XMIPP_SETTING"] == "configured"
+
+    # The environment is captured once per process
+    scipion_env.command(launcher, "xmipp_fake_program")
+    assert _starts(tmp_path) == 1
+
+    # and persisted across processes
+    other = ScipionEnvironment(cache_dir=str(tmp_path / "cache"))
+    assert other.environment(launcher) == environment
+    assert _starts(tmp_path) == 1
+
+
+def test_store_changes_only(tmp_path, launcher, monkeypatch):
+    monkeypatch.setenv("SECRET_TOKEN", "hunter2")
+    ScipionEnvironment(cache_dir=str(tmp_path / "cache")).environment(launcher)
+
+    # Only what the launcher set up is persisted
+    (cache_file,) = (tmp_path / "cache").iterdir()
+    changes = json.loads(cache_file.read_text())
+    assert changes["set"] == {"XMIPP_SETTING": "configured"}
+    assert changes["prepend"] == {"PATH": str(tmp_path / "bin")}
+    assert "hunter2" not in cache_file.read_text()
+
+    # and applied to the environment programs are started in
+    monkeypatch.setenv("SECRET_TOKEN", "changed")
+    monkeypatch.setenv("SLURM_JOB_ID", "42")
+
+    environment = ScipionEnvironment(cache_dir=str(tmp_path / "cache")).environment(
+        launcher
+    )
+    assert environment["SECRET_TOKEN"] == "changed"
+    assert environment["SLURM_JOB_ID"] == "42"
+    assert environment["PATH"] == f"{tmp_path / 'bin'}:{os.environ['PATH']}"
+    assert _starts(tmp_path) == 1
+
+
+def test_changed_install(tmp_path, launcher):
+    ScipionEnvironment(cache_dir=str(tmp_path / "cache")).environment(launcher)
+
+    # Updating the launcher changes its fingerprint
+    now = time.time_ns()
+    os.utime(tmp_path / "launcher" / "fakescipion", ns=(now, now + 10**9))
+
+    ScipionEnvironment(cache_dir=str(tmp_path / "cache")).environment(launcher)
+    assert _starts(tmp_path) == 2
+
+
+def test_fall_back_to_launcher(tmp_path, launcher):
+    scipion_env = ScipionEnvironment(cache_dir=str(tmp_path / "cache"))
+
+    assert scipion_env.command(launcher, "xmipp_missing") == (
+        [*launcher, "xmipp_missing"],
+        None,
+    )
+    assert scipion_env.command(["missing_launcher", "run"], "xmipp_program") == (
+        ["missing_launcher", "run", "xmipp_program"],
+        None,
+    )
+
+
+def test_direct_domain(tmp_path, launcher):
+    @partial(foreign_function, domain=Domain("FAKE", launcher, direct=True))
+    def xmipp_fake_program(inputs: str, *, value: int):
+        pass
+
+    container = Container()
+    container.config.from_dict({"scipion_env": {"cache_dir": str(tmp_path / "cache")}})
+    container.wire(modules=[__name__, "scipion_bridge.core.utils.external_call"])
+
+    xmipp_fake_program("/some/input", value=42)
+    xmipp_fake_program("/some/input", value=43)
+
+    assert _starts(tmp_path) == 1
+    assert (
+        tmp_path / "output"
+    ).read_text() == "configured -inputs /some/input --value 43\n"
+
+
+@pytest.mark.parametrize("direct", [False, True])
+def test_direct_from_config(tmp_path, launcher, mocker, direct: bool):
+    @partial(foreign_function, domain=Domain("FAKE", launcher))
+    def xmipp_fake_program(inputs: str):
+        pass
+
+    container = Container()
+    container.config.from_dict(
+        {"scipion_env": {"cache_dir": str(tmp_path / "cache"), "direct": direct}}
+    )
+    container.wire(modules=[__name__, "scipion_bridge.core.utils.external_call"])
+
+    exec_mock = mocker.Mock()
+    with container.shell_exec.override(exec_mock):
+        xmipp_fake_program("/some/input")
+
+    # Programs only run directly if enabled
+    command = exec_mock.call_args.args[2]
+    if direct:
+        assert command == [
+            str(tmp_path / "bin" / "xmipp_fake_program"),
+            "-inputs",
+            "/some/input",
+        ]
+    else:
+        assert command == [*launcher, "xmipp_fake_program", "-inputs", "/some/input"]
+        assert _starts(tmp_path) == 0
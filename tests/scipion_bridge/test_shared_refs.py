@@ -0,0 +1,113 @@
+import pickle
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from scipion_bridge.core.environment.temp_files import REFERENCES_SUFFIX
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed.proxy import SharedProxy
+from scipion_bridge.core.utils.arc import manager as arc_manager, update_shared_count
+
+import pytest
+
+pytestmark = pytest.mark.usefixtures("container")
+
+
+@pytest.fixture
+def executor():
+    # Forked workers inherit the wired container
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        yield executor
+
+
+def _total(shared: SharedProxy) -> float:
+    volume = shared.adopt()
+    return float(volume[:].sum())
+
+
+def _make_volume(value: float) -> SharedProxy:
+    volume = SpiderFile.from_numpy(np.full([4, 4, 4], value, dtype=np.float32))
+    return volume.share()
+
+
+def test_pickle_unmanaged(tmp_path):
+    volume = SpiderFile(tmp_path / "volume.vol")
+    copy = pickle.loads(pickle.dumps(volume))
+
+    assert copy.path == volume.path
+    assert copy.managed == False
+
+
+def test_pickle_managed():
+    volume = SpiderFile.from_numpy(np.ones([4, 4, 4], dtype=np.float32))
+
+    # Pickling alone never takes a reference
+    with pytest.raises(TypeError):
+        pickle.dumps(volume)
+
+    assert arc_manager.get_count(volume.path) == 1
+    assert not (volume.path.parent / f"{volume.path.name}{REFERENCES_SUFFIX}").exists()
+
+
+def test_share_in_process():
+    volume = SpiderFile.from_numpy(np.ones([4, 4, 4], dtype=np.float32))
+    copy = pickle.loads(pickle.dumps(volume.share())).adopt()
+
+    assert copy.path == volume.path
+    assert arc_manager.get_count(volume.path) == 2
+
+    path = volume.path
+    del volume
+    assert path.exists()
+
+    del copy
+    assert arc_manager.wait_for_deletions(timeout=5.0)
+    assert not path.exists()
+    assert not (path.parent / f"{path.name}{REFERENCES_SUFFIX}").exists()
+
+
+def test_pass_to_worker(executor):
+    volume = SpiderFile.from_numpy(np.full([4, 4, 4], 2.0, dtype=np.float32))
+    path = volume.path
+
+    assert executor.submit(_total, volume.share()).result() == 128.0
+    executor.shutdown(wait=True)
+
+    # The worker released its reference without deleting the file
+    assert path.exists()
+    assert update_shared_count(path, 0) == 1
+
+    del volume
+    assert arc_manager.wait_for_deletions(timeout=5.0)
+    assert not path.exists()
+
+
+def test_return_from_worker(executor):
+    volume = executor.submit(_make_volume, 3.0).result().adopt()
+    executor.shutdown(wait=True)
+
+    assert volume.managed == True
+    assert np.array_equal(volume[:], np.full([4, 4, 4], 3.0))
+
+    path = volume.path
+    del volume
+    assert arc_manager.wait_for_deletions(timeout=5.0)
+    assert not path.exists()
+
+
+def test_share_without_flock(monkeypatch):
+    from scipion_bridge.core.utils import arc
+
+    # Platforms without flock can use everything but sharing
+    monkeypatch.setattr(arc, "fcntl", None)
+
+    volume = SpiderFile.from_numpy(np.ones([4, 4, 4], dtype=np.float32))
+    with pytest.raises(NotImplementedError):
+        volume.share()
+
+    path = volume.path
+    del volume
+    assert arc_manager.wait_for_deletions(timeout=5.0)
+    assert not path.exists()
@@ -0,0 +1,171 @@
+import os
+import numpy as np
+
+from scipion_bridge.core.environment.temp_files import (
+    Tier,
+    TemporaryFilesProvider,
+    scratch_directory,
+)
+from scipion_bridge.core.environment.budget import ScratchBudget
+from scipion_bridge.core.typed.volume import SpiderFile
+from scipion_bridge.core.typed.proxy import Output, proxify
+from scipion_bridge.core.typed import common
+
+import pytest
+
+
+@pytest.fixture
+def tier_dirs(tmp_path):
+    (tmp_path / "fast").mkdir()
+    (tmp_path / "bulk").mkdir()
+
+    return tmp_path / "fast", tmp_path / "bulk"
+
+
+def test_select_tier(tier_dirs):
+    fast_dir, bulk_dir = tier_dirs
+    provider = TemporaryFilesProvider(
+        fast_dir=str(fast_dir), bulk_dir=str(bulk_dir), fast_max_bytes=1024
+    )
+
+    small = provider.new_temporary_file(".vol", expected_size=512)
+    large = provider.new_temporary_file(".vol", expected_size=4096)
+    unknown = provider.new_temporary_file(".vol")
+
+    assert small.parent.parent == fast_dir
+    assert large.parent.parent == bulk_dir
+    assert unknown.parent.parent == bulk_dir
+
+    # Names are only reserved
+    assert not small.exists()
+
+    assert provider.tier_of(small) == Tier.FAST
+    assert provider.tier_of(large) == Tier.BULK
+    assert provider.tier_of("/some/other/file.vol") is None
+
+    for path in (small, large, unknown):
+        path.touch()
+        provider.delete(path)
+        assert not path.exists()
+
+
+def test_disable_fast_tier(tier_dirs):
+    _, bulk_dir = tier_dirs
+    provider = TemporaryFilesProvider(fast_dir="", bulk_dir=str(bulk_dir))
+
+    path = provider.new_temporary_file(".vol", expected_size=1)
+    assert path.parent.parent == bulk_dir
+
+    provider.delete(path)
+
+
+def test_tier_from_config(tier_dirs, wire_container):
+    fast_dir, bulk_dir = tier_dirs
+
+    container = wire_container(
+        {
+            "temp_files": {
+                "fast_dir": str(fast_dir),
+                "bulk_dir": str(bulk_dir),
+                "fast_max_bytes": 64 * 1024,
+            }
+        }
+    )
+
+    mask = SpiderFile.from_numpy(np.zeros([16, 16, 16], dtype=np.float32))
+    volume = SpiderFile.from_numpy(np.zeros([64, 64, 64], dtype=np.float32))
+
+    assert mask.path.parent.parent == fast_dir
+    assert mask.tier == Tier.FAST
+    assert volume.path.parent.parent == bulk_dir
+    assert volume.tier == Tier.BULK
+
+    assert SpiderFile(mask.path).tier is None
+
+
+def test_recycle_slots(tier_dirs):
+    _, bulk_dir = tier_dirs
+    provider = TemporaryFilesProvider(fast_dir="", bulk_dir=str(bulk_dir))
+
+    first = provider.new_temporary_file(".vol")
+    second = provider.new_temporary_file(".vol")
+    assert first != second
+    assert first.parent == second.parent == scratch_directory(str(bulk_dir)).path
+
+    provider.delete(first)
+    assert provider.new_temporary_file(".vol") == first
+    assert provider.new_temporary_file(".vol") not in (first, second)
+
+    # Programs add their own extension to untyped files, so those names are
+    # never handed out twice
+    untyped = provider.new_temporary_file("")
+    provider.delete(untyped)
+    assert provider.new_temporary_file("") != untyped
+
+
+def test_release_before_recycling(tier_dirs):
+    _, bulk_dir = tier_dirs
+    budget = ScratchBudget()
+    provider = TemporaryFilesProvider(
+        fast_dir="", bulk_dir=str(bulk_dir), budget=budget
+    )
+
+    path = provider.new_temporary_file(".vol", expected_size=100)
+
+    # Another thread reserving a file while the old one is being released
+    reserved = []
+    release = budget.release
+
+    def _release(released):
+        reserved.append(provider.new_temporary_file(".vol", expected_size=50))
+        release(released)
+
+    budget.release = _release
+    provider.delete(path)
+
+    # gets a new name, whose entries survive the release of the old file
+    assert reserved[0] != path
+    assert budget.metrics().total.live_bytes == 50
+    assert budget.metrics().total.live_files == 1
+
+
+def test_preallocate(tier_dirs):
+    _, bulk_dir = tier_dirs
+    provider = TemporaryFilesProvider(fast_dir="", bulk_dir=str(bulk_dir))
+
+    path = provider.new_temporary_file(
+        ".vol", expected_size=1024 * 1024, preallocate=True
+    )
+    assert path.stat().st_size == 1024 * 1024
+
+    volume = SpiderFile.from_numpy(np.ones([8, 8, 8], dtype=np.float32))
+    assert np.array_equal(volume[:], np.ones([8, 8, 8]))
+    assert volume.path.stat().st_size == 1024 + 8 * 8 * 8 * 4
+
+
+def test_output_size_hint(tier_dirs, wire_container):
+    fast_dir, bulk_dir = tier_dirs
+
+    container = wire_container(
+        {
+            "temp_files": {
+                "fast_dir": str(fast_dir),
+                "bulk_dir": str(bulk_dir),
+                "fast_max_bytes": 1024 * 1024,
+            }
+        }
+    )
+
+    @proxify
+    def foo(
+        outputs=Output(SpiderFile, size_hint=lambda args: args["size"] ** 3 * 4),
+        *,
+        size: int
+    ):
+        pass
+
+    small = foo(size=16)
+    large = foo(size=128)
+
+    assert small.tier == Tier.FAST
+    assert large.tier == Tier.BULK
@@ -0,0 +1,43 @@
+import numpy as np
+from pathlib import Path
+
+from scipion_bridge.core.typed.proxy import Proxy
+from scipion_bridge.core.typed.array import ArrayConvertable
+from scipion_bridge.core.typed.resolve import current_registry
+
+
+class ConvertableFile(Proxy, ArrayConvertable):
+
+    @classmethod
+    def file_ext(cls):
+        return ".convertable"
+
+    @classmethod
+    def from_numpy(cls, data: np.ndarray):
+        return cls(Path("/path/to/array.convertable"))
+
+
+class ReadOnlyFile(Proxy, ArrayConvertable):
+
+    @classmethod
+    def file_ext(cls):
+        return ".readonly"
+
+
+def test_registered_at_class_creation():
+    graph = current_registry().graph
+
+    assert graph.has_edge(np.ndarray, ConvertableFile)
+    assert not graph.has_edge(np.ndarray, ReadOnlyFile)
+
+    resolved = current_registry().resolve(np.zeros(4), astype=ConvertableFile)
+    assert str(resolved.path) == "/path/to/array.convertable"
+
+
+def test_construction_does_not_register(mocker):
+    add_resolver = mocker.spy(current_registry(), "add_resolver")
+
+    for _ in range(10):
+        ConvertableFile(Path("/path/to/array.convertable"))
+
+    add_resolver.assert_not_called()
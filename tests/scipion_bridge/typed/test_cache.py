@@ -0,0 +1,130 @@
+import numpy as np
+
+from scipion_bridge.core.typed.proxy import Proxy
+from scipion_bridge.core.typed.array import ArrayConvertable
+from scipion_bridge.core.typed.cache import ArrayCache, array_cache, fingerprint
+from scipion_bridge.core.environment.temp_files import TemporaryFilesProvider
+
+import pytest
+
+
+class RawFile(Proxy, ArrayConvertable):
+
+    cache_array = True
+    decoded = 0
+
+    @classmethod
+    def file_ext(cls):
+        return ".raw"
+
+    def to_numpy(self):
+        RawFile.decoded += 1
+        return np.fromfile(self.path, dtype=np.float32)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    array_cache.clear()
+    RawFile.decoded = 0
+
+    yield
+
+    array_cache.clear()
+
+
+def test_repeated_access_decodes_once(tmp_path):
+    path = tmp_path / "data.raw"
+    np.arange(16, dtype=np.float32).tofile(path)
+
+    proxy = RawFile(path)
+
+    assert np.count_nonzero(proxy) == 15
+    data = np.array(proxy)
+
+    assert RawFile.decoded == 1
+    assert np.array_equal(data, np.arange(16))
+
+    # Copies are writable while the cached array is not
+    data[0] = 42
+    assert np.asarray(proxy)[0] == 0
+    with pytest.raises(ValueError):
+        np.asarray(proxy)[0] = 42
+
+
+def test_cache_invalidated_by_file_change(tmp_path):
+    path = tmp_path / "data.raw"
+    np.zeros(16, dtype=np.float32).tofile(path)
+
+    proxy = RawFile(path)
+    assert np.count_nonzero(proxy) == 0
+
+    np.ones(32, dtype=np.float32).tofile(path)
+    assert np.count_nonzero(proxy) == 32
+
+    assert RawFile.decoded == 2
+
+
+def test_cache_can_be_disabled_per_proxy(tmp_path):
+    path = tmp_path / "data.raw"
+    np.zeros(16, dtype=np.float32).tofile(path)
+
+    proxy = RawFile(path)
+    proxy.cache_array = False
+
+    np.asarray(proxy)
+    np.asarray(proxy)
+
+    assert RawFile.decoded == 2
+    assert len(array_cache) == 0
+
+
+def test_lru_budget(tmp_path):
+    cache = ArrayCache(max_bytes=3 * 64)
+
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"data_{i}.raw"
+        path.write_bytes(b"\x00" * 64)
+        paths.append(path)
+
+    for i, path in enumerate(paths[:3]):
+        cache.put(i, fingerprint(path), np.zeros(16, dtype=np.float32))
+
+    assert cache.get(0, paths[0]) is not None  # Marks 0 as recently used
+
+    cache.put(3, fingerprint(paths[3]), np.zeros(16, dtype=np.float32))
+
+    assert cache.get(1, paths[1]) is None
+    assert cache.get(0, paths[0]) is not None
+    assert cache.current_bytes == 3 * 64
+
+    cache.max_bytes = 64
+    assert len(cache) == 1
+    assert cache.current_bytes == 64
+
+    # Arrays larger than the budget are returned but never cached
+    cache.put(4, fingerprint(paths[0]), np.zeros(32, dtype=np.float32))
+    assert cache.get(4, paths[0]) is None
+
+    # and stay writable
+    data = np.zeros(32, dtype=np.float32)
+    cache.put(4, fingerprint(paths[0]), data)
+    assert data.flags.writeable
+
+
+def test_invalidated_by_temporary_files(tmp_path):
+    provider = TemporaryFilesProvider(fast_dir="", bulk_dir=str(tmp_path))
+
+    path = provider.new_temporary_file(".raw")
+    np.zeros(16, dtype=np.float32).tofile(path)
+    np.asarray(RawFile(path))
+
+    provider.delete(path)
+    assert len(array_cache) == 0
+
+    # A new file with the same name and the same fingerprint is decoded again
+    np.ones(16, dtype=np.float32).tofile(path)
+    assert np.count_nonzero(RawFile(path)) == 16
+
+    provider.moved(path, tmp_path / "moved.raw")
+    assert len(array_cache) == 0
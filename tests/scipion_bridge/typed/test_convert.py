@@ -0,0 +1,70 @@
+import numpy as np
+from pathlib import Path
+
+from scipion_bridge.core.typed import mrc, spider
+from scipion_bridge.core.typed.proxy import ProxyParam, proxify
+from scipion_bridge.core.typed.volume import MRCFile, SpiderFile
+from scipion_bridge.core.typed.resolve import current_registry
+
+import mrcfile
+import pytest
+
+pytestmark = pytest.mark.usefixtures("container")
+
+
+def test_mrc_to_spider(tmp_path):
+    data = np.random.uniform(size=[6, 8, 10]).astype(np.float32)
+    mrc.write_volume(tmp_path / "map.mrc", data, voxel_size=1.5)
+
+    volume = current_registry().resolve(
+        MRCFile(tmp_path / "map.mrc"), astype=SpiderFile
+    )
+    assert isinstance(volume, SpiderFile)
+    assert volume.managed == True
+
+    header = spider.read_header(volume.path)
+    assert header.shape == data.shape
+    assert header.sampling == 1.5
+    assert np.array_equal(spider.open_memmap(volume.path), data)
+
+
+def test_mrc_to_spider_with_conversion(tmp_path):
+    data = np.random.randint(-100, 100, size=[4, 5, 6]).astype(np.int8)
+
+    with mrcfile.new(tmp_path / "map.mrc") as f:
+        f.set_data(np.ascontiguousarray(data.transpose(2, 0, 1)))
+        f.header.mapc, f.header.mapr, f.header.maps = 2, 3, 1
+
+    volume = current_registry().resolve(
+        MRCFile(tmp_path / "map.mrc"), astype=SpiderFile
+    )
+
+    assert np.array_equal(spider.open_memmap(volume.path), data)
+
+
+def test_spider_to_mrc(tmp_path):
+    data = np.random.uniform(size=[6, 8, 10]).astype(np.float32)
+    spider.write_volume(tmp_path / "volume.vol", data, sampling=2.0)
+
+    volume = current_registry().resolve(
+        SpiderFile(tmp_path / "volume.vol"), astype=MRCFile
+    )
+
+    with mrcfile.open(volume.path, permissive=False) as f:
+        assert np.array_equal(f.data, data)
+        assert f.voxel_size.x == pytest.approx(2.0)
+
+
+def test_route_map_path_to_spider(tmp_path):
+    data = np.random.uniform(size=[4, 4, 4]).astype(np.float32)
+    mrc.write_volume(tmp_path / "emd_1234.map", data)
+
+    @proxify
+    def foo(inputs: ProxyParam[SpiderFile]):
+        assert inputs.endswith(".vol")
+        assert np.array_equal(spider.open_memmap(inputs), data)
+
+    foo(Path(tmp_path / "emd_1234.map"))
+
+    with pytest.raises(TypeError):
+        foo(Path(tmp_path / "unknown.extension"))
@@ -0,0 +1,98 @@
+import numpy as np
+from pathlib import Path
+
+from scipion_bridge.core.typed import mrc
+from scipion_bridge.core.typed.proxy import FuncParam, ProxyParam, proxify
+from scipion_bridge.core.typed.volume import MRCFile, MapFile, SpiderFile
+from scipion_bridge.core.typed.resolve import current_registry
+
+import mrcfile
+import pytest
+
+
+def test_read_mrcfile_output(tmp_path):
+    data = np.random.uniform(size=[6, 8, 10]).astype(np.float32)
+
+    with mrcfile.new(tmp_path / "map.mrc") as f:
+        f.set_data(data)
+        f.voxel_size = (1.5, 2.0, 2.5)
+        f.header.origin = (1.0, 2.0, 3.0)
+
+    header = mrc.read_header(tmp_path / "map.mrc")
+
+    assert header.shape == (6, 8, 10)
+    assert header.dtype == np.float32
+    assert header.voxel_size == (1.5, 2.0, 2.5)
+    assert header.origin == (1.0, 2.0, 3.0)
+
+    assert np.array_equal(mrc.open_memmap(tmp_path / "map.mrc"), data)
+    assert np.array_equal(
+        mrc.read_region(tmp_path / "map.mrc", slice(1, 3), 4), data[1:3, 4]
+    )
+
+
+def test_read_non_standard_layouts(tmp_path):
+    data = np.random.randint(-100, 100, size=[4, 5, 6]).astype(np.int8)
+
+    # Stored with sections along X, rows along Z and columns along Y
+    stored = data.transpose(2, 0, 1)
+    with mrcfile.new(tmp_path / "map.mrc") as f:
+        f.set_data(np.ascontiguousarray(stored))
+        f.header.mapc, f.header.mapr, f.header.maps = 2, 3, 1
+
+    assert np.array_equal(mrc.open_memmap(tmp_path / "map.mrc"), data)
+
+    # Big endian file
+    header = mrc.make_header(data.shape, dtype=np.float32)
+    header["machst"] = (0x11, 0x11, 0, 0)
+    raw = header.byteswap().tobytes() + data.astype(">f4").tobytes()
+    (tmp_path / "big_endian.mrc").write_bytes(raw)
+
+    region = mrc.read_region(tmp_path / "big_endian.mrc", 2)
+    assert region.dtype == np.float32
+    assert np.array_equal(region, data[2])
+
+
+def test_write_readable_by_mrcfile(tmp_path):
+    data = np.random.uniform(size=[5, 7, 9]).astype(np.float32)
+
+    mrc.write_volume(
+        tmp_path / "map.mrc", iter(data), shape=data.shape, voxel_size=1.25
+    )
+
+    with mrcfile.open(tmp_path / "map.mrc", permissive=False) as f:
+        assert np.array_equal(f.data, data)
+        assert f.voxel_size.x == pytest.approx(1.25)
+
+
+def test_mrc_proxy(container):
+    data = np.random.uniform(size=[8, 8, 8]).astype(np.float32)
+
+    volume = current_registry().resolve(data, astype=MRCFile)
+    assert isinstance(volume, MRCFile)
+    assert volume.path.suffix == ".mrc"
+
+    assert np.array_equal(volume[2:4], data[2:4])
+    assert np.array_equal(volume.read_region(x=3), data[:, :, 3])
+
+    mapped = volume.to_numpy()
+    assert isinstance(mapped, np.memmap)
+    assert not mapped.flags.writeable
+
+    del mapped, volume
+
+
+def test_resolve_paths_and_arrays(container, tmp_path):
+
+    @proxify
+    def foo(inputs: ProxyParam[MapFile], spider: ProxyParam[SpiderFile]):
+        assert inputs == str(tmp_path / "emd_1234.map")
+        assert spider.endswith(".vol")
+
+    mrc.write_volume(tmp_path / "emd_1234.map", np.zeros([4, 4, 4]))
+
+    # Arrays still resolve to Spider files by default
+    foo(Path(tmp_path / "emd_1234.map"), np.zeros([4, 4, 4]))
+
+    param = current_registry().resolve(np.zeros([4, 4, 4]), astype=FuncParam)
+    assert param.dtype is SpiderFile
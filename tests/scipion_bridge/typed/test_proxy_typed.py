@@ -29,7 +29,9 @@ class TempFileMock:
     def __init__(self):
         self.count = 0
 
-    def new_temporary_file(self, suffix: str) -> os.PathLike:
+    def new_temporary_file(
+        self, suffix: str, expected_size=None, preallocate=False
+    ) -> os.PathLike:
         file = f"/tmp/temp_file_{self.count}{suffix}"
         self.count += 1
 
@@ -38,6 +40,9 @@ class TempFileMock:
     def delete(self, path: os.PathLike):
         pass
 
+    def complete(self, path: os.PathLike):
+        pass
+
 
 class Volume(Proxy):
 
@@ -386,5 +391,54 @@ def test_named_proxy():
         foo(Path("/path/to/position.pos"))
 
 
+def test_func_param_keeps_proxy_alive():
+
+    container = Container()
+    container.wire(
+        modules=[
+            __name__,
+            "scipion_bridge.core.typed.proxy",
+            "scipion_bridge.core.utils.arc",
+        ]
+    )
+
+    temp_file_mock = TempFileMock()
+
+    with container.temp_file_provider.override(temp_file_mock):
+        volume = Volume.new_temporary_proxy()
+        path = volume.path
+
+        assert arc_manager.get_count(path) == 1
+
+        param = current_registry().resolve(volume, astype=proxy.FuncParam)
+        assert param.owner is volume
+        assert not hasattr(param, "__dict__")
+
+        del volume
+        assert arc_manager.get_count(path) == 1  # Still referenced by param
+
+        del param
+        assert not arc_manager.is_tracked(path)
+
+
+def test_resolve_shared_extension_deterministically():
+    # Defined out of alphabetical order on purpose
+    ZetaFile = namedproxy("ZetaFile", file_ext=".shared")
+    AlphaFile = namedproxy("AlphaFile", file_ext=".shared")
+    TargetFile = namedproxy("TargetFile", file_ext=".target")
+
+    registry = current_registry()
+    registry.add_resolver(ZetaFile, TargetFile, lambda x: TargetFile(Path("zeta")))
+    registry.add_resolver(AlphaFile, TargetFile, lambda x: TargetFile(Path("alpha")))
+
+    # Paths with another extension resolve through the proxy type for their
+    # extension; ties are broken by name, not by definition order
+    resolved = registry.resolve(Path("volume.shared"), astype=TargetFile)
+    assert resolved.path == Path("alpha")
+
+    with pytest.raises(TypeError):
+        registry.resolve(Path("volume.unknown"), astype=TargetFile)
+
+
 if __name__ == "__main__":
     test_named_proxy()
@@ -28,6 +28,17 @@ def test_basic_resolve():
     assert resolved == "2.5"
 
 
+def test_resolve_tuple_to_words():
+    @resolve.resolve_params
+    def foo(bar: resolve.Resolve[str]):
+        return bar
+
+    # Programs started without a shell receive the items as separate words
+    r = foo(("below", 0.1))
+    assert r == "below 0.1"
+    assert r.words == ("below", "0.1")
+
+
 def test_resolve_faulty_resolver():
     registry = resolve.Registry()
     registry.add_resolver(object, str, lambda x: int(x))  # Returns wrong type here
@@ -0,0 +1,134 @@
+import numpy as np
+
+from scipion_bridge.core.typed import spider
+from scipion_bridge.core.typed.volume import SpiderFile
+
+from xmipp_metadata.image_handler import ImageSpider
+
+import pytest
+
+
+def _read_with_backend(path) -> np.ndarray:
+    image = ImageSpider(str(path))
+    data = np.stack([image.read_image(i) for i in range(len(image))])
+    image.close()
+
+    return data
+
+
+def test_header_matches_backend(tmp_path):
+    data = np.random.uniform(size=[4, 16, 16]).astype(np.float32)
+
+    spider.write_volume(tmp_path / "new.vol", data, sampling=2.5)
+    ImageSpider().write(data, filename=str(tmp_path / "backend.vol"), sr=2.5)
+
+    new = np.fromfile(tmp_path / "new.vol", dtype=np.float32)
+    backend = np.fromfile(tmp_path / "backend.vol", dtype=np.float32)
+
+    # Only the statistics words (IMAMI, FMAX, FMIN, AV, SIG) are filled in
+    assert np.array_equal(
+        np.delete(new, range(5, 10)), np.delete(backend, range(5, 10))
+    )
+    assert new[5] == 1.0
+    assert new[6] == pytest.approx(data.max())
+    assert new[7] == pytest.approx(data.min())
+
+
+def test_write_array(tmp_path):
+    data = np.random.uniform(size=[32, 24, 24]).astype(np.float32)
+
+    spider.write_volume(tmp_path / "volume.vol", data, max_workers=4)
+
+    assert np.array_equal(_read_with_backend(tmp_path / "volume.vol"), data)
+
+
+def test_write_slabs(tmp_path):
+    data = np.random.uniform(size=[10, 8, 8]).astype(np.float32)
+
+    def _slabs():
+        yield data[:3]
+        yield data[3]  # Single slices can be passed as 2D arrays
+        yield data[4:]
+
+    spider.write_volume(tmp_path / "volume.vol", _slabs(), shape=data.shape)
+
+    assert np.array_equal(_read_with_backend(tmp_path / "volume.vol"), data)
+
+
+def test_write_slabs_with_wrong_shape(tmp_path):
+    data = np.zeros([4, 8, 8], dtype=np.float32)
+
+    with pytest.raises(ValueError):
+        spider.write_volume(tmp_path / "volume.vol", iter(data))
+
+    with pytest.raises(ValueError):
+        spider.write_volume(tmp_path / "volume.vol", iter(data), shape=(5, 8, 8))
+
+    with pytest.raises(ValueError):
+        spider.write_volume(tmp_path / "volume.vol", iter(data), shape=(4, 8, 6))
+
+
+def test_spider_from_numpy(container):
+    data = np.random.uniform(size=[8, 16, 16])
+
+    volume = SpiderFile.from_numpy(iter(data), shape=data.shape)
+    assert volume.managed == True
+
+    assert np.allclose(_read_with_backend(volume.path), data)
+
+    del volume
+
+
+def test_read_header(tmp_path):
+    data = np.zeros([6, 10, 12], dtype=np.float32)
+    spider.write_volume(tmp_path / "volume.vol", data, sampling=1.5)
+
+    header = spider.read_header(tmp_path / "volume.vol")
+
+    assert header.shape == (6, 10, 12)
+    assert header.sampling == 1.5
+    assert header.offset == spider.make_header(data.shape).nbytes
+
+    (tmp_path / "invalid.vol").write_bytes(b"\x00" * 2048)
+    with pytest.raises(ValueError):
+        spider.read_header(tmp_path / "invalid.vol")
+
+
+def test_origin_words(tmp_path):
+    data = np.zeros([6, 10, 12], dtype=np.float32)
+    spider.write_volume(tmp_path / "volume.vol", data, origin=(1.0, 2.0, 3.0))
+
+    # XOFF, YOFF and ZOFF are the (1-based) words 18 to 20 of the header
+    words = np.fromfile(tmp_path / "volume.vol", dtype=np.float32, count=256)
+    assert tuple(words[17:20]) == (1.0, 2.0, 3.0)
+
+    assert spider.read_header(tmp_path / "volume.vol").origin == (1.0, 2.0, 3.0)
+
+
+def test_read_region(tmp_path):
+    data = np.random.uniform(size=[12, 10, 14]).astype(np.float32)
+    spider.write_volume(tmp_path / "volume.vol", data)
+
+    region = spider.read_region(
+        tmp_path / "volume.vol", slice(2, 5), slice(None), slice(3, 9, 2)
+    )
+    assert np.array_equal(region, data[2:5, :, 3:9:2])
+
+    # Volumes written with the opposite byte order are read transparently
+    header = spider.make_header(data.shape).byteswap()
+    swapped = np.concatenate([header, data.ravel().byteswap()])
+    swapped.tofile(tmp_path / "swapped.vol")
+
+    region = spider.read_region(tmp_path / "swapped.vol", 4)
+    assert np.array_equal(region, data[4])
+
+
+def test_spider_slices(container):
+    data = np.random.uniform(size=[8, 16, 16]).astype(np.float32)
+    volume = SpiderFile.from_numpy(data)
+
+    assert np.array_equal(volume[3], data[3])
+    assert np.array_equal(volume[:, 4:8, -1], data[:, 4:8, -1])
+    assert np.array_equal(volume.read_region(z=1, x=slice(2, 4)), data[1, :, 2:4])
+
+    del volume
@@ -0,0 +1,107 @@
+import numpy as np
+from pathlib import Path
+
+from scipion_bridge.core.typed import mrc, spider
+from scipion_bridge.core.typed.proxy import ProxyParam, proxify
+from scipion_bridge.core.typed.stack import MRCStack, SpiderStack
+from scipion_bridge.core.typed.resolve import current_registry
+
+from xmipp_metadata.image_handler import ImageSpider
+
+import mrcfile
+import pytest
+
+pytestmark = pytest.mark.usefixtures("container")
+
+
+def test_spider_stack_readable_by_backend(tmp_path):
+    images = [np.random.uniform(size=[16, 16]).astype(np.float32) for _ in range(5)]
+
+    spider.write_stack(
+        tmp_path / "images.stk", images, shape=(1, 16, 16), n_images=5, sampling=2.0
+    )
+
+    backend = ImageSpider(str(tmp_path / "images.stk"))
+    assert len(backend) == 5
+    assert np.array_equal(backend[3], images[3])
+
+    header = spider.read_stack_header(tmp_path / "images.stk")
+    assert header.shape == (1, 16, 16)
+    assert header.n_images == 5
+    assert header.sampling == 2.0
+
+    with pytest.raises(ValueError):
+        spider.read_header(tmp_path / "images.stk")
+
+
+def test_read_backend_stack(tmp_path):
+    data = np.random.uniform(size=[4, 12, 12]).astype(np.float32)
+    ImageSpider().write(data, filename=str(tmp_path / "images.stk"))
+
+    stack = SpiderStack(tmp_path / "images.stk")
+    assert len(stack) == 4
+    assert stack.shape == (12, 12)
+    assert np.array_equal(stack[2], data[2])
+    assert np.array_equal(stack[1:3], data[1:3])
+
+
+@pytest.mark.parametrize("stack_type", [SpiderStack, MRCStack])
+def test_pack_arrays(stack_type):
+    images = [np.random.uniform(size=[6, 8]).astype(np.float32) for _ in range(10)]
+
+    stack = current_registry().resolve(images, astype=stack_type)
+    assert isinstance(stack, stack_type)
+    assert stack.managed == True
+
+    assert len(stack) == 10
+    assert stack.shape == (6, 8)
+    assert np.array_equal(stack[7], images[7])
+    assert np.array_equal(np.asarray(stack), np.stack(images))
+    assert all(np.array_equal(a, b) for a, b in zip(stack, images))
+
+
+def test_volume_stacks():
+    volumes = [np.random.uniform(size=[3, 4, 5]).astype(np.float32) for _ in range(4)]
+
+    stack = SpiderStack.from_arrays(volumes)
+    assert stack.shape == (3, 4, 5)
+    assert np.array_equal(stack[2], volumes[2])
+
+    stack = MRCStack.from_arrays(volumes, voxel_size=1.5)
+    assert stack.shape == (3, 4, 5)
+    assert np.array_equal(stack[2], volumes[2])
+
+    with mrcfile.open(stack.path, permissive=False) as f:
+        assert f.is_volume_stack()
+        assert f.voxel_size.z == pytest.approx(1.5)
+        assert np.array_equal(f.data[1], volumes[1])
+
+
+def test_mrc_image_stack_readable_by_mrcfile(tmp_path):
+    images = [np.random.uniform(size=[6, 8]).astype(np.float32) for _ in range(3)]
+    mrc.write_stack(tmp_path / "images.mrcs", images, shape=(1, 6, 8), n_images=3)
+
+    with mrcfile.open(tmp_path / "images.mrcs", permissive=False) as f:
+        assert f.is_image_stack()
+        assert np.array_equal(f.data, np.stack(images))
+
+
+def test_invalid_lists():
+    with pytest.raises(ValueError):
+        SpiderStack.from_arrays([np.zeros([4, 4]), np.zeros([4, 5])])
+
+    with pytest.raises(ValueError):
+        SpiderStack.from_arrays([])
+
+    with pytest.raises(TypeError):
+        SpiderStack.from_arrays(["not", "arrays"])
+
+
+def test_pass_list_as_stack():
+
+    @proxify
+    def foo(images: ProxyParam[SpiderStack]):
+        assert images.endswith(".stk")
+        assert len(SpiderStack(Path(images))) == 3
+
+    foo([np.zeros([4, 4]) for _ in range(3)])
@@ -0,0 +1,112 @@
+import numpy as np
+
+from scipion_bridge.core.typed import mrc, spider
+from scipion_bridge.core.typed.stats import (
+    StatisticsAccumulator,
+    read_sidecar,
+    sidecar_path,
+)
+from scipion_bridge.core.typed.volume import MRCFile, SpiderFile
+from scipion_bridge.core.typed.resolve import current_registry
+from scipion_bridge.core.utils.arc import manager as arc_manager
+
+import mrcfile
+import pytest
+
+pytestmark = pytest.mark.usefixtures("container")
+
+
+def _assert_statistics(statistics, data):
+    assert statistics.minimum == pytest.approx(data.min())
+    assert statistics.maximum == pytest.approx(data.max())
+    assert statistics.mean == pytest.approx(data.mean(dtype=np.float64))
+    assert statistics.std == pytest.approx(data.std(dtype=np.float64))
+    assert statistics.nonzero == np.count_nonzero(data)
+    assert statistics.count == data.size
+
+
+def test_accumulator_merges_slabs_in_any_order():
+    data = np.random.normal(3.0, 2.0, size=[12, 5, 5]).astype(np.float32)
+
+    accumulator = StatisticsAccumulator()
+    for z in (7, 0, 3, 10):
+        accumulator.update(data[z : z + 3] if z != 10 else data[10:])
+    accumulator.update(data[6:7])
+
+    _assert_statistics(accumulator.result(), data)
+
+
+def test_header_metadata(tmp_path):
+    data = np.zeros([4, 6, 8], dtype=np.float32)
+
+    spider.write_volume(tmp_path / "volume.vol", data, sampling=1.5, origin=(1, 2, 3))
+    volume = SpiderFile(tmp_path / "volume.vol")
+
+    assert volume.shape == (4, 6, 8)
+    assert volume.dtype == np.float32
+    assert volume.sampling == 1.5
+    assert volume.origin == (1.0, 2.0, 3.0)
+
+    mrc.write_volume(tmp_path / "map.mrc", data, voxel_size=2.0, origin=(4, 5, 6))
+    volume = MRCFile(tmp_path / "map.mrc")
+
+    assert volume.shape == (4, 6, 8)
+    assert volume.sampling == 2.0
+    assert volume.origin == (4.0, 5.0, 6.0)
+
+
+@pytest.mark.parametrize("proxy_type", [SpiderFile, MRCFile])
+def test_from_numpy_writes_sidecar(proxy_type, mocker):
+    data = np.random.uniform(size=[16, 8, 8]).astype(np.float32)
+    data[data < 0.5] = 0.0
+
+    volume = proxy_type.from_numpy(data)
+    assert sidecar_path(volume.path).exists()
+
+    # Statistics come from the sidecar without reading the voxels
+    spy = mocker.spy(type(volume), "open_memmap")
+    _assert_statistics(volume.statistics(), data)
+    assert spy.call_count == 0
+
+    sidecar = sidecar_path(volume.path)
+    del volume
+    arc_manager.wait_for_deletions()
+    assert not sidecar.exists()
+
+
+def test_statistics_in_headers(tmp_path):
+    data = np.random.uniform(-1, 1, size=[5, 6, 7]).astype(np.float32)
+    mrc.write_volume(tmp_path / "map.mrc", data)
+
+    with mrcfile.open(tmp_path / "map.mrc", permissive=False) as f:
+        assert f.header.dmin == pytest.approx(data.min())
+        assert f.header.dmax == pytest.approx(data.max())
+        assert f.header.rms == pytest.approx(data.std(), rel=1e-5)
+
+
+def test_statistics_of_unmanaged_files(tmp_path):
+    data = np.random.uniform(size=[6, 6, 6]).astype(np.float32)
+    spider.write_volume(tmp_path / "volume.vol", data)
+
+    volume = SpiderFile(tmp_path / "volume.vol")
+    _assert_statistics(volume.statistics(), data)
+
+    # Files we don't own get no sidecar
+    assert not sidecar_path(tmp_path / "volume.vol").exists()
+
+
+def test_stale_sidecar_is_ignored(tmp_path):
+    volume = SpiderFile.from_numpy(np.ones([4, 4, 4], dtype=np.float32))
+    assert volume.statistics().nonzero == 64
+
+    spider.write_volume(volume.path, np.zeros([4, 4, 5], dtype=np.float32))
+    assert read_sidecar(volume.path) is None
+    assert volume.statistics().nonzero == 0
+
+
+def test_conversion_keeps_statistics():
+    data = np.random.uniform(size=[4, 4, 4]).astype(np.float32)
+
+    volume = current_registry().resolve(MRCFile.from_numpy(data), astype=SpiderFile)
+    assert read_sidecar(volume.path) is not None
+    _assert_statistics(volume.statistics(), data)